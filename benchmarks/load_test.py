@@ -0,0 +1,328 @@
+"""
+End-to-end load test za auth/forms/responses servise.
+
+Pokreće sva tri servisa (uvicorn, localhost) nad privremenim SQLite bazama
+(ili nad zadatim bazama, npr. Postgres), pravi sintetičke forme preko API-ja,
+upisuje --responses odgovora direktno u bazu responses-service-a, pa
+--duration sekundi vozi mešavinu saobraćaja sa --concurrency klijenata:
+
+    submit     POST responses /submit
+    meta       GET  forms     /forms/{id}/meta
+    aggregate  GET  responses /forms/{id}/aggregate
+    list       GET  responses /forms/{id}/responses
+    export     GET  responses /forms/{id}/export
+
+Izveštaj: propusnost i p50/p95/p99 po operaciji. Rezultat se može sačuvati
+kao baseline (JSON, uz commit) i uporediti sa kasnijim pokretanjem:
+
+    python benchmarks/load_test.py --responses 100000 --duration 60 --save benchmarks/baselines/main.json
+    python benchmarks/load_test.py --responses 100000 --duration 60 --compare benchmarks/baselines/main.json
+
+Sa --compare izlazni kod je 1 ako je p95 neke operacije lošiji od baseline-a
+za više od --threshold procenata (ili propusnost pala za isto toliko).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import MetaData, create_engine, func, insert, select
+
+ROOT = Path(__file__).resolve().parents[1]
+SERVICES = ("auth", "forms", "responses")
+DEFAULT_MIX = "submit=50,meta=25,aggregate=12,list=10,export=3"
+
+CHOICES = [f"opcija {i}" for i in range(10)]
+QUESTIONS = [
+    {"text": "Ime", "type": "short_text"},
+    {"text": "Komentar", "type": "long_text"},
+    {"text": "Smer", "type": "single_choice", "options_json": {"choices": CHOICES}},
+    {"text": "Interesovanja", "type": "multi_choice", "options_json": {"choices": CHOICES[:8], "required_count": 1}},
+    {"text": "Ocena", "type": "numeric", "options_json": {"range": {"start": 1, "end": 10, "step": 1}}},
+]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else None
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+# -----------------------
+# Servisi
+# -----------------------
+def start_services(args, tmp: Path, procs: list) -> dict:
+    urls = {svc: f"http://127.0.0.1:{args.port + i}" for i, svc in enumerate(SERVICES)}
+    dbs = {svc: getattr(args, f"{svc}_db") or f"sqlite:///{tmp / svc}.db" for svc in SERVICES}
+    common = {
+        **os.environ,
+        "JWT_SECRET": "bench-secret",
+        "INTERNAL_TOKEN": "bench-internal",
+        "AUTH_API": urls["auth"],
+        "FORMS_API": urls["forms"],
+        "RESPONSES_API": urls["responses"],
+        "EVENT_SUBSCRIBERS": f"{urls['responses']}/events",
+        "BCRYPT_ROUNDS": "4",
+        "CORS_ORIGINS": "*",
+    }
+    for i, svc in enumerate(SERVICES):
+        env = {**common, "DATABASE_URL": dbs[svc]}
+        cwd = ROOT / "services" / f"{svc}-service"
+        subprocess.run([sys.executable, "-m", "app.migrations"], cwd=cwd, env=env, check=True)
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port + i),
+               "--log-level", "warning", "--workers", str(args.workers)]
+        procs.append(subprocess.Popen(cmd, cwd=cwd, env=env))
+    for svc, url in urls.items():
+        for _ in range(300):
+            try:
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            except httpx.RequestError:
+                pass
+            time.sleep(0.1)
+        else:
+            raise SystemExit(f"{svc}-service did not start (port {url} busy?)")
+    return {"urls": urls, "dbs": dbs}
+
+
+def stop_services(procs: list):
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+
+
+# -----------------------
+# Seed
+# -----------------------
+def create_forms(urls: dict, n: int) -> tuple[str, list[dict]]:
+    email, password = "bench@example.com", "bench-pass-123"
+    with httpx.Client(timeout=30) as cx:
+        cx.post(f"{urls['auth']}/register", json={"email": email, "full_name": "Bench", "password": password})
+        token = cx.post(f"{urls['auth']}/login", params={"email": email, "password": password}).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        forms = []
+        for i in range(n):
+            r = cx.post(f"{urls['forms']}/forms", headers=auth,
+                        json={"name": f"Bench {i}", "allow_anonymous": True, "questions": QUESTIONS})
+            r.raise_for_status()
+            forms.append(r.json())
+    return token, forms
+
+
+def random_answers(form: dict, rnd: random.Random) -> list[dict]:
+    out = []
+    for q in form["questions"]:
+        t = q["type"]
+        if t == "short_text":
+            v = f"odgovor {rnd.randrange(1000)}"
+        elif t == "long_text":
+            v = "lorem ipsum " * rnd.randrange(1, 20)
+        elif t == "single_choice":
+            v = rnd.choice(q["options_json"]["choices"])
+        elif t == "multi_choice":
+            v = rnd.sample(q["options_json"]["choices"], rnd.randrange(1, 4))
+        else:
+            v = rnd.randrange(1, 11)
+        out.append({"question_id": q["id"], "value": v})
+    return out
+
+
+def seed_responses(db_url: str, forms: list[dict], total: int, rnd: random.Random, batch: int = 5000):
+    """Odgovori direktno u bazu (Core bulk insert), bez prolaska kroz /submit."""
+    engine = create_engine(db_url)
+    meta = MetaData()
+    meta.reflect(bind=engine, only=["responses", "answers"])
+    responses, answers = meta.tables["responses"], meta.tables["answers"]
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        next_id = (conn.execute(select(func.max(responses.c.id))).scalar() or 0) + 1
+    done = 0
+    while done < total:
+        n = min(batch, total - done)
+        rrows, arows = [], []
+        for rid in range(next_id, next_id + n):
+            form = forms[rid % len(forms)]
+            rrows.append({"id": rid, "form_id": form["id"], "form_version": form.get("version")})
+            for a in random_answers(form, rnd):
+                arows.append({"response_id": rid, "question_id": a["question_id"], "value": json.dumps(a["value"])})
+        with engine.begin() as conn:
+            conn.execute(insert(responses), rrows)
+            conn.execute(insert(answers), arows)
+        next_id += n
+        done += n
+    engine.dispose()
+    print(f"seeded {total} responses in {time.perf_counter() - t0:.1f}s")
+
+
+# -----------------------
+# Saobraćaj
+# -----------------------
+def parse_mix(spec: str) -> dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight)
+    unknown = set(mix) - {"submit", "meta", "aggregate", "list", "export"}
+    if unknown:
+        raise SystemExit(f"unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+async def drive(urls: dict, forms: list[dict], args) -> tuple[dict, float]:
+    mix = parse_mix(args.mix)
+    ops, weights = list(mix), list(mix.values())
+    samples: dict[str, list[float]] = {op: [] for op in ops}
+    errors: dict[str, dict[int, int]] = {op: {} for op in ops}
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+
+    async def one(cx, op, rnd, record):
+        form = rnd.choice(forms)
+        t0 = time.perf_counter()
+        if op == "submit":
+            r = await cx.post(f"{urls['responses']}/submit", json={"form_id": form["id"], "answers": random_answers(form, rnd)})
+        elif op == "meta":
+            r = await cx.get(f"{urls['forms']}/forms/{form['id']}/meta")
+        elif op == "aggregate":
+            r = await cx.get(f"{urls['responses']}/forms/{form['id']}/aggregate")
+        elif op == "list":
+            r = await cx.get(f"{urls['responses']}/forms/{form['id']}/responses")
+        else:
+            r = await cx.get(f"{urls['responses']}/forms/{form['id']}/export")
+        await r.aread()
+        elapsed = time.perf_counter() - t0
+        if record:
+            if r.status_code >= 400:
+                errors[op][r.status_code] = errors[op].get(r.status_code, 0) + 1
+            else:
+                samples[op].append(elapsed)
+
+    async def worker(i, cx, start, deadline):
+        rnd = random.Random(args.seed * 1000 + i)
+        while (now := time.perf_counter()) < deadline:
+            op = rnd.choices(ops, weights)[0]
+            try:
+                await one(cx, op, rnd, record=now >= start)
+            except httpx.HTTPError:
+                errors[op][0] = errors[op].get(0, 0) + 1
+
+    async with httpx.AsyncClient(timeout=120, limits=limits) as cx:
+        start = time.perf_counter() + args.warmup
+        deadline = start + args.duration
+        await asyncio.gather(*(worker(i, cx, start, deadline) for i in range(args.concurrency)))
+    return {"samples": samples, "errors": errors}, float(args.duration)
+
+
+def summarize(run: dict, elapsed: float) -> dict:
+    results = {}
+    for op, lat in run["samples"].items():
+        results[op] = {
+            "n": len(lat),
+            "rps": len(lat) / elapsed,
+            "p50_ms": pct(lat, .50),
+            "p95_ms": pct(lat, .95),
+            "p99_ms": pct(lat, .99),
+            "errors": run["errors"][op],
+        }
+    return results
+
+
+def fmt(v):
+    return f"{v:8.1f}" if v is not None else "       -"
+
+
+def print_report(results: dict, baseline: dict | None = None):
+    print(f"{'op':<10} {'n':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+    for op, r in results.items():
+        line = f"{op:<10} {r['n']:>7} {fmt(r['rps'])} {fmt(r['p50_ms'])} {fmt(r['p95_ms'])} {fmt(r['p99_ms'])}  {r['errors'] or ''}"
+        base = (baseline or {}).get(op)
+        if base and base.get("p95_ms") and r["p95_ms"]:
+            line += f"   p95 {100 * (r['p95_ms'] / base['p95_ms'] - 1):+.0f}%  rps {100 * (r['rps'] / base['rps'] - 1):+.0f}%"
+        print(line)
+    print(f"total      {sum(r['rps'] for r in results.values()):8.1f} req/s")
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    out = []
+    for op, base in baseline.items():
+        cur = results.get(op)
+        if not cur or not cur["n"] or not base.get("n"):
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + threshold / 100):
+            out.append(f"{op}: p95 {base['p95_ms']:.1f} -> {cur['p95_ms']:.1f} ms")
+        if cur["rps"] < base["rps"] * (1 - threshold / 100):
+            out.append(f"{op}: rps {base['rps']:.1f} -> {cur['rps']:.1f}")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--forms", type=int, default=20)
+    ap.add_argument("--responses", type=int, default=100_000)
+    ap.add_argument("--duration", type=float, default=30)
+    ap.add_argument("--warmup", type=float, default=3)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"težine operacija (default {DEFAULT_MIX})")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--port", type=int, default=18101, help="auth na port, forms na port+1, responses na port+2")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn --workers po servisu")
+    for svc in SERVICES:
+        ap.add_argument(f"--{svc}-db", default=None, help=f"DATABASE_URL za {svc}-service (default: privremeni SQLite)")
+    ap.add_argument("--save", type=Path, help="sačuvaj rezultat kao baseline (JSON)")
+    ap.add_argument("--compare", type=Path, help="uporedi sa baseline-om")
+    ap.add_argument("--threshold", type=float, default=20, help="dozvoljeno pogoršanje u procentima")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="forms_load_"))
+    procs = []
+    try:
+        env = start_services(args, tmp, procs)
+        rnd = random.Random(args.seed)
+        _, forms = create_forms(env["urls"], args.forms)
+        seed_responses(env["dbs"]["responses"], forms, args.responses, rnd)
+        run, elapsed = asyncio.run(drive(env["urls"], forms, args))
+    finally:
+        stop_services(procs)
+
+    results = summarize(run, elapsed)
+    baseline = json.loads(args.compare.read_text())["results"] if args.compare else None
+    print_report(results, baseline)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        params = {k: v for k, v in vars(args).items() if k not in ("save", "compare") and not k.endswith("_db")}
+        args.save.write_text(json.dumps({
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "params": params,
+            "results": results,
+        }, indent=2, default=str))
+        print(f"baseline saved to {args.save}")
+
+    if baseline:
+        bad = regressions(results, baseline, args.threshold)
+        for line in bad:
+            print("REGRESSION", line)
+        sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
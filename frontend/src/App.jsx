@@ -17,9 +17,17 @@ function RequireAuth({ children }) {
 }
 
 export default function App() {
-  const { token, isGuest, logout, setGuest } = useAuth();
+  const { token, isGuest, logout, setGuest, refresh } = useAuth();
   const nav = useNavigate();
 
+  // obnovi access token pri učitavanju i pre isteka (auth-service ga izdaje na ~15 min)
+  React.useEffect(() => { refresh(); }, [refresh]);
+  React.useEffect(() => {
+    if (!token) return;
+    const id = setInterval(refresh, 10 * 60 * 1000);
+    return () => clearInterval(id);
+  }, [token, refresh]);
+
   const onGuest = () => {
     setGuest(true);
     nav('/forms');
@@ -50,6 +50,20 @@ export const api = {
     return fetch(`${AUTH}/login?email=${e}&password=${p}`, { method: 'POST' }).then(asJson);
   },
 
+  refresh: (refresh_token) =>
+    fetch(`${AUTH}/token/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token }),
+    }).then(asJson),
+
+  logout: (t, refresh_token) =>
+    fetch(`${AUTH}/logout`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...authH(t) },
+      body: JSON.stringify({ refresh_token }),
+    }),
+
   me: (t) =>
     fetch(`${AUTH}/me`, { headers: { ...authH(t) } }).then(asJson),
 
@@ -128,6 +142,14 @@ export const api = {
       headers: { ...authH(t) },
     }).then(asJson),
 
+  // Grupne izmene pitanja u jednoj transakciji: ops = [{op:'create'|'update'|'delete'|'reorder', ...}]
+  patchQuestions: (t, formId, ops, expectedVersion = null) =>
+    fetch(`${FORMS}/forms/${formId}/questions`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json', ...authH(t) },
+      body: JSON.stringify({ ops, expected_version: expectedVersion }),
+    }).then(asJson),
+
   reorder: (t, formId, order) =>
     fetch(`${FORMS}/forms/${formId}/reorder`, {
       method: 'POST',
@@ -9,7 +9,7 @@ export default function Login() {
   const [err, setErr] = useState('');
   const [loading, setLoading] = useState(false);
   const nav = useNavigate();
-  const { setToken, setMe, setGuest } = useAuth();
+  const { setToken, setRefreshToken, setMe, setGuest } = useAuth();
 
   const mapErrorMessage = (status, detail, fallbackMsg) => {
   const raw =
@@ -87,6 +87,7 @@ export default function Login() {
       if (!tok) throw new Error('No token in login response');
 
       setToken(tok);
+      setRefreshToken(r?.refresh_token || '');
       setGuest(false);
 
       try {
@@ -1,7 +1,12 @@
 import { create } from 'zustand'
+import { api } from './api'
+
+// obnova u poslednjem minutu (iz bilo koje kartice) se ne ponavlja
+const REFRESH_FRESH_MS = 60 * 1000;
 
 export const useAuth = create((set, get) => ({
   token: localStorage.getItem('token') || '',
+  refreshToken: localStorage.getItem('refresh_token') || '',
   me: null,
   isGuest: localStorage.getItem('guest') === '1',
 
@@ -12,6 +17,40 @@ export const useAuth = create((set, get) => ({
   set({ token: t || '', isGuest: false });
 },
 
+setRefreshToken: (t) => {
+  if (t) localStorage.setItem('refresh_token', t);
+  else localStorage.removeItem('refresh_token');
+  set({ refreshToken: t || '' });
+},
+
+// access token kratko traje; menjamo ga pre isteka uz refresh token.
+// Refresh token se rotira, pa sve kartice dele jedan (localStorage) i menjaju ga
+// jedna po jedna: stari token poslat iz druge kartice server vidi kao krađu i
+// odjavljuje korisnika na svim uređajima.
+refresh: async () => {
+  const run = async () => {
+    const rt = localStorage.getItem('refresh_token') || '';
+    const at = Number(localStorage.getItem('refreshed_at') || 0);
+    if (!rt) return;
+    if (Date.now() - at < REFRESH_FRESH_MS) {
+      // druga kartica je upravo obnovila tokene; samo ih preuzmi
+      set({ token: localStorage.getItem('token') || '', refreshToken: rt });
+      return;
+    }
+    try {
+      const r = await api.refresh(rt);
+      localStorage.setItem('refreshed_at', String(Date.now()));
+      get().setToken(r.access_token);
+      get().setRefreshToken(r.refresh_token);
+    } catch (_) {
+      // ako je u međuvremenu druga kartica promenila token, ovo nije naša greška
+      if (localStorage.getItem('refresh_token') === rt) get().logout();
+    }
+  };
+  if (navigator.locks) return navigator.locks.request('auth-refresh', run);
+  return run();
+},
+
 setGuest: (v) => {
   if (v) localStorage.setItem('guest', '1');
   else localStorage.removeItem('guest');
@@ -21,8 +60,22 @@ setGuest: (v) => {
 
 
   logout: () => {
+    const { token, refreshToken } = get();
+    if (token) api.logout(token, refreshToken).catch(() => {});
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
+    localStorage.removeItem('refreshed_at');
     localStorage.removeItem('guest');
-    set({ token: '', me: null, isGuest: false });
+    set({ token: '', refreshToken: '', me: null, isGuest: false });
   },
 }));
+
+// tokeni koje je promenila druga kartica (refresh, login, logout)
+window.addEventListener('storage', (e) => {
+  if (e.key === 'token' || e.key === 'refresh_token' || e.key === null) {
+    useAuth.setState({
+      token: localStorage.getItem('token') || '',
+      refreshToken: localStorage.getItem('refresh_token') || '',
+    });
+  }
+});
@@ -0,0 +1,98 @@
+"""
+Bulk uvoz korisnika (CSV ili JSON).
+
+Redovi se validiraju pojedinačno (UserCreate), lozinke hešira hash_pool
+paralelno, a upis je jedan INSERT za sve redove. Greške se vraćaju po
+redu (broj reda je 1-based, kao u tabeli koju admin šalje).
+"""
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from .models import User
+from .schemas import UserCreate, BulkUserError
+
+
+class BulkFormatError(ValueError):
+    pass
+
+
+class BulkTooLarge(BulkFormatError):
+    pass
+
+
+def _raw_rows(body: bytes, content_type: str) -> list[dict]:
+    text = body.decode("utf-8-sig")
+    if "csv" in content_type:
+        return [dict(r) for r in csv.DictReader(io.StringIO(text))]
+    try:
+        data = json.loads(text or "null")
+    except ValueError:
+        raise BulkFormatError("Body is not valid JSON")
+    if isinstance(data, dict):
+        data = data.get("users")
+    if not isinstance(data, list) or not all(isinstance(r, dict) for r in data):
+        raise BulkFormatError("Expected a list of users or {\"users\": [...]}")
+    return data
+
+
+def parse_rows(body: bytes, content_type: str, max_rows: int | None = None
+               ) -> tuple[list[tuple[int, UserCreate]], list[BulkUserError]]:
+    """
+    Validni redovi (broj reda, UserCreate) i greške; duplikati email-a u istom fajlu su greška.
+    Više od max_rows redova -> BulkTooLarge, pre validacije ijednog reda.
+    """
+    raw_rows = _raw_rows(body, content_type)
+    if max_rows is not None and len(raw_rows) > max_rows:
+        raise BulkTooLarge(f"At most {max_rows} rows per upload")
+    rows, errors, seen = [], [], set()
+    for i, raw in enumerate(raw_rows, start=1):
+        email = (raw.get("email") or "").strip() or None
+        try:
+            u = UserCreate(email=email, full_name=(raw.get("full_name") or "").strip(), password=raw.get("password") or "")
+        except ValidationError as e:
+            err = e.errors()[0]
+            field = ".".join(str(x) for x in err.get("loc", ()))
+            errors.append(BulkUserError(row=i, email=email, detail=f"{field}: {err.get('msg')}"))
+            continue
+        key = u.email.lower()
+        if key in seen:
+            errors.append(BulkUserError(row=i, email=u.email, detail="Duplicate email in upload"))
+            continue
+        seen.add(key)
+        rows.append((i, u))
+    return rows, errors
+
+
+def existing_emails(db: Session, emails: list[str]) -> set[str]:
+    if not emails:
+        return set()
+    return set(db.execute(select(User.email).where(User.email.in_(emails))).scalars())
+
+
+def _insert_stmt(db: Session):
+    # ON CONFLICT DO NOTHING: red koji je u međuvremenu registrovan preskačemo umesto da padne ceo batch
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(User)
+    return dialect_insert(User).on_conflict_do_nothing(index_elements=["email"])
+
+
+def insert_users(db: Session, rows: list[dict]) -> list[User]:
+    """Jedan INSERT za sve redove; vraća upisane korisnike (bez onih koji su već postojali)."""
+    if not rows:
+        return []
+    stmt = _insert_stmt(db).returning(User.id)
+    ids = db.execute(stmt, rows).scalars().all()
+    db.commit()
+    if not ids:
+        return []
+    return db.execute(select(User).where(User.id.in_(ids)).order_by(User.id)).scalars().all()
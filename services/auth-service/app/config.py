@@ -2,3 +2,44 @@ import os
 JWT_SECRET = os.getenv("JWT_SECRET","devsecret123")
 CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS","*").split(",")]
 DATABASE_URL = os.getenv("DATABASE_URL","sqlite:///./auth.db")
+# engine profil: small | default | large; DB_POOL_* pregaze vrednosti profila
+DB_PROFILE = os.getenv("DB_PROFILE","default")
+def _opt_int(name):
+    v = os.getenv(name)
+    return int(v) if v not in (None, "") else None
+DB_POOL_SIZE = _opt_int("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = _opt_int("DB_MAX_OVERFLOW")
+DB_POOL_RECYCLE = _opt_int("DB_POOL_RECYCLE")
+DB_POOL_TIMEOUT = _opt_int("DB_POOL_TIMEOUT")
+# pre-ping: auto (samo mrežne baze) | always | never
+DB_PRE_PING = os.getenv("DB_PRE_PING","auto").lower()
+# SQLite pragme (WAL se uvek uključuje za fajl bazu)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS","NORMAL").upper()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS","5000"))
+# šema: python -m app.migrations pre servera; 1 = migracije i u startup hook-u (dev)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP","0").lower() in ("1","true","yes")
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL","60"))
+# bcrypt u posebnom pool-u procesa; preko HASH_QUEUE_MAX čekanja -> 503
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", str(HASH_WORKERS * 4)))
+# bcrypt cost, isti za ceo deployment; predlog daje `python -m app.security calibrate` (ciljno vreme i granice ispod)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS","12"))
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS","250"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS","10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS","16"))
+# kratkoživući access token + refresh token koji se čuva na serveru (kao hash)
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL","900"))
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL", str(30 * 24 * 3600)))
+# servisi povlače listu opozvanih tokena sa /revocations uz ovaj ključ
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN","devinternal123")
+REVOCATION_RELOAD_INTERVAL = float(os.getenv("REVOCATION_RELOAD_INTERVAL","5"))
+# bulk uvoz / batch lookup korisnika
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS","5000"))
+LOOKUP_MAX = int(os.getenv("LOOKUP_MAX","500"))
+# /users: tačan broj se računa do ove granice, iznad nje je procena
+USERS_COUNT_CAP = int(os.getenv("USERS_COUNT_CAP","10000"))
+# profiler SQL upita po zahtevu (zaglavlja X-DB-*, log sporih upita i N+1)
+SQL_PROFILE = os.getenv("SQL_PROFILE","0").lower() in ("1","true","yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS","200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD","5"))
@@ -0,0 +1,127 @@
+"""
+Pool procesa za bcrypt (hash/verify).
+
+bcrypt je CPU-bound i drži FastAPI threadpool zauzetim; pod naletom login-a
+health check i /me čekaju iza njega. Ovde se heširanje radi u zasebnim
+procesima, a broj poslova koji čekaju je ograničen: kada je red pun, odmah
+vraćamo 503 umesto da zahtevi vise.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import HASH_WORKERS, HASH_QUEUE_MAX
+from . import security, metrics
+
+hash_duration = metrics.registry.register(metrics.Histogram(
+    "bcrypt_duration_seconds", "bcrypt hash/verify time including pool queueing", ("op",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)))
+hash_rejected = metrics.registry.register(metrics.Counter(
+    "bcrypt_rejected_total", "bcrypt jobs rejected because the pool queue was full"))
+hash_in_flight = metrics.registry.register(metrics.Gauge(
+    "bcrypt_in_flight", "bcrypt jobs running or queued in the pool"))
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+class HashStats:
+    def __init__(self, window: int = 2048):
+        self.count = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self._recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+        def pct(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else None
+        return {
+            "count": self.count,
+            "rejected": self.rejected,
+            "avg_ms": (self.total_seconds / self.count * 1000) if self.count else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
+
+
+class HashPool:
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_QUEUE_MAX):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.stats = HashStats()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # lenjo: procesi se prave tek pri prvom heširanju, ne pri importu
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=security.configure,
+                initargs=(security.rounds,),
+            )
+        return self._executor
+
+    async def _run(self, op: str, fn, *args):
+        if self.pending >= self.max_pending:
+            self.stats.rejected += 1
+            hash_rejected.inc()
+            raise HashPoolBusy()
+        self.pending += 1
+        t0 = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        finally:
+            self.pending -= 1
+            elapsed = time.perf_counter() - t0
+            self.stats.observe(elapsed)
+            hash_duration.observe(elapsed, op)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", security.hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run("verify", security.verify_password, password, hashed)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hash-evi za bulk uvoz: najviše `workers` istovremeno, da login ne čeka iza celog uvoza."""
+        sem = asyncio.Semaphore(self.workers)
+
+        async def one(p):
+            async with sem:
+                return await self._run("hash", security.hash_password, p)
+        tasks = [asyncio.ensure_future(one(p)) for p in passwords]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # npr. HashPoolBusy: ostatak uvoza ne sme da nastavi da zauzima pool
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def reset(self):
+        """Ugasi procese da bi sledeći posao pokrenuo nove (npr. posle promene cost-a)."""
+        self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_pool = HashPool()
+hash_in_flight.set_function(lambda: hash_pool.pending)
@@ -0,0 +1,51 @@
+"""
+Pomoćne funkcije za admin listu korisnika: keyset stranice, pretraga po
+prefiksu i procena ukupnog broja bez punog COUNT(*).
+"""
+from sqlalchemy import select, func, and_, or_, text
+from sqlalchemy.orm import Session
+
+from .models import User
+
+
+def _escape_like(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def prefix_match(expr, prefix: str, dialect: str):
+    """
+    lower(expr) počinje sa prefix-om. Postgres koristi indeks sa pattern_ops
+    za LIKE; SQLite LIKE nad izrazom ne koristi indeks, pa dodajemo i opseg
+    [prefix, sledeći_prefix) koji ide preko indeksa na lower(...).
+    """
+    p = prefix.lower()
+    cond = expr.like(_escape_like(p) + "%", escape="\\")
+    if dialect == "sqlite":
+        upper = p[:-1] + chr(ord(p[-1]) + 1)
+        cond = and_(expr >= p, expr < upper, cond)
+    return cond
+
+
+def search_filter(q: str | None, dialect: str):
+    if not q or not q.strip():
+        return None
+    q = q.strip()
+    return or_(prefix_match(func.lower(User.email), q, dialect),
+               prefix_match(func.lower(User.full_name), q, dialect))
+
+
+def estimate_total(db: Session, where, cap: int) -> tuple[int, bool]:
+    """
+    (broj, da_li_je_procena). Bez filtera na Postgres-u čitamo pg_class.reltuples
+    (statistika planera); inače brojimo najviše `cap` redova pa je rezultat
+    tačan ispod granice, a preko nje je donja granica.
+    """
+    if where is None and db.get_bind().dialect.name == "postgresql":
+        est = db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'")).scalar()
+        if est is not None and est >= cap:
+            return int(est), True
+    inner = select(User.id)
+    if where is not None:
+        inner = inner.where(where)
+    n = db.execute(select(func.count()).select_from(inner.limit(cap).subquery())).scalar() or 0
+    return n, n >= cap
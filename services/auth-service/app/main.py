@@ -1,15 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Header, Query, Security
+import time
+_IMPORT_T0 = time.perf_counter()  # trajanje importa aplikacije (app_startup_seconds{phase="import"})
+
+import logging
+
+from fastapi import FastAPI, HTTPException, Depends, status, Header, Query, Security, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, or_
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 
-from .config import JWT_SECRET, CORS_ORIGINS
-from .db import Base, engine, SessionLocal
-from .models import User
-from .schemas import UserCreate, UserOut, UserUpdate, Token
-from .security import hash_password, verify_password
+from .config import (
+    JWT_SECRET, CORS_ORIGINS,
+    BCRYPT_ROUNDS,
+    INTERNAL_TOKEN, REVOCATION_RELOAD_INTERVAL, BULK_MAX_ROWS, LOOKUP_MAX, USERS_COUNT_CAP,
+    SQL_PROFILE, MIGRATE_ON_STARTUP,
+)
+from .db import engine, SessionLocal
+from .migrations import migrate
+from .models import User, RefreshToken
+from .schemas import (
+    UserCreate, UserOut, UserUpdate, Token, RefreshIn,
+    UserLookup, UserLookupOut, BulkUserError, BulkUserResult,
+)
+from . import security as crypto
+from .principal import Principal, principal_cache
+from .hashing import hash_pool, HashPoolBusy
+from . import tokens, bulk, listing, metrics, profiling
 
 app = FastAPI(
     title="Auth Service",
@@ -25,9 +44,50 @@ app.add_middleware(
     allow_credentials=False,     # IMPORTANT: ne mešati "*" sa True
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Estimated"],
 )
 
-Base.metadata.create_all(bind=engine)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+profiling.install(engine)
+if SQL_PROFILE:
+    app.add_middleware(profiling.QueryProfilerMiddleware)
+
+_startup_t0 = [0.0]
+
+@app.on_event("startup")
+def _begin_startup():
+    _startup_t0[0] = time.perf_counter()
+    # šema se pravi van importa (python -m app.migrations pre servera); MIGRATE_ON_STARTUP=1 za lokalni razvoj
+    if MIGRATE_ON_STARTUP:
+        migrate()
+
+@app.exception_handler(HashPoolBusy)
+async def _hash_pool_busy(request, exc):
+    # brzo odbijanje umesto čekanja u redu iza bcrypt-a
+    return JSONResponse({"detail": "Server busy, try again"}, status_code=503, headers={"Retry-After": "1"})
+
+log = logging.getLogger(__name__)
+
+@app.on_event("startup")
+def _configure_bcrypt():
+    # cost je zajednički za sve čvorove (BCRYPT_ROUNDS); lokalno merenje bi ga razlikovalo po CPU-u
+    crypto.configure(BCRYPT_ROUNDS)
+    hash_pool.reset()
+    log.info("bcrypt cost set to %s", BCRYPT_ROUNDS)
+
+@app.on_event("startup")
+def _prune_tokens():
+    db = SessionLocal()
+    try:
+        tokens.prune(db)
+        db.commit()
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def _stop_hash_pool():
+    hash_pool.shutdown()
 
 # --------------------------
 # DB session
@@ -44,11 +104,10 @@ def get_db():
 # --------------------------
 security = HTTPBearer(auto_error=False)
 
-def get_current_user(
+def get_token_claims(
     credentials: HTTPAuthorizationCredentials | None = Security(security),
     authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
-) -> User:
+) -> dict:
     # Uzmi token ili iz Swagger "Authorize" (HTTPBearer) ili direktno iz Authorization header-a
     token = None
     if credentials and credentials.scheme.lower() == "bearer":
@@ -60,19 +119,67 @@ def get_current_user(
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Missing token")
 
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+        claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], options={"require_exp": True})
     except JWTError:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+    if _revocations().is_revoked(claims):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token revoked")
+    return claims
+
+def _revocations() -> tokens.RevocationList:
+    # lokalna kopija liste; iz baze se osvežava najviše jednom u REVOCATION_RELOAD_INTERVAL
+    # (zbog ostalih worker-a), a opozivi iz ovog procesa se primenjuju odmah
+    rl = tokens.revocations
+    if time.monotonic() - rl.loaded_at > REVOCATION_RELOAD_INTERVAL:
+        db = SessionLocal()
+        try:
+            rl.load(tokens.snapshot(db))
+        finally:
+            db.close()
+    return rl
+
+def require_internal(x_internal_token: str | None = Header(None)):
+    if x_internal_token != INTERNAL_TOKEN:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Forbidden")
 
-    u = db.execute(select(User).where(User.email == payload.get("sub"))).scalar_one_or_none()
+def get_principal(
+    claims: dict = Depends(get_token_claims),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    Korisnik iz tokena: keš po uid (bez upita u bazu), pa tek onda baza.
+    Sesija se otvara lenjo, pa pogodak u kešu ne košta ni konekciju.
+    """
+    sub, uid = claims.get("sub"), claims.get("uid")
+    p = principal_cache.get(uid) if uid is not None else None
+    if p is None:
+        u = db.get(User, uid) if uid is not None else None
+        if u is None:
+            u = db.execute(select(User).where(User.email == sub)).scalar_one_or_none()
+        if not u:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+        p = Principal.from_user(u)
+        principal_cache.set(p)
+    # token izdat za stari email više ne važi (isto kao ranije pretraga po email-u)
+    if p.email != sub:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+    return p
+
+def get_current_user(
+    p: Principal = Depends(get_principal),
+    db: Session = Depends(get_db),
+) -> User:
+    """ORM korisnik, samo za endpoint-e koji menjaju podatke."""
+    u = db.get(User, p.id)
     if not u:
+        principal_cache.invalidate(p.id)
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
     return u
 
-def require_admin(u: User = Depends(get_current_user)) -> User:
-    if getattr(u, "role", "user") != "admin":
+def require_admin(p: Principal = Depends(get_principal)) -> Principal:
+    if p.role != "admin":
         raise HTTPException(status.HTTP_403_FORBIDDEN, "Admin only")
-    return u
+    return p
 
 # --------------------------
 # Health
@@ -81,89 +188,284 @@ def require_admin(u: User = Depends(get_current_user)) -> User:
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # --------------------------
 # Auth
 # --------------------------
-@app.post("/register", status_code=status.HTTP_201_CREATED, response_model=UserOut)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    existing = db.execute(select(User).where(User.email == user_in.email)).scalar_one_or_none()
-    if existing:
-        raise HTTPException(status.HTTP_409_CONFLICT, "Email is already registered")
-    u = User(email=user_in.email, full_name=user_in.full_name, hashed_password=hash_password(user_in.password))
+def _user_by_email(db: Session, email: str) -> User | None:
+    return db.execute(select(User).where(User.email == email)).scalar_one_or_none()
+
+def _insert_user(db: Session, u: User) -> User:
     db.add(u)
     db.commit()
     db.refresh(u)
     return u
 
+# register/login su async: bcrypt ide u hash_pool, a kratki DB pozivi u threadpool,
+# pa nalet login-a ne zauzima threadpool koji služi ostale endpoint-e
+@app.post("/register", status_code=status.HTTP_201_CREATED, response_model=UserOut)
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(_user_by_email, db, user_in.email)
+    if existing:
+        raise HTTPException(status.HTTP_409_CONFLICT, "Email is already registered")
+    hashed = await hash_pool.hash(user_in.password)
+    u = User(email=user_in.email, full_name=user_in.full_name, hashed_password=hashed)
+    return await run_in_threadpool(_insert_user, db, u)
+
+def _store_rehash(uid: int, old_hash: str, new_hash: str):
+    db = SessionLocal()
+    try:
+        # upiši samo ako se lozinka u međuvremenu nije promenila
+        db.execute(update(User).where(User.id == uid, User.hashed_password == old_hash)
+                   .values(hashed_password=new_hash))
+        db.commit()
+    finally:
+        db.close()
+
+async def _rehash(uid: int, password: str, old_hash: str):
+    """Hash sa starim cost-om zameni novim, posle odgovora na login."""
+    try:
+        new_hash = await hash_pool.hash(password)
+    except HashPoolBusy:
+        return  # pokušaćemo pri sledećem login-u
+    await run_in_threadpool(_store_rehash, uid, old_hash, new_hash)
+
 @app.post("/login", response_model=Token)
-def login(email: str = Query(...), password: str = Query(...), db: Session = Depends(get_db)):
-    u = db.execute(select(User).where(User.email == email)).scalar_one_or_none()
-    if not u or not verify_password(password, u.hashed_password):
+async def login(
+    background: BackgroundTasks,
+    email: str = Query(...),
+    password: str = Query(...),
+    db: Session = Depends(get_db),
+):
+    u = await run_in_threadpool(_user_by_email, db, email)
+    if not u or not await hash_pool.verify(password, u.hashed_password):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid credentials")
-    token = jwt.encode({"sub": u.email, "uid": u.id, "name": u.full_name}, JWT_SECRET, algorithm="HS256")
-    return {"access_token": token, "token_type": "bearer"}
+    if crypto.needs_rehash(u.hashed_password):
+        background.add_task(_rehash, u.id, password, u.hashed_password)
+    return await run_in_threadpool(_issue_tokens, db, u)
+
+def _issue_tokens(db: Session, u: User) -> dict:
+    out = tokens.issue(db, u)
+    db.commit()
+    return out
+
+@app.post("/token/refresh", response_model=Token)
+def refresh_token(body: RefreshIn, db: Session = Depends(get_db)):
+    # stari refresh token se troši, klijent dobija novi par
+    try:
+        u = tokens.rotate(db, body.refresh_token)
+    except tokens.RefreshTokenReused as e:
+        tokens.revocations.add(user_id=e.user_id)
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid refresh token")
+    except tokens.InvalidRefreshToken:
+        db.rollback()
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid refresh token")
+    return _issue_tokens(db, u)
+
+@app.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    body: RefreshIn | None = None,
+    everywhere: bool = Query(False),
+    claims: dict = Depends(get_token_claims),
+    db: Session = Depends(get_db),
+):
+    uid = claims.get("uid")
+    if everywhere and uid is not None:
+        tokens.revoke_user(db, uid)
+        db.commit()
+        tokens.revocations.add(user_id=uid)
+        return None
+    tokens.revoke_access(db, claims)
+    if body is not None and uid is not None:
+        tokens.revoke_refresh(db, body.refresh_token, uid)
+    db.commit()
+    tokens.revocations.add(jti=claims.get("jti"))
+    return None
+
+@app.get("/revocations", dependencies=[Depends(require_internal)])
+def revocations(db: Session = Depends(get_db)):
+    """Lista opozvanih access tokena koju forms/responses servisi povlače periodično."""
+    return tokens.snapshot(db)
+
+@app.get("/metrics/hashing")
+def hashing_metrics():
+    return {"workers": hash_pool.workers, "queue_max": hash_pool.max_pending, "bcrypt_rounds": crypto.rounds,
+            "in_flight": hash_pool.pending, **hash_pool.stats.snapshot()}
 
 @app.get("/me", response_model=UserOut)
-def me(current: User = Depends(get_current_user)):
+def me(current: Principal = Depends(get_principal)):
     return current
 
-# Self update (bez admin prava)
-@app.put("/me", response_model=UserOut)
-def update_me(me_in: UserUpdate, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    if me_in.email and me_in.email != me.email:
-        if db.execute(select(User).where(User.email == me_in.email)).scalar_one_or_none():
+def _apply_update(db: Session, u: User, data: UserUpdate, hashed: str | None) -> User:
+    """Zajednički deo PUT /me i PUT /users/{id}; nova lozinka (već heširana) gasi sve sesije."""
+    if data.email and data.email != u.email:
+        if _user_by_email(db, data.email):
             raise HTTPException(status.HTTP_409_CONFLICT, "Email is already registered")
-        me.email = me_in.email
-    if me_in.full_name is not None:
-        me.full_name = me_in.full_name
-    if me_in.password is not None:
-        me.hashed_password = hash_password(me_in.password)
-    db.add(me); db.commit(); db.refresh(me)
-    return me
+        u.email = data.email
+    if data.full_name is not None:
+        u.full_name = data.full_name
+    if hashed is not None:
+        u.hashed_password = hashed
+        tokens.revoke_user(db, u.id)
+    db.add(u); db.commit(); db.refresh(u)
+    principal_cache.invalidate(u.id)
+    if hashed is not None:
+        tokens.revocations.add(user_id=u.id)
+    return u
+
+# Self update (bez admin prava); bcrypt kao i register ide u hash_pool
+@app.put("/me", response_model=UserOut)
+async def update_me(me_in: UserUpdate, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
+    hashed = await hash_pool.hash(me_in.password) if me_in.password is not None else None
+    return await run_in_threadpool(_apply_update, db, me, me_in, hashed)
 
 # --------------------------
 # CRUD korisnika (samo admin)
 # --------------------------
 @app.get("/users", response_model=list[UserOut])
-def list_users(skip: int = 0, limit: int = 50, db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    users = db.execute(select(User).offset(skip).limit(limit)).scalars().all()
+def list_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    after: int | None = Query(None, description="Cursor: id poslednjeg korisnika sa prethodne strane"),
+    q: str | None = Query(None, description="Prefiks email-a ili imena"),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_admin),
+):
+    """
+    Keyset stranice po User.id: sledeća strana je `?after=<X-Next-Cursor>`.
+    `skip` (OFFSET) ostaje radi kompatibilnosti, ali se ne koristi uz `after`.
+    Ukupan broj je u X-Total-Count (procena za velike tabele, X-Total-Estimated).
+    """
+    where = listing.search_filter(q, db.get_bind().dialect.name)
+    stmt = select(User).order_by(User.id).limit(limit)
+    if where is not None:
+        stmt = stmt.where(where)
+    if after is not None:
+        stmt = stmt.where(User.id > after)
+    elif skip:
+        stmt = stmt.offset(skip)
+    users = db.execute(stmt).scalars().all()
+
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
+    total, estimated = listing.estimate_total(db, where, USERS_COUNT_CAP)
+    response.headers["X-Total-Count"] = str(total)
+    response.headers["X-Total-Estimated"] = "true" if estimated else "false"
     return users
 
+@app.post("/users/lookup", response_model=list[UserLookupOut], response_model_exclude_none=True)
+def lookup_users(body: UserLookup, db: Session = Depends(get_db), p: Principal = Depends(get_principal)):
+    """
+    Više korisnika po email-u u jednom upitu (ekran kolaboratora): za svaki
+    traženi email {email, exists, full_name}, bez id-a i uloge, da se nalozi i
+    uloge ne mogu nabrajati. Admin traži i po id-u i dobija id.
+    """
+    admin = p.role == "admin"
+    if body.ids and not admin:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Lookup by id is admin only")
+    if len(body.emails) + len(body.ids) > LOOKUP_MAX:
+        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f"At most {LOOKUP_MAX} emails/ids per request")
+    conds = []
+    if body.emails:
+        conds.append(User.email.in_(set(body.emails)))
+    if body.ids:
+        conds.append(User.id.in_(set(body.ids)))
+    if not conds:
+        return []
+    found = db.execute(select(User).where(or_(*conds)).order_by(User.id)).scalars().all()
+
+    def out(u: User) -> dict:
+        return {"email": u.email, "exists": True, "full_name": u.full_name, "id": u.id if admin else None}
+
+    by_email = {u.email: u for u in found}
+    emails = list(dict.fromkeys(body.emails))
+    result = [out(by_email[e]) if e in by_email else {"email": e, "exists": False} for e in emails]
+    ids, listed = set(body.ids), set(emails)
+    result += [out(u) for u in found if u.id in ids and u.email not in listed]
+    return result
+
+@app.post("/users/bulk", response_model=BulkUserResult)
+async def bulk_create_users(request: Request, db: Session = Depends(get_db), _: Principal = Depends(require_admin)):
+    """
+    Uvoz korisnika iz CSV-a (email,full_name,password) ili JSON liste.
+    Lozinke se heširaju paralelno u hash_pool-u, upis je jedan INSERT;
+    redovi sa greškom ili postojećim email-om vraćaju se u `errors`.
+    """
+    try:
+        rows, errors = bulk.parse_rows(await request.body(), request.headers.get("content-type", ""), BULK_MAX_ROWS)
+    except bulk.BulkTooLarge as e:
+        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, str(e))
+    except (bulk.BulkFormatError, UnicodeDecodeError) as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e) or "Invalid upload")
+
+    taken = await run_in_threadpool(bulk.existing_emails, db, [u.email for _, u in rows])
+    fresh = []
+    for i, u in rows:
+        if u.email in taken:
+            errors.append(BulkUserError(row=i, email=u.email, detail="Email is already registered"))
+        else:
+            fresh.append((i, u))
+
+    hashes = await hash_pool.hash_many([u.password for _, u in fresh])
+    values = [{"email": u.email, "full_name": u.full_name, "hashed_password": h}
+              for (_, u), h in zip(fresh, hashes)]
+    created = await run_in_threadpool(bulk.insert_users, db, values)
+
+    # red koji je neko registrovao između provere i upisa (ON CONFLICT DO NOTHING)
+    inserted = {u.email for u in created}
+    errors += [BulkUserError(row=i, email=u.email, detail="Email is already registered")
+               for i, u in fresh if u.email not in inserted]
+    errors.sort(key=lambda e: e.row)
+    return {"created": created, "errors": errors}
+
 @app.get("/users/{user_id}", response_model=UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def get_user(user_id: int, db: Session = Depends(get_db), _: Principal = Depends(require_admin)):
     u = db.get(User, user_id)
     if not u:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
     return u
 
 @app.post("/users", status_code=status.HTTP_201_CREATED, response_model=UserOut)
-def create_user(user_in: UserCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    if db.execute(select(User).where(User.email == user_in.email)).scalar_one_or_none():
+async def create_user(user_in: UserCreate, db: Session = Depends(get_db), _: Principal = Depends(require_admin)):
+    if await run_in_threadpool(_user_by_email, db, user_in.email):
         raise HTTPException(status.HTTP_409_CONFLICT, "Email is already registered")
-    u = User(email=user_in.email, full_name=user_in.full_name, hashed_password=hash_password(user_in.password))
-    db.add(u); db.commit(); db.refresh(u)
-    return u
+    hashed = await hash_pool.hash(user_in.password)
+    u = User(email=user_in.email, full_name=user_in.full_name, hashed_password=hashed)
+    return await run_in_threadpool(_insert_user, db, u)
 
 @app.put("/users/{user_id}", response_model=UserOut)
-def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    u = db.get(User, user_id)
+async def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(get_db), _: Principal = Depends(require_admin)):
+    u = await run_in_threadpool(db.get, User, user_id)
     if not u:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-    if user_in.email and user_in.email != u.email:
-        if db.execute(select(User).where(User.email == user_in.email)).scalar_one_or_none():
-            raise HTTPException(status.HTTP_409_CONFLICT, "Email is already registered")
-        u.email = user_in.email
-    if user_in.full_name is not None:
-        u.full_name = user_in.full_name
-    if user_in.password is not None:
-        u.hashed_password = hash_password(user_in.password)
-    db.add(u); db.commit(); db.refresh(u)
-    return u
+    hashed = await hash_pool.hash(user_in.password) if user_in.password is not None else None  # admin reset lozinke
+    return await run_in_threadpool(_apply_update, db, u, user_in, hashed)
 
 @app.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def delete_user(user_id: int, db: Session = Depends(get_db), _: Principal = Depends(require_admin)):
     u = db.get(User, user_id)
     if not u:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+    db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+    tokens.revoke_user(db, user_id)
     db.delete(u); db.commit()
+    principal_cache.invalidate(user_id)
+    tokens.revocations.add(user_id=user_id)
     return None
+
+# -----------------------
+# Vreme pokretanja (poslednji startup hook)
+# -----------------------
+metrics.startup_seconds.set(time.perf_counter() - _IMPORT_T0, "import")
+
+@app.on_event("startup")
+def _startup_done():
+    took = time.perf_counter() - _startup_t0[0]
+    metrics.startup_seconds.set(took, "startup")
+    logging.getLogger(__name__).info(
+        "ready: import %.0f ms, startup %.0f ms",
+        metrics.startup_seconds.value("import") * 1000, took * 1000)
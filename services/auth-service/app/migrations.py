@@ -0,0 +1,70 @@
+"""
+Verzionisane migracije šeme za postojeće baze.
+
+`create_all` pravi samo tabele koje ne postoje, pa izmene na postojećim
+tabelama (indeksi, kolone) idu ovde. Svaka migracija mora biti idempotentna
+jer na svežoj bazi `create_all` već napravi krajnje stanje.
+"""
+import logging
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, select, insert, func, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from .db import Base, engine
+from .models import User
+
+_meta = MetaData()
+_LOCK_KEY = 6387060  # pg advisory lock za migracije ovog servisa
+schema_version = Table("schema_version", _meta, Column("version", Integer, primary_key=True))
+
+
+def _create_indexes(conn: Connection, table):
+    # IF NOT EXISTS umesto checkfirst: inspektor ne vidi indekse nad izrazima (lower(...))
+    for ix in table.indexes:
+        conn.execute(CreateIndex(ix, if_not_exists=True))
+
+
+def _0001_user_search_indexes(conn: Connection):
+    _create_indexes(conn, User.__table__)
+
+
+MIGRATIONS = [
+    (1, _0001_user_search_indexes),
+]
+
+
+def run_migrations(engine: Engine):
+    _meta.create_all(bind=engine)
+    with engine.begin() as conn:
+        current = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        for version, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            fn(conn)
+            conn.execute(insert(schema_version).values(version=version))
+
+
+def migrate(bind: Engine = engine):
+    """
+    Cela šema (create_all + verzionisane migracije). Pokreće se pre servera,
+    `python -m app.migrations`, a ne pri importu aplikacije. Na Postgres-u
+    advisory lock sprečava da više replika migrira istovremeno.
+    """
+    with bind.connect() as lock:
+        if bind.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_KEY})
+        try:
+            Base.metadata.create_all(bind=bind)
+            run_migrations(bind)
+        finally:
+            if bind.dialect.name == "postgresql":
+                lock.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    t0 = time.perf_counter()
+    migrate()
+    logging.getLogger(__name__).info("schema up to date (%.0f ms)", (time.perf_counter() - t0) * 1000)
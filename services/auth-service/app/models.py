@@ -1,4 +1,6 @@
-from sqlalchemy import Integer, String
+from datetime import datetime
+
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 import sqlalchemy as sa
 
@@ -12,3 +14,33 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     role = sa.Column(sa.String(20), nullable=False, server_default="user")  
 
+    # pretraga po prefiksu (lower(...) LIKE 'x%'); na Postgres-u pattern_ops da LIKE koristi indeks
+    __table_args__ = (
+        Index("ix_users_email_lower", func.lower(email).label("email_lower"),
+              postgresql_ops={"email_lower": "varchar_pattern_ops"}),
+        Index("ix_users_full_name_lower", func.lower(full_name).label("full_name_lower"),
+              postgresql_ops={"full_name_lower": "varchar_pattern_ops"}),
+    )
+
+class RefreshToken(Base):
+    """Refresh token se čuva samo kao sha256 hash; posle upotrebe se rotira (revoked_at)."""
+    __tablename__ = "refresh_tokens"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+class RevokedToken(Base):
+    """Opozvan access token (jti); red je potreban samo dok token ne istekne."""
+    __tablename__ = "revoked_tokens"
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+
+class TokenCutoff(Base):
+    """Svi access tokeni korisnika izdati pre not_before su opozvani (odjava svuda, brisanje naloga)."""
+    __tablename__ = "token_cutoffs"
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    not_before: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
@@ -0,0 +1,53 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from .config import PRINCIPAL_CACHE_TTL
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Ulogovani korisnik bez ORM sesije (dovoljno za read-only endpoint-e i proveru uloge)."""
+    id: int
+    email: str
+    full_name: str
+    role: str
+
+    @classmethod
+    def from_user(cls, u) -> "Principal":
+        return cls(id=u.id, email=u.email, full_name=u.full_name, role=getattr(u, "role", None) or "user")
+
+
+class PrincipalCache:
+    """uid -> Principal sa kratkim TTL-om; poništava se pri izmeni/brisanju korisnika."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._data: dict[int, tuple[float, Principal]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, uid: int) -> Principal | None:
+        hit = self._data.get(uid)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            self._data.pop(uid, None)
+            return None
+        return hit[1]
+
+    def set(self, p: Principal):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[p.id] = (time.monotonic() + self.ttl, p)
+
+    def invalidate(self, uid: int):
+        with self._lock:
+            self._data.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL)
@@ -21,4 +21,29 @@ class UserOut(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+    expires_in: int | None = None
 
+class RefreshIn(BaseModel):
+    refresh_token: str
+
+
+class UserLookup(BaseModel):
+    emails: list[EmailStr] = []
+    ids: list[int] = []
+
+class UserLookupOut(BaseModel):
+    # za ekran kolaboratora samo ovo; id dobija samo admin
+    email: EmailStr
+    exists: bool
+    full_name: str | None = None
+    id: int | None = None
+
+class BulkUserError(BaseModel):
+    row: int
+    email: str | None = None
+    detail: str
+
+class BulkUserResult(BaseModel):
+    created: list[UserOut]
+    errors: list[BulkUserError]
@@ -1,4 +1,56 @@
+import argparse
+import math
+import time
+
 from passlib.context import CryptContext
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _context(rounds: int | None = None) -> CryptContext:
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # samo donja granica: needs_update() je tačno za slabije hash-eve, jači se ne diraju
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=rounds,
+                        bcrypt__min_rounds=rounds)
+
+pwd = _context()
+rounds: int | None = None  # None -> passlib podrazumevani cost
+
+def configure(r: int | None):
+    """Postavi bcrypt cost (u glavnom procesu i u svakom procesu hash pool-a)."""
+    global pwd, rounds
+    pwd, rounds = _context(r), r
+
 def hash_password(p: str) -> str: return pwd.hash(p[:72])
 def verify_password(p: str, h: str) -> bool: return pwd.verify(p[:72], h)
+def needs_rehash(h: str) -> bool: return pwd.needs_update(h)
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3) -> int:
+    """
+    Izaberi bcrypt cost čije je vreme na ovom CPU-u najbliže target_ms.
+    Meri se najmanji cost; svaki sledeći korak udvostručuje vreme. Pokreće se
+    jednom po deployment-u (`python -m app.security calibrate` na najsporijem tipu
+    čvora), a rezultat ide u BCRYPT_ROUNDS: isti cost na svim čvorovima.
+    """
+    probe = _context(min_rounds)
+    elapsed = float("inf")
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        probe.hash("calibration-probe")
+        elapsed = min(elapsed, time.perf_counter() - t0)
+    steps = round(math.log2(max(target_ms / 1000, 1e-6) / max(elapsed, 1e-6)))
+    return max(min_rounds, min(max_rounds, min_rounds + steps))
+
+
+def main(argv=None):
+    from .config import BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS
+    p = argparse.ArgumentParser(prog="python -m app.security", description="bcrypt cost for BCRYPT_ROUNDS")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("calibrate", help="print the cost closest to --target-ms on this CPU")
+    c.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS)
+    c.add_argument("--min", type=int, default=BCRYPT_MIN_ROUNDS)
+    c.add_argument("--max", type=int, default=BCRYPT_MAX_ROUNDS)
+    args = p.parse_args(argv)
+    print(calibrate_rounds(args.target_ms, args.min, args.max))
+
+
+if __name__ == "__main__":
+    main()
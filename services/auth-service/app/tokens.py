@@ -0,0 +1,173 @@
+"""
+Access/refresh tokeni i lista opozvanih tokena.
+
+Access token je kratkoživući JWT (exp, iat, jti) koji servisi proveravaju
+lokalno. Refresh token je nasumičan string koji se u bazi čuva samo kao
+sha256 hash i menja se pri svakoj upotrebi (rotacija); ponovna upotreba već
+iskorišćenog refresh tokena znači da je procureo, pa se opozivaju sve sesije
+korisnika.
+
+Opoziv access tokena pre isteka ide preko male liste: skup opozvanih `jti`
+i, po korisniku, trenutak pre kog su svi njegovi tokeni nevažeći. Unos se
+čuva samo dok ne istekne poslednji token na koji se odnosi (ACCESS_TOKEN_TTL),
+pa lista ostaje mala; servisi je povlače periodično sa /revocations.
+"""
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+
+from .config import JWT_SECRET, ACCESS_TOKEN_TTL, REFRESH_TOKEN_TTL
+from .models import User, RefreshToken, RevokedToken, TokenCutoff
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+class RefreshTokenReused(InvalidRefreshToken):
+    def __init__(self, user_id: int):
+        super().__init__(user_id)
+        self.user_id = user_id
+
+
+def _epoch(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _hash(raw: str) -> str:
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def access_token(u: User, now: float | None = None) -> str:
+    now = time.time() if now is None else now
+    claims = {
+        "sub": u.email, "uid": u.id, "name": u.full_name,
+        # iat sa milisekundama, da opoziv "sve do sada" ne zahvati token izdat odmah posle njega
+        "iat": round(now, 3), "exp": int(now) + ACCESS_TOKEN_TTL, "jti": uuid.uuid4().hex,
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+
+def issue(db: Session, u: User) -> dict:
+    """Novi par tokena; refresh token se upisuje u tekuću transakciju (commit radi pozivalac)."""
+    raw = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.add(RefreshToken(user_id=u.id, token_hash=_hash(raw), created_at=now,
+                        expires_at=now + timedelta(seconds=REFRESH_TOKEN_TTL)))
+    return {"access_token": access_token(u), "token_type": "bearer",
+            "refresh_token": raw, "expires_in": ACCESS_TOKEN_TTL}
+
+
+def rotate(db: Session, raw: str) -> User:
+    """Iskoristi refresh token: označi ga kao opozvan i vrati korisnika (novi par izdaje `issue`)."""
+    now = datetime.utcnow()
+    rt = db.execute(select(RefreshToken).where(RefreshToken.token_hash == _hash(raw))).scalar_one_or_none()
+    if rt is None or rt.expires_at <= now:
+        raise InvalidRefreshToken()
+    if rt.revoked_at is not None:
+        # isti refresh token drugi put -> neko ima kopiju; gasimo sve sesije korisnika
+        revoke_user(db, rt.user_id)
+        db.commit()
+        raise RefreshTokenReused(rt.user_id)
+    u = db.get(User, rt.user_id)
+    if u is None:
+        raise InvalidRefreshToken()
+    # compare-and-set: od dva istovremena refresh-a istim tokenom uspeva samo jedan
+    done = db.execute(update(RefreshToken)
+                      .where(RefreshToken.id == rt.id, RefreshToken.revoked_at.is_(None))
+                      .values(revoked_at=now)).rowcount
+    if not done:
+        raise InvalidRefreshToken()
+    return u
+
+
+def revoke_refresh(db: Session, raw: str, user_id: int):
+    db.execute(update(RefreshToken)
+               .where(RefreshToken.token_hash == _hash(raw), RefreshToken.user_id == user_id,
+                      RefreshToken.revoked_at.is_(None))
+               .values(revoked_at=datetime.utcnow()))
+
+
+def revoke_access(db: Session, claims: dict):
+    """Opozovi jedan access token (odjava); bez jti/exp nema šta da se upiše."""
+    jti, exp = claims.get("jti"), claims.get("exp")
+    if not jti or not exp:
+        return
+    if db.get(RevokedToken, jti) is None:
+        db.add(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(exp)))
+
+
+def revoke_user(db: Session, user_id: int):
+    """Opozovi sve tokene korisnika: refresh tokene u bazi i access tokene izdate do sada."""
+    now = datetime.utcnow()
+    db.execute(update(RefreshToken)
+               .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+               .values(revoked_at=now))
+    cut = db.get(TokenCutoff, user_id)
+    if cut is None:
+        cut = TokenCutoff(user_id=user_id)
+        db.add(cut)
+    cut.not_before = now
+    cut.expires_at = now + timedelta(seconds=ACCESS_TOKEN_TTL)
+
+
+def snapshot(db: Session) -> dict:
+    """Trenutna lista opozvanih tokena (samo unosi koji još nisu istekli)."""
+    now = datetime.utcnow()
+    jtis = db.execute(select(RevokedToken.jti).where(RevokedToken.expires_at > now)).scalars().all()
+    users = db.execute(select(TokenCutoff.user_id, TokenCutoff.not_before)
+                       .where(TokenCutoff.expires_at > now)).all()
+    return {"jtis": list(jtis), "users": {str(uid): _epoch(nb) for uid, nb in users},
+            "generated_at": time.time()}
+
+
+def prune(db: Session):
+    """Obriši istekle unose (i istekle refresh tokene)."""
+    now = datetime.utcnow()
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    db.execute(delete(TokenCutoff).where(TokenCutoff.expires_at <= now))
+    db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now))
+
+
+class RevocationList:
+    """
+    Lokalna kopija liste opozvanih tokena; provera je O(1) (skup + dict).
+    `load` zamenjuje celu kopiju jednom dodelom, pa čitaoci ne trebaju lock.
+    """
+
+    def __init__(self):
+        self._state: tuple[frozenset, dict] = (frozenset(), {})
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, snap: dict):
+        users = {int(k): float(v) for k, v in (snap.get("users") or {}).items()}
+        self._state = (frozenset(snap.get("jtis") or ()), users)
+        self.loaded_at = time.monotonic()
+
+    def add(self, jti: str | None = None, user_id: int | None = None, not_before: float | None = None):
+        """Odmah primeni lokalni opoziv (pre sledećeg učitavanja)."""
+        with self._lock:
+            jtis, users = self._state
+            if jti:
+                jtis = jtis | {jti}
+            if user_id is not None:
+                users = {**users, user_id: not_before or time.time()}
+            self._state = (jtis, users)
+
+    def is_revoked(self, claims: dict) -> bool:
+        jtis, users = self._state
+        if claims.get("jti") in jtis:
+            return True
+        cut = users.get(claims.get("uid"))
+        return cut is not None and (claims.get("iat") or 0) < cut
+
+
+revocations = RevocationList()
@@ -0,0 +1,118 @@
+"""
+Login-storm benchmark: da li /health i /me ostaju brzi dok traje nalet login-a?
+
+Pokreće auth-service (uvicorn) nad privremenom SQLite bazom, registruje
+korisnika, meri latenciju /health i /me u mirovanju, pa ponovo dok
+--concurrency klijenata neprekidno zove /login.
+
+    cd services/auth-service
+    python benchmarks/login_storm.py --logins 400 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else float("nan")
+
+
+def summary(name, lat):
+    return (f"{name:<22} n={len(lat):<5} p50={pct(lat, .5):7.1f}ms "
+            f"p99={pct(lat, .99):7.1f}ms mean={statistics.fmean(lat) * 1000 if lat else 0:7.1f}ms")
+
+
+async def probe(cx, path, headers, stop, out):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await cx.get(path, headers=headers)
+        out.append(time.perf_counter() - t0)
+        await asyncio.sleep(0.01)
+
+
+async def storm(cx, email, password, n, concurrency, codes):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            r = await cx.post("/login", params={"email": email, "password": password})
+            codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(n)))
+
+
+async def run(base, args):
+    async with httpx.AsyncClient(base_url=base, timeout=60) as cx:
+        email, password = "storm@example.com", "storm-pass-123"
+        await cx.post("/register", json={"email": email, "full_name": "Storm", "password": password})
+        token = (await cx.post("/login", params={"email": email, "password": password})).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+
+        for phase in ("idle", "storm"):
+            health, me, codes, stop = [], [], {}, asyncio.Event()
+            probes = [asyncio.create_task(probe(cx, "/health", {}, stop, health)),
+                      asyncio.create_task(probe(cx, "/me", auth, stop, me))]
+            t0 = time.perf_counter()
+            if phase == "storm":
+                await storm(cx, email, password, args.logins, args.concurrency, codes)
+            else:
+                await asyncio.sleep(2)
+            elapsed = time.perf_counter() - t0
+            stop.set()
+            await asyncio.gather(*probes)
+
+            print(f"--- {phase} ({elapsed:.1f}s)")
+            print(summary("/health", health))
+            print(summary("/me", me))
+            if codes:
+                print(f"/login status codes: {codes}  ({args.logins / elapsed:.1f} logins/s)")
+        print("hash pool:", (await cx.get("/metrics/hashing")).json())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--port", type=int, default=18001)
+    ap.add_argument("--workers", type=int, default=None, help="HASH_WORKERS")
+    ap.add_argument("--queue", type=int, default=None, help="HASH_QUEUE_MAX")
+    args = ap.parse_args()
+
+    db = Path(tempfile.mkdtemp()) / "auth_bench.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db}"}
+    if args.workers:
+        env["HASH_WORKERS"] = str(args.workers)
+    if args.queue:
+        env["HASH_QUEUE_MAX"] = str(args.queue)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                if httpx.get(f"{base}/health").status_code == 200:
+                    break
+            except httpx.RequestError:
+                time.sleep(0.1)
+        asyncio.run(run(base, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import bulk
+from app.db import Base
+from app.main import lookup_users
+from app.models import User
+from app.principal import Principal
+from app.schemas import UserLookup
+
+def test_parse_rows_reports_invalid_and_duplicate_rows():
+    csv_body = b"email,full_name,password\na@x.com,A,pass1234\nnot-an-email,B,pass1234\nA@x.com,A2,pass1234\n"
+    rows, errors = bulk.parse_rows(csv_body, "text/csv")
+    assert [i for i, _ in rows] == [1]
+    assert [(e.row, e.detail.split(":")[0]) for e in errors] == [(2, "email"), (3, "Duplicate email in upload")]
+
+    rows, errors = bulk.parse_rows(b'{"users": [{"email": "c@x.com", "full_name": "C", "password": "pass1234"}]}', "application/json")
+    assert rows[0][1].email == "c@x.com" and not errors
+
+def test_insert_users_single_statement_skips_conflicts():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(email="taken@x.com", full_name="T", hashed_password="h")); db.commit()
+
+    inserts = []
+    event.listen(engine, "before_cursor_execute", lambda *a: inserts.append(a[2]) if a[2].startswith("INSERT") else None)
+    rows = [{"email": e, "full_name": "N", "hashed_password": "h"} for e in ("n1@x.com", "taken@x.com", "n2@x.com")]
+    created = bulk.insert_users(db, rows)
+    assert [u.email for u in created] == ["n1@x.com", "n2@x.com"]
+    assert len(inserts) == 1
+
+def test_parse_rows_rejects_oversized_upload_before_validating():
+    body = b"email,full_name,password\n" + b"".join(b"bad,,\n" for _ in range(3))
+    with pytest.raises(bulk.BulkTooLarge):
+        bulk.parse_rows(body, "text/csv", max_rows=2)
+    assert len(bulk.parse_rows(body, "text/csv", max_rows=3)[1]) == 3
+
+def test_lookup_by_id_is_admin_only():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([User(email="a@x.com", full_name="A", hashed_password="h"),
+                User(email="b@x.com", full_name="B", hashed_password="h")])
+    db.commit()
+    user = Principal(id=1, email="a@x.com", full_name="A", role="user")
+    admin = Principal(id=9, email="admin@x.com", full_name="Admin", role="admin")
+
+    with pytest.raises(HTTPException) as e:
+        lookup_users(UserLookup(ids=[2]), db, user)
+    assert e.value.status_code == 403
+    assert [u["email"] for u in lookup_users(UserLookup(ids=[1, 2]), db, admin)] == ["a@x.com", "b@x.com"]
+
+def test_lookup_returns_only_email_name_and_existence_to_users():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(email="b@x.com", full_name="B", hashed_password="h", role="admin"))
+    db.commit()
+    user = Principal(id=1, email="a@x.com", full_name="A", role="user")
+    admin = Principal(id=9, email="admin@x.com", full_name="Admin", role="admin")
+
+    out = lookup_users(UserLookup(emails=["nobody@x.com", "b@x.com", "b@x.com"]), db, user)
+    assert out == [{"email": "nobody@x.com", "exists": False},
+                   {"email": "b@x.com", "exists": True, "full_name": "B", "id": None}]
+    assert lookup_users(UserLookup(emails=["b@x.com"]), db, admin)[0]["id"] == 1
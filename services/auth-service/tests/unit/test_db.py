@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app.db import engine_options, make_engine
+
+
+def test_profile_defaults_and_prepinging():
+    opts = engine_options("postgresql+psycopg2://u:p@db/auth", "large")
+    assert opts["pool_size"] == 20 and opts["max_overflow"] == 30 and opts["pool_recycle"] == 1800
+    assert opts["pool_pre_ping"] is True
+    assert engine_options("sqlite:///./auth.db")["pool_pre_ping"] is False
+
+
+def test_memory_sqlite_has_no_pool_sizing():
+    assert engine_options("sqlite://") == {"pool_pre_ping": False}
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        engine_options("sqlite:///x.db", "huge")
+
+
+def test_sqlite_pragmas(tmp_path):
+    eng = make_engine(f"sqlite:///{tmp_path / 'x.db'}")
+    with eng.connect() as c:
+        assert c.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert c.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert c.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    eng.dispose()
+
+
+def test_wal_reader_not_blocked_by_open_writer(tmp_path):
+    eng = make_engine(f"sqlite:///{tmp_path / 'x.db'}")
+    with eng.begin() as c:
+        c.execute(text("CREATE TABLE t (x INTEGER)"))
+        c.execute(text("INSERT INTO t VALUES (1)"))
+    writer = eng.connect()
+    tx = writer.begin()
+    writer.execute(text("INSERT INTO t VALUES (2)"))
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(eng.connect().execute(text("SELECT count(*) FROM t")).scalar()))
+    t.start(); t.join(timeout=5)
+    tx.rollback(); writer.close(); eng.dispose()
+    assert seen == [1]
+
@@ -0,0 +1,31 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app import listing
+from app.db import Base
+from app.models import User
+
+def _db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for email, name in [("ana@x.com", "Ana A"), ("anb@x.com", "Bob"), ("a_c@x.com", "Cic"), ("zed@x.com", "Anja")]:
+        db.add(User(email=email, full_name=name, hashed_password="h"))
+    db.commit()
+    return db
+
+def _emails(db, q):
+    where = listing.search_filter(q, "sqlite")
+    return [u.email for u in db.execute(select(User).where(where).order_by(User.id)).scalars()]
+
+def test_prefix_search_on_email_and_name_escapes_wildcards():
+    db = _db()
+    assert _emails(db, "AN") == ["ana@x.com", "anb@x.com", "zed@x.com"]
+    assert _emails(db, "a_") == ["a_c@x.com"]
+    assert listing.search_filter("  ", "sqlite") is None
+
+def test_estimate_total_is_capped():
+    db = _db()
+    assert listing.estimate_total(db, None, cap=10) == (4, False)
+    assert listing.estimate_total(db, None, cap=3) == (3, True)
+    assert listing.estimate_total(db, listing.search_filter("an", "sqlite"), cap=10) == (3, False)
@@ -0,0 +1,17 @@
+from app.principal import Principal, PrincipalCache
+
+def test_principal_cache_ttl_and_invalidate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.principal.time.monotonic", lambda: now[0])
+    p = Principal(id=1, email="a@example.com", full_name="A", role="user")
+    c = PrincipalCache(ttl=60)
+    c.set(p)
+    assert c.get(1) == p
+    c.invalidate(1)
+    assert c.get(1) is None
+
+    c.set(p)
+    now[0] += 59
+    assert c.get(1) == p
+    now[0] += 2
+    assert c.get(1) is None
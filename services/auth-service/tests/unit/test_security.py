@@ -1,3 +1,4 @@
+import pytest
 from app.security import hash_password, verify_password
 
 def test_hash_and_verify_password_ok():
@@ -8,3 +9,83 @@ def test_hash_and_verify_password_ok():
 def test_verify_password_wrong():
     h = hash_password("pass1234")
     assert verify_password("wrong", h) is False
+
+import asyncio
+from app.hashing import HashPool, HashPoolBusy
+
+def test_hash_pool_rejects_when_queue_full():
+    pool = HashPool(workers=1, max_pending=0)
+    with pytest.raises(HashPoolBusy):
+        asyncio.run(pool.hash("pass1234"))
+    assert pool.stats.rejected == 1
+
+from app import security
+
+def test_configure_rounds_only_upgrades_weaker_hashes():
+    try:
+        security.configure(4)
+        weak = hash_password("pass1234")
+        security.configure(5)
+        new = hash_password("pass1234")
+        assert new.startswith("$2b$05$")
+        assert security.needs_rehash(weak) is True
+        assert security.needs_rehash(new) is False
+        # hash sa većim cost-om (npr. sa čvora sa drugom konfiguracijom) se ne spušta
+        security.configure(4)
+        assert security.needs_rehash(new) is False
+        assert verify_password("pass1234", weak) is True
+    finally:
+        security.configure(None)
+
+def test_calibrate_rounds_is_clamped():
+    assert security.calibrate_rounds(0.001, min_rounds=4, max_rounds=6, samples=1) == 4
+    assert security.calibrate_rounds(10_000_000, min_rounds=4, max_rounds=6, samples=1) == 6
+
+def test_hash_many_cancels_remaining_jobs_when_pool_is_busy():
+    started = []
+
+    class Pool(HashPool):
+        async def _run(self, op, fn, *args):
+            started.append(args[0])
+            if args[0] == "p1":
+                raise HashPoolBusy()
+            await asyncio.sleep(10)
+
+    with pytest.raises(HashPoolBusy):
+        asyncio.run(asyncio.wait_for(Pool(workers=2).hash_many([f"p{i}" for i in range(10)]), 5))
+    # p2 može da uđe na mesto p1 pre nego što greška stigne do gather-a; ostali se ne pokreću
+    assert started[:2] == ["p0", "p1"] and len(started) <= 3
+
+def test_user_writes_hash_through_the_pool(monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app import main
+    from app.db import Base
+    from app.models import User
+    from app.schemas import UserCreate, UserUpdate
+
+    # DB deo endpoint-a ide u threadpool: jedna konekcija deljena između niti
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(email="a@x.com", full_name="A", hashed_password="old")); db.commit()
+
+    class Pool:
+        busy = False
+        async def hash(self, password):
+            if self.busy:
+                raise HashPoolBusy()
+            return f"pooled:{password}"
+
+    pool = Pool()
+    monkeypatch.setattr(main, "hash_pool", pool)
+    created = asyncio.run(main.create_user(UserCreate(email="b@x.com", full_name="B", password="pass1234"), db, None))
+    assert created.hashed_password == "pooled:pass1234"
+    me = asyncio.run(main.update_me(UserUpdate(password="newpass12"), db, db.get(User, 1)))
+    assert me.hashed_password == "pooled:newpass12"
+
+    pool.busy = True  # pun red -> HashPoolBusy (503), lozinka ostaje ista
+    with pytest.raises(HashPoolBusy):
+        asyncio.run(main.update_user(2, UserUpdate(password="other123"), db, None))
+    assert db.get(User, 2).hashed_password == "pooled:pass1234"
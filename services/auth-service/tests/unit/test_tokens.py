@@ -0,0 +1,50 @@
+import time
+
+import pytest
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import tokens
+from app.config import JWT_SECRET
+from app.db import Base
+from app.models import User
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    u = User(email="a@example.com", full_name="A", hashed_password="x")
+    db.add(u); db.commit()
+    return db, u
+
+def test_access_token_is_short_lived():
+    db, u = _session()
+    claims = jwt.decode(tokens.issue(db, u)["access_token"], JWT_SECRET, algorithms=["HS256"])
+    assert claims["sub"] == "a@example.com" and claims["uid"] == u.id and claims["jti"]
+    assert claims["exp"] - int(claims["iat"]) == tokens.ACCESS_TOKEN_TTL
+
+def test_refresh_rotates_and_reuse_revokes_user():
+    db, u = _session()
+    first = tokens.issue(db, u)["refresh_token"]
+    db.commit()
+    assert tokens.rotate(db, first).id == u.id
+    second = tokens.issue(db, u)["refresh_token"]
+    db.commit()
+
+    # ponovna upotreba starog tokena gasi i novi
+    with pytest.raises(tokens.InvalidRefreshToken):
+        tokens.rotate(db, first)
+    with pytest.raises(tokens.InvalidRefreshToken):
+        tokens.rotate(db, second)
+    assert str(u.id) in tokens.snapshot(db)["users"]
+
+def test_revocation_list_checks_jti_and_user_cutoff():
+    rl = tokens.RevocationList()
+    now = int(time.time())
+    rl.load({"jtis": ["abc"], "users": {"7": now}})
+    assert rl.is_revoked({"jti": "abc", "uid": 1, "iat": now})
+    assert rl.is_revoked({"jti": "x", "uid": 7, "iat": now - 5})
+    assert not rl.is_revoked({"jti": "x", "uid": 7, "iat": now})
+    rl.add(jti="x")
+    assert rl.is_revoked({"jti": "x", "uid": 1, "iat": now})
@@ -0,0 +1,78 @@
+"""
+Moduli koje servisi dele kao kopije u app/ (svaki Docker image se gradi samo
+iz svog direktorijuma, pa nema zajedničkog paketa). Kopije moraju biti iste;
+CI pada na prvu razliku.
+
+    python services/check_shared_modules.py                       # provera (CI)
+    python services/check_shared_modules.py --sync-from forms-service   # posle izmene jedne kopije
+"""
+import argparse
+import difflib
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+ALL = ("auth-service", "forms-service", "responses-service")
+SHARED = {
+    "db.py": ALL,
+    "metrics.py": ALL,
+    "profiling.py": ALL,
+    "auth.py": ("forms-service", "responses-service"),
+    "replicas.py": ("forms-service", "responses-service"),
+    "fastjson.py": ("forms-service", "responses-service"),
+}
+
+
+def _path(service: str, module: str) -> Path:
+    return ROOT / service / "app" / module
+
+
+def check() -> list[str]:
+    """Unified diff za svaku kopiju koja se razlikuje od prve."""
+    diffs = []
+    for module, services in SHARED.items():
+        first = _path(services[0], module)
+        base = first.read_text(encoding="utf-8").splitlines(keepends=True)
+        for service in services[1:]:
+            other = _path(service, module)
+            lines = other.read_text(encoding="utf-8").splitlines(keepends=True)
+            if lines != base:
+                diffs.append("".join(difflib.unified_diff(base, lines, str(first.relative_to(ROOT)),
+                                                          str(other.relative_to(ROOT)))))
+    return diffs
+
+
+def sync(source: str) -> list[Path]:
+    """Kopiraj deljene module iz `source` u ostale servise koji ih koriste."""
+    written = []
+    for module, services in SHARED.items():
+        if source not in services:
+            continue
+        for service in services:
+            if service != source and _path(service, module).read_bytes() != _path(source, module).read_bytes():
+                shutil.copyfile(_path(source, module), _path(service, module))
+                written.append(_path(service, module))
+    return written
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Check that shared service modules are identical")
+    p.add_argument("--sync-from", choices=ALL, help="copy this service's shared modules to the other services")
+    args = p.parse_args(argv)
+    if args.sync_from:
+        for path in sync(args.sync_from):
+            print(f"updated {path.relative_to(ROOT)}")
+    diffs = check()
+    for d in diffs:
+        print(d)
+    if diffs:
+        print(f"{len(diffs)} shared module copies differ; fix one copy and run --sync-from <service>", file=sys.stderr)
+        return 1
+    print(f"{len(SHARED)} shared modules identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
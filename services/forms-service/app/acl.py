@@ -0,0 +1,109 @@
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import ACL_CACHE_TTL
+from .models import Form, Collaborator
+
+# Uloge po jačini: owner > editor > viewer
+OWNER, EDITOR, VIEWER = "owner", "editor", "viewer"
+
+_MISS = object()
+
+
+class RoleCache:
+    """
+    Kratkoživući keš (form_id, email) -> uloga kolaboratora (ili None).
+
+    Keš je lokalan za proces: invalidate čisti samo ovaj worker, a ostali
+    workeri/replike vide staru ulogu (npr. uklonjen editor i dalje menja
+    formu) najviše ACL_CACHE_TTL sekundi, pa je TTL namerno kratak (podrazumevano 5s).
+    Generacija po formi sprečava da upit pokrenut pre invalidate-a posle
+    njega ponovo upiše staru ulogu.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._data: dict[tuple[int, str], tuple[float, str | None]] = {}
+        self._gen: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, form_id: int) -> int:
+        """Uzima se pre čitanja iz baze i prosleđuje u set()."""
+        return self._gen.get(form_id, 0)
+
+    def get(self, form_id: int, email: str):
+        hit = self._data.get((form_id, email))
+        if hit is None:
+            return _MISS
+        expires, role = hit
+        if expires < time.monotonic():
+            self._data.pop((form_id, email), None)
+            return _MISS
+        return role
+
+    def set(self, form_id: int, email: str, role: str | None, generation: int | None = None):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._gen.get(form_id, 0):
+                return  # forma je invalidirana dok se uloga čitala
+            self._data[(form_id, email)] = (time.monotonic() + self.ttl, role)
+
+    def invalidate(self, form_id: int, email: str | None = None):
+        with self._lock:
+            self._gen[form_id] = self._gen.get(form_id, 0) + 1
+            if email is not None:
+                self._data.pop((form_id, email), None)
+                return
+            for key in [k for k in self._data if k[0] == form_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+role_cache = RoleCache(ACL_CACHE_TTL)
+
+
+def _collaborator_role(form_id: int, email: str, db: Session) -> str | None:
+    # 1) memo na nivou sesije (jedan request = jedna sesija)
+    memo = db.info.setdefault("acl_roles", {})
+    if (form_id, email) in memo:
+        return memo[(form_id, email)]
+
+    # 2) deljeni TTL keš, 3) jedan indeksiran upit
+    role = role_cache.get(form_id, email)
+    if role is _MISS:
+        gen = role_cache.generation(form_id)
+        role = db.execute(
+            select(Collaborator.role).where(
+                Collaborator.form_id == form_id,
+                Collaborator.email == email,
+            )
+        ).scalar_one_or_none()
+        role_cache.set(form_id, email, role, gen)
+
+    memo[(form_id, email)] = role
+    return role
+
+
+def resolve_role(form: Form, email: str | None, db: Session) -> str | None:
+    """Efektivna uloga korisnika na formi: 'owner' | 'editor' | 'viewer' | None."""
+    if not email:
+        return None
+    if form.owner_email == email:
+        return OWNER
+    return _collaborator_role(form.id, email, db)
+
+
+def invalidate(form_id: int, email: str | None = None, db: Session | None = None):
+    """Poziva se posle izmene kolaboratora (ili brisanja cele forme)."""
+    role_cache.invalidate(form_id, email)
+    if db is not None:
+        memo = db.info.get("acl_roles") or {}
+        for key in [k for k in memo if k[0] == form_id and (email is None or k[1] == email)]:
+            del memo[key]
@@ -2,3 +2,49 @@ import os
 JWT_SECRET = os.getenv("JWT_SECRET","devsecret123")
 CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS","*").split(",")]
 DATABASE_URL = os.getenv("DATABASE_URL","sqlite:///./forms.db")
+# engine profil: small | default | large; DB_POOL_* pregaze vrednosti profila
+DB_PROFILE = os.getenv("DB_PROFILE","default")
+def _opt_int(name):
+    v = os.getenv(name)
+    return int(v) if v not in (None, "") else None
+DB_POOL_SIZE = _opt_int("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = _opt_int("DB_MAX_OVERFLOW")
+DB_POOL_RECYCLE = _opt_int("DB_POOL_RECYCLE")
+DB_POOL_TIMEOUT = _opt_int("DB_POOL_TIMEOUT")
+# pre-ping: auto (samo mrežne baze) | always | never
+DB_PRE_PING = os.getenv("DB_PRE_PING","auto").lower()
+# SQLite pragme (WAL se uvek uključuje za fajl bazu)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS","NORMAL").upper()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS","5000"))
+# šema: python -m app.migrations pre servera; 1 = migracije i u startup hook-u (dev)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP","0").lower() in ("1","true","yes")
+# replike za čitanje (lista URL-ova, prazno = sve na primarnu)
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS","").split(",") if u.strip()]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS","5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS","5"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL","2"))
+# keš uloga je po procesu: ostali workeri vide izmenu kolaboratora tek posle ovoliko sekundi
+ACL_CACHE_TTL = float(os.getenv("ACL_CACHE_TTL","5"))
+META_CACHE_SIZE = int(os.getenv("META_CACHE_SIZE","512"))
+RESPONSES_API = os.getenv("RESPONSES_API","http://responses-service:8000")
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN","devinternal123")
+# outbox: "http" -> POST na EVENT_SUBSCRIBERS, "local" -> samo u procesu
+EVENT_TRANSPORT = os.getenv("EVENT_TRANSPORT","http")
+EVENT_SUBSCRIBERS = [u.strip() for u in os.getenv("EVENT_SUBSCRIBERS", f"{RESPONSES_API}/events").split(",") if u.strip()]
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL","1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS","10"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS","30"))
+# objavljeni događaji se brišu posle ovoliko sati (0 = čuvaju se)
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS","72"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE","10000"))
+TOKEN_CACHE_MAX_AGE = float(os.getenv("TOKEN_CACHE_MAX_AGE","300"))
+# lista opozvanih tokena se povlači sa auth-service (0 = isključeno)
+AUTH_API = os.getenv("AUTH_API","http://auth-service:8000")
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL","10"))
+# profiler SQL upita po zahtevu (zaglavlja X-DB-*, log sporih upita i N+1)
+SQL_PROFILE = os.getenv("SQL_PROFILE","0").lower() in ("1","true","yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS","200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD","5"))
+# brzi JSON za velike liste: bez ponovne validacije kroz response_model, bajtove pravi orjson
+FAST_JSON = os.getenv("FAST_JSON","0").lower() in ("1","true","yes")
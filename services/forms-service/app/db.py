@@ -1,8 +1,61 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
-from .config import DATABASE_URL
+from .config import (DATABASE_URL, DB_PROFILE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE,
+                     DB_POOL_TIMEOUT, DB_PRE_PING, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE, SQLITE_BUSY_TIMEOUT_MS)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Profili pool-a; DB_POOL_* iz okruženja pregaze pojedinačne vrednosti.
+# "small": jedan worker / dev, "default": tipičan servis, "large": više worker niti po procesu.
+PROFILES = {
+    "small":   {"pool_size": 2,  "max_overflow": 3,  "pool_recycle": 1800},
+    "default": {"pool_size": 5,  "max_overflow": 10, "pool_recycle": 1800},
+    "large":   {"pool_size": 20, "max_overflow": 30, "pool_recycle": 1800},
+}
+
+
+def engine_options(url: str, profile: str = DB_PROFILE) -> dict:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r} (expected one of {', '.join(PROFILES)})")
+    u = make_url(url)
+    sqlite = u.get_backend_name() == "sqlite"
+    memory = sqlite and u.database in (None, "", ":memory:")
+    # pre-ping je jedan round trip po checkout-u; za lokalni SQLite fajl nema mrežu koja bi pukla,
+    # a za mrežne baze recycle + invalidacija na grešku pokrivaju većinu slučajeva kada je isključen
+    pre_ping = DB_PRE_PING == "always" or (DB_PRE_PING == "auto" and not sqlite)
+    opts: dict = {"pool_pre_ping": pre_ping}
+    if memory:
+        return opts  # SingletonThreadPool/StaticPool nemaju pool_size/max_overflow
+    opts.update(PROFILES[profile])
+    for key, value in (("pool_size", DB_POOL_SIZE), ("max_overflow", DB_MAX_OVERFLOW),
+                       ("pool_recycle", DB_POOL_RECYCLE), ("pool_timeout", DB_POOL_TIMEOUT)):
+        if value is not None:
+            opts[key] = value
+    return opts
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL: čitaoci ne blokiraju pisca (i obrnuto); NORMAL je bezbedan uz WAL (gubi se najviše
+    # poslednja transakcija pri padu OS-a, ne konzistentnost); busy_timeout umesto "database is locked"
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cur.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+        cur.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cur.close()
+
+
+def make_engine(url: str, profile: str = DB_PROFILE) -> Engine:
+    if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS {SQLITE_SYNCHRONOUS!r}")
+    eng = create_engine(url, **engine_options(url, profile))
+    if eng.dialect.name == "sqlite":
+        event.listen(eng, "connect", _sqlite_pragmas)
+    return eng
+
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 class Base(DeclarativeBase): pass
@@ -0,0 +1,234 @@
+"""
+Događaji o promenama formi preko transakcionog outbox-a.
+
+`emit` upisuje događaj u tabelu `outbox_events` u ISTOJ transakciji kao i
+sama izmena, pa događaj postoji ako i samo ako je izmena upisana. Relay u
+pozadini čita neobjavljene događaje redom i šalje ih kroz transport
+(HTTP ka pretplatnicima ili lokalno, u procesu, za testove).
+
+  - sa više worker-a objavljuje samo relay koji drži zakup (outbox_lease),
+    pa se događaji ne šalju dvaput i redosled ostaje očuvan,
+  - događaj koji ne prođe max_attempts puta se parkira (parked_at) i red
+    ide dalje; parkirani se vraćaju u red sa `requeue_parked`,
+  - objavljeni događaji stariji od retention_hours se brišu.
+"""
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Protocol
+
+import httpx
+from sqlalchemy import select, event, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import OutboxEvent, OutboxLease
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+FORM_UPDATED = "form_updated"
+FORM_LOCKED = "form_locked"
+QUESTIONS_CHANGED = "questions_changed"
+FORM_DELETED = "form_deleted"
+
+
+def emit(db: Session, event_type: str, form_id: int, version: int | None = None, **payload):
+    """Dodaj događaj u tekuću transakciju (commit radi pozivalac)."""
+    db.add(OutboxEvent(event_type=event_type, form_id=form_id, version=version, payload=payload or None))
+    db.info["outbox_pending"] = True
+
+
+def to_message(ev: OutboxEvent) -> dict:
+    return {
+        "id": ev.id,
+        "type": ev.event_type,
+        "form_id": ev.form_id,
+        "version": ev.version,
+        "payload": ev.payload or {},
+        "created_at": ev.created_at.isoformat() if ev.created_at else None,
+    }
+
+
+# -----------------------
+# Transporti
+# -----------------------
+class Transport(Protocol):
+    def publish(self, message: dict) -> None:
+        """Isporuči poruku; izuzetak znači da isporuka nije uspela (relay pokušava ponovo)."""
+
+
+class LocalTransport:
+    """Pretplatnici u istom procesu (testovi, lokalni razvoj)."""
+
+    def __init__(self):
+        self.subscribers: list[Callable[[dict], None]] = []
+        self.published: list[dict] = []
+
+    def subscribe(self, fn: Callable[[dict], None]):
+        self.subscribers.append(fn)
+        return fn
+
+    def publish(self, message: dict) -> None:
+        self.published.append(message)
+        for fn in self.subscribers:
+            fn(message)
+
+
+class HttpTransport:
+    """POST poruke na svaki URL pretplatnika (npr. responses-service /events)."""
+
+    def __init__(self, urls: list[str], token: str, timeout: float = 5.0):
+        self.urls = urls
+        self.headers = {"X-Internal-Token": token}
+        self.client = httpx.Client(timeout=timeout, event_hooks=metrics.httpx_hooks())
+
+    def publish(self, message: dict) -> None:
+        for url in self.urls:
+            r = self.client.post(url, json=message, headers=self.headers)
+            r.raise_for_status()
+
+
+# -----------------------
+# Relay
+# -----------------------
+LEASE = "relay"
+
+
+class OutboxRelay:
+    def __init__(self, session_factory, transport: Transport, batch_size: int = 100, interval: float = 1.0,
+                 max_attempts: int = 10, lease_seconds: float = 30.0, retention_hours: float = 72.0):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retention_hours = retention_hours
+        self.holder = uuid.uuid4().hex
+        self._pruned_at = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def claim(self, db: Session) -> bool:
+        """Uzmi ili produži zakup; False ako ga drži drugi relay kome još nije istekao."""
+        now = datetime.utcnow()
+        until = now + timedelta(seconds=self.lease_seconds)
+        taken = db.execute(
+            update(OutboxLease)
+            .where(OutboxLease.name == LEASE, or_(OutboxLease.holder == self.holder, OutboxLease.expires_at < now))
+            .values(holder=self.holder, expires_at=until)
+        ).rowcount
+        if not taken:
+            db.add(OutboxLease(name=LEASE, holder=self.holder, expires_at=until))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # red postoji i drži ga neko drugi
+            return False
+        return True
+
+    def relay_once(self) -> int:
+        """
+        Objavi sledeću grupu događaja redom; staje na prvoj grešci da bi se očuvao
+        redosled, osim kada događaj iscrpi max_attempts (tada se parkira).
+        """
+        db = self.session_factory()
+        sent = 0
+        try:
+            if not self.claim(db):
+                return 0
+            # grupa mora da se završi dok zakup važi, inače bi je drugi relay poslao ponovo
+            deadline = time.monotonic() + self.lease_seconds / 2
+            batch = db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.published_at.is_(None), OutboxEvent.parked_at.is_(None))
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+            ).scalars().all()
+            for ev in batch:
+                if time.monotonic() > deadline:
+                    break
+                try:
+                    self.transport.publish(to_message(ev))
+                except Exception as e:
+                    ev.attempts = (ev.attempts or 0) + 1
+                    if ev.attempts < self.max_attempts:
+                        log.warning("outbox event %s not delivered (attempt %s): %s", ev.id, ev.attempts, e)
+                        break
+                    ev.parked_at = datetime.utcnow()
+                    log.error("outbox event %s (%s, form %s) parked after %s attempts: %s",
+                              ev.id, ev.event_type, ev.form_id, ev.attempts, e)
+                    continue
+                ev.published_at = datetime.utcnow()
+                sent += 1
+            db.commit()
+        finally:
+            db.close()
+        return sent
+
+    def prune(self, db: Session) -> int:
+        """Obriši objavljene događaje starije od retention_hours."""
+        if self.retention_hours <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        n = db.execute(
+            delete(OutboxEvent).where(OutboxEvent.published_at.is_not(None), OutboxEvent.published_at < cutoff)
+        ).rowcount
+        db.commit()
+        return n
+
+    def requeue_parked(self, db: Session, ids: list[int] | None = None) -> int:
+        """Vrati parkirane događaje (sve ili date ID-jeve) u red za slanje."""
+        stmt = update(OutboxEvent).where(OutboxEvent.parked_at.is_not(None))
+        if ids is not None:
+            stmt = stmt.where(OutboxEvent.id.in_(ids))
+        n = db.execute(stmt.values(parked_at=None, attempts=0)).rowcount
+        db.commit()
+        return n
+
+    def _maybe_prune(self):
+        if time.monotonic() - self._pruned_at < 3600:
+            return
+        self._pruned_at = time.monotonic()
+        with self.session_factory() as db:
+            n = self.prune(db)
+        if n:
+            log.info("pruned %s published outbox events", n)
+
+    def notify(self):
+        """Probudi relay odmah (posle commit-a), bez čekanja na sledeći interval."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                while self.relay_once() == self.batch_size:
+                    pass
+                self._maybe_prune()
+            except Exception:
+                log.exception("outbox relay iteration failed")
+
+    def install(self):
+        """Posle svakog commit-a koji je upisao događaje, probudi relay."""
+        @event.listens_for(self.session_factory, "after_commit")
+        def _after_commit(session):
+            if session.info.pop("outbox_pending", False):
+                self.notify()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="outbox-relay", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -1,21 +1,39 @@
+import time
+_IMPORT_T0 = time.perf_counter()  # trajanje importa aplikacije (app_startup_seconds{phase="import"})
+
+import logging
 import json
 from typing import List
 
-from fastapi import FastAPI, Depends, HTTPException, status, Query  # ← +Query
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Header  # ← +Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func, or_  # ← +or_
-
-from .config import CORS_ORIGINS
-from .db import Base, engine, SessionLocal
-from .models import Form, Question, Collaborator
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import select, func, or_, insert, update, delete, literal, Integer
+
+from .config import (
+    CORS_ORIGINS, META_CACHE_SIZE, INTERNAL_TOKEN,
+    EVENT_TRANSPORT, EVENT_SUBSCRIBERS, OUTBOX_POLL_INTERVAL, SQL_PROFILE, MIGRATE_ON_STARTUP, FAST_JSON,
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_LEASE_SECONDS, OUTBOX_RETENTION_HOURS,
+)
+from .cache import LRUCache
+from .db import engine, SessionLocal
+from .migrations import migrate
+from . import acl, events, fastjson, metrics, profiling
+from .replicas import read_router, get_read_db, ReadYourWritesMiddleware
+from .ordering import ORDER_GAP, next_rank, neighbour_ranks, rank_between, plan_reorder, rebalance
+from .models import Form, Question, Collaborator, FormTemplate
 from .schemas import (
     FormCreate, FormOut, FormUpdate,
     QuestionIn, QuestionOut,
     CollaboratorIn, CollaboratorOut,
     FormMeta,
+    QuestionBatch, QuestionMove,
+    FormCloneIn, TemplateCreate, TemplateOut,
+    FormStatus,
 )
-from .auth import get_user_email
+from .auth import get_user_email, revocation_sync
 
 app = FastAPI(
     title="Forms Service",
@@ -33,7 +51,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-Base.metadata.create_all(bind=engine)
+app.add_middleware(ReadYourWritesMiddleware, router=read_router)
+app.add_middleware(metrics.MetricsMiddleware)
+for _eng in [engine, *read_router.engines]:
+    metrics.instrument_engine(_eng)
+    profiling.install(_eng)
+if SQL_PROFILE:
+    app.add_middleware(profiling.QueryProfilerMiddleware)
+
+_startup_t0 = [0.0]
+
+@app.on_event("startup")
+def _begin_startup():
+    _startup_t0[0] = time.perf_counter()
+    # šema se pravi van importa (python -m app.migrations pre servera); MIGRATE_ON_STARTUP=1 za lokalni razvoj
+    if MIGRATE_ON_STARTUP:
+        migrate()
+
+# -----------------------
+# Outbox relay (događaji o promenama formi)
+# -----------------------
+transport = (
+    events.HttpTransport(EVENT_SUBSCRIBERS, INTERNAL_TOKEN)
+    if EVENT_TRANSPORT == "http" and EVENT_SUBSCRIBERS
+    else events.LocalTransport()
+)
+relay = events.OutboxRelay(
+    SessionLocal, transport, interval=OUTBOX_POLL_INTERVAL, max_attempts=OUTBOX_MAX_ATTEMPTS,
+    lease_seconds=OUTBOX_LEASE_SECONDS, retention_hours=OUTBOX_RETENTION_HOURS,
+)
+relay.install()
+
+@app.on_event("startup")
+def _start_relay():
+    relay.start()
+    revocation_sync.start()
+
+@app.on_event("shutdown")
+def _stop_relay():
+    relay.stop()
+    revocation_sync.stop()
 
 # -----------------------
 # DB session
@@ -49,39 +106,73 @@ def get_db():
 # Helpers
 # -----------------------
 def _to_db_options(v):
-    """DB kolona je TEXT -> upisujemo JSON string; prihvatamo i već-string."""
-    if v is None:
-        return None
-    if isinstance(v, (dict, list)):
-        return json.dumps(v, ensure_ascii=False)
-    return v  # već string
+    """DB kolona je JSON -> upisujemo dict/list direktno; stari JSON string dekodiramo."""
+    if isinstance(v, str):
+        return json.loads(v)
+    return v
+
+def _options_out(v):
+    # isto što radi QuestionOut validator: stari JSON string -> dict
+    if isinstance(v, str):
+        try:
+            return json.loads(v)
+        except ValueError:
+            return v
+    return v
+
+def _form_dict(f: Form) -> dict:
+    """FormOut kao dict, direktno iz ORM objekta (bez pydantic validacije po pitanju)."""
+    return {
+        "id": f.id, "owner_email": f.owner_email, "name": f.name, "description": f.description,
+        "allow_anonymous": f.allow_anonymous, "is_locked": f.is_locked, "version": f.version,
+        "questions": [
+            {"text": q.text, "type": q.type, "required": q.required, "order_index": q.order_index,
+             "image_url": q.image_url, "options_json": _options_out(q.options_json), "id": q.id}
+            for q in f.questions
+        ],
+    }
+
+def _forms_out(forms: list[Form]):
+    """Lista formi: sa FAST_JSON gotovi bajtovi, inače ORM objekti kroz response_model."""
+    if FAST_JSON:
+        return fastjson.response([_form_dict(f) for f in forms])
+    return forms
+
+# (form_id, version) -> FormMeta; verzija raste na svaku izmenu, pa nema zastarelih unosa
+_meta_cache = LRUCache(META_CACHE_SIZE)
+
+def _changed(db: Session, f: Form, event_type: str):
+    """Podigni verziju forme i upiši događaj u outbox (ista transakcija kao izmena)."""
+    # inkrement u SQL-u: dve istovremene izmene dobijaju različite verzije (red je zaključan do commit-a)
+    version = db.execute(
+        update(Form).where(Form.id == f.id).values(version=Form.version + 1).returning(Form.version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    set_committed_value(f, "version", version)
+    events.emit(db, event_type, f.id, version)
+
+def require_internal(x_internal_token: str | None = Header(None)):
+    """Zaštita za pozive između servisa."""
+    if x_internal_token != INTERNAL_TOKEN:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Internal endpoint")
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 def is_owner(form: Form, email: str) -> bool:
     return form.owner_email == email
 
 def can_edit(form: Form, email: str, db: Session) -> bool:
-    if is_owner(form, email):
-        return True
-    coll = db.execute(select(Collaborator).where(
-        Collaborator.form_id == form.id,
-        Collaborator.email == email
-    )).scalar_one_or_none()
-    return bool(coll and coll.role == "editor")
+    return acl.resolve_role(form, email, db) in (acl.OWNER, acl.EDITOR)
 
 def can_view(form: Form, email: str | None, db: Session) -> bool:
-    if is_owner(form, email or ""):
+    if acl.resolve_role(form, email, db) is not None:
         return True
-    if email:
-        coll = db.execute(select(Collaborator).where(
-            Collaborator.form_id == form.id,
-            Collaborator.email == email
-        )).scalar_one_or_none()
-        if coll:
-            return True
     return form.allow_anonymous
 
 def validate_question_payload(q: QuestionIn):
@@ -117,6 +208,26 @@ def validate_question_payload(q: QuestionIn):
             if not isinstance(r["step"], (int, float)) or r["step"] == 0:
                 raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "range.step must be non-zero number")
 
+def _question_rows(form_id: int, questions: list[QuestionIn], start: int = 0) -> list[dict]:
+    """Validira pitanja i pravi redove za jedan bulk INSERT (podrazumevani rangovi sa razmakom)."""
+    rows = []
+    for i, q in enumerate(questions):
+        validate_question_payload(q)
+        rows.append({
+            "form_id": form_id,
+            "text": q.text,
+            "type": q.type,
+            "required": q.required,
+            "order_index": q.order_index if q.order_index is not None else start + i * ORDER_GAP,
+            "image_url": q.image_url,
+            "options_json": _to_db_options(q.options_json),
+        })
+    return rows
+
+def _insert_questions(db: Session, rows: list[dict]):
+    if rows:
+        db.execute(insert(Question), rows)
+
 # -----------------------
 # Forms
 # -----------------------
@@ -136,19 +247,7 @@ def create_form(
     db.add(f)
     db.flush()
 
-    order = 0
-    for q in payload.questions:
-        validate_question_payload(q)
-        db.add(Question(
-            form_id=f.id,
-            text=q.text,
-            type=q.type,
-            required=q.required,
-            order_index=q.order_index if q.order_index is not None else order,
-            image_url=q.image_url,
-            options_json=_to_db_options(q.options_json),
-        ))
-        order += 1
+    _insert_questions(db, _question_rows(f.id, payload.questions))
 
     db.commit()
     db.refresh(f)
@@ -158,7 +257,7 @@ def create_form(
 def list_forms(
     q: str | None = None,
     user_email: str = Depends(get_user_email),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     stmt = select(Form).where(
         (Form.owner_email == user_email) |
@@ -166,7 +265,8 @@ def list_forms(
     )
     if q:
         stmt = stmt.where(func.lower(Form.name).like(f"%{q.lower()}%"))
-    return db.execute(stmt.order_by(Form.id.desc())).scalars().all()
+    # FormOut sadrži pitanja: učitaj ih jednim upitom za sve forme (bez N+1)
+    return _forms_out(db.execute(stmt.options(selectinload(Form.questions)).order_by(Form.id.desc())).scalars().all())
 
 # -----------------------
 # Public forms listing (guest search by name)
@@ -175,7 +275,7 @@ def list_forms(
 @app.get("/forms/public", response_model=List[FormOut])
 def list_public_forms(
     q: str | None = Query(None, description="Search public forms by name or description"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     # Prikaži samo javne (nezaključane) forme
     stmt = select(Form).where(Form.is_locked == False)
@@ -190,26 +290,26 @@ def list_public_forms(
             )
         )
 
-    stmt = stmt.order_by(Form.id.desc())
+    stmt = stmt.options(selectinload(Form.questions)).order_by(Form.id.desc())
     forms = db.execute(stmt).scalars().all()
-    return forms
+    return _forms_out(forms)
     
 @app.get("/my/forms", response_model=List[FormOut])
 def my_forms(
     user_email: str = Depends(get_user_email),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     stmt = select(Form).where(
         (Form.owner_email == user_email) |
         (Form.id.in_(select(Collaborator.form_id).where(Collaborator.email == user_email)))
     )
-    return db.execute(stmt.order_by(Form.id.desc())).scalars().all()
+    return _forms_out(db.execute(stmt.options(selectinload(Form.questions)).order_by(Form.id.desc())).scalars().all())
 
 @app.get("/forms/{form_id}", response_model=FormOut)
 def get_form(
     form_id: int,
     user_email: str | None = Depends(get_user_email),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     f = db.get(Form, form_id)
     if not f:
@@ -237,8 +337,10 @@ def update_form(
         f.description = payload.description
     if payload.allow_anonymous is not None:
         f.allow_anonymous = payload.allow_anonymous
+    locking = payload.is_locked and not f.is_locked
     if payload.is_locked is not None:
         f.is_locked = payload.is_locked
+    _changed(db, f, events.FORM_LOCKED if locking else events.FORM_UPDATED)
 
     db.add(f)
     db.commit()
@@ -259,19 +361,16 @@ def delete_form(
     if not is_owner(f, user_email):
         raise HTTPException(403, "Only owner can delete the form")
 
-    # Obrisi povezana pitanja
-    qs = db.execute(select(Question).where(Question.form_id == form_id)).scalars().all()
-    for q in qs:
-        db.delete(q)
-
-    # Obrisi kolaboratore
-    cs = db.execute(select(Collaborator).where(Collaborator.form_id == form_id)).scalars().all()
-    for c in cs:
-        db.delete(c)
-
-    # Na kraju obriši i samu formu
-    db.delete(f)
+    # Set-based brisanje: pitanja, kolaboratori pa sama forma (bez učitavanja redova)
+    db.execute(delete(Question).where(Question.form_id == form_id))
+    db.execute(delete(Collaborator).where(Collaborator.form_id == form_id))
+    db.execute(delete(Form).where(Form.id == form_id), execution_options={"synchronize_session": False})
+    db.expunge(f)
+    # responses-service na ovaj događaj briše odgovore forme
+    events.emit(db, events.FORM_DELETED, form_id)
     db.commit()
+    acl.invalidate(form_id)
+    _meta_cache.discard(lambda k: k[0] == form_id)
     return None
 
 # ======== DODATNO: DEMO FORMA SA SVIM TIPOVIMA & ZATVARANJE ========
@@ -334,21 +433,8 @@ def create_all_types_demo_form(
         _q_payload("Izaberite vreme", "time", required=False, order_index=6),
     ]
 
-    # 3) Validacija i upis pitanja
-    for qp in questions_payload:
-        # Reuse postojeće Pydantic šeme i validatora
-        q_model = QuestionIn(**qp)
-        validate_question_payload(q_model)
-
-        db.add(Question(
-            form_id=f.id,
-            text=q_model.text,
-            type=q_model.type,
-            required=q_model.required,
-            order_index=q_model.order_index if q_model.order_index is not None else 0,
-            image_url=q_model.image_url,
-            options_json=_to_db_options(q_model.options_json),
-        ))
+    # 3) Validacija (postojeće Pydantic šeme i validator) i upis pitanja jednim INSERT-om
+    _insert_questions(db, _question_rows(f.id, [QuestionIn(**qp) for qp in questions_payload]))
 
     db.commit()
     db.refresh(f)
@@ -373,11 +459,162 @@ def close_form(
         raise HTTPException(403, "Forbidden")
 
     f.is_locked = True
+    _changed(db, f, events.FORM_LOCKED)
+    db.add(f)
+    db.commit()
+    db.refresh(f)
+    return f
+
+
+# -----------------------
+# Kloniranje forme i šabloni
+# -----------------------
+_QUESTION_COPY_COLS = ("text", "type", "required", "order_index", "image_url", "options_json")
+
+@app.post("/forms/{form_id}/clone", response_model=FormOut, status_code=201)
+def clone_form(
+    form_id: int,
+    body: FormCloneIn | None = None,
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_db),
+):
+    """
+    Kopija cele forme za trenutnog korisnika (nova forma je otključana, verzija 1).
+    Pitanja (i po želji kolaboratori) se kopiraju jednim INSERT ... SELECT u bazi.
+    """
+    body = body or FormCloneIn()
+    src = db.get(Form, form_id)
+    if not src:
+        raise HTTPException(404, "Not found")
+    if not can_view(src, user_email, db):
+        raise HTTPException(403, "Forbidden")
+    if body.include_collaborators and not is_owner(src, user_email):
+        raise HTTPException(403, "Only owner can copy collaborators")
+
+    f = Form(
+        owner_email=user_email,
+        name=body.name or f"{src.name} (copy)",
+        description=src.description,
+        allow_anonymous=src.allow_anonymous,
+        is_locked=False,
+    )
+    db.add(f)
+    db.flush()
+
+    new_id = literal(f.id, Integer)
+    db.execute(insert(Question).from_select(
+        ["form_id", *_QUESTION_COPY_COLS],
+        select(new_id, *(getattr(Question, c) for c in _QUESTION_COPY_COLS)).where(Question.form_id == src.id),
+    ))
+    if body.include_collaborators:
+        db.execute(insert(Collaborator).from_select(
+            ["form_id", "email", "role"],
+            select(new_id, Collaborator.email, Collaborator.role).where(
+                Collaborator.form_id == src.id, Collaborator.email != user_email
+            ),
+        ))
+
+    db.commit()
+    db.refresh(f)
+    return f
+
+def _snapshot(f: Form) -> dict:
+    """Nepromenljiv snimak strukture forme za šablon."""
+    return {
+        "allow_anonymous": f.allow_anonymous,
+        "questions": [
+            QuestionIn.model_validate(q, from_attributes=True).model_dump()
+            for q in sorted(f.questions, key=lambda x: x.order_index)
+        ],
+    }
+
+def _template_out(t: FormTemplate) -> TemplateOut:
+    return TemplateOut(
+        id=t.id,
+        owner_email=t.owner_email,
+        name=t.name,
+        description=t.description,
+        is_public=t.is_public,
+        question_count=len(t.snapshot.get("questions") or []),
+    )
+
+@app.get("/templates", response_model=List[TemplateOut])
+def list_templates(
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_read_db),
+):
+    stmt = select(FormTemplate).where(
+        (FormTemplate.is_public == True) | (FormTemplate.owner_email == user_email)
+    ).order_by(FormTemplate.name)
+    return [_template_out(t) for t in db.execute(stmt).scalars().all()]
+
+@app.post("/forms/{form_id}/template", response_model=TemplateOut, status_code=201)
+def save_as_template(
+    form_id: int,
+    body: TemplateCreate,
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_db),
+):
+    f = db.get(Form, form_id)
+    if not f:
+        raise HTTPException(404, "Not found")
+    if not can_edit(f, user_email, db):
+        raise HTTPException(403, "Forbidden")
+
+    t = FormTemplate(
+        owner_email=user_email,
+        name=body.name or f.name,
+        description=body.description if body.description is not None else f.description,
+        is_public=body.is_public,
+        snapshot=_snapshot(f),
+    )
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return _template_out(t)
+
+@app.post("/templates/{template_id}/forms", response_model=FormOut, status_code=201)
+def create_form_from_template(
+    template_id: int,
+    body: FormCloneIn | None = None,
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_db),
+):
+    t = db.get(FormTemplate, template_id)
+    if not t or not (t.is_public or t.owner_email == user_email):
+        raise HTTPException(404, "Template not found")
+
+    f = Form(
+        owner_email=user_email,
+        name=(body.name if body and body.name else t.name),
+        description=t.description,
+        allow_anonymous=t.snapshot.get("allow_anonymous", True),
+        is_locked=False,
+    )
     db.add(f)
+    db.flush()
+
+    questions = [QuestionIn(**q) for q in t.snapshot.get("questions") or []]
+    _insert_questions(db, _question_rows(f.id, questions))
+
     db.commit()
     db.refresh(f)
     return f
 
+@app.delete("/templates/{template_id}", status_code=204)
+def delete_template(
+    template_id: int,
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_db),
+):
+    t = db.get(FormTemplate, template_id)
+    if not t:
+        raise HTTPException(404, "Template not found")
+    if t.owner_email != user_email:
+        raise HTTPException(403, "Only owner can delete the template")
+    db.delete(t)
+    db.commit()
+    return None
 
 # -----------------------
 # Questions
@@ -397,17 +634,17 @@ def add_question(
 
     validate_question_payload(q)
 
-    max_order = max([qq.order_index for qq in f.questions], default=-1)
     qq = Question(
         form_id=form_id,
         text=q.text,
         type=q.type,
         required=q.required,
-        order_index=q.order_index if q.order_index is not None else max_order + 1,
+        order_index=q.order_index if q.order_index is not None else next_rank(db, form_id),
         image_url=q.image_url,
         options_json=_to_db_options(q.options_json),
     )
     db.add(qq)
+    _changed(db, f, events.QUESTIONS_CHANGED)
     db.commit()
     db.refresh(qq)
     return qq
@@ -440,6 +677,7 @@ def update_question(
     qq.image_url = q.image_url
     qq.options_json = _to_db_options(q.options_json)
     db.add(qq)
+    _changed(db, f, events.QUESTIONS_CHANGED)
     db.commit()
     db.refresh(qq)
     return qq
@@ -462,6 +700,7 @@ def delete_question(
         raise HTTPException(404, "Question not found")
 
     db.delete(qq)
+    _changed(db, f, events.QUESTIONS_CHANGED)
     db.commit()
     return None
 
@@ -482,17 +721,17 @@ def clone_question(
     if not src or src.form_id != form_id:
         raise HTTPException(404, "Question not found")
 
-    max_order = max([qq.order_index for qq in f.questions], default=-1)
     clone = Question(
         form_id=form_id,
         text=src.text,
         type=src.type,
         required=src.required,
-        order_index=max_order + 1,
+        order_index=next_rank(db, form_id),
         image_url=src.image_url,
-        options_json=_to_db_options(src.options_json),
+        options_json=src.options_json,
     )
     db.add(clone)
+    _changed(db, f, events.QUESTIONS_CHANGED)
     db.commit()
     db.refresh(clone)
     return clone
@@ -510,10 +749,142 @@ def reorder(
     if not can_edit(f, user_email, db):
         raise HTTPException(403, "Forbidden")
 
-    qmap = {q.id: q for q in f.questions}
-    for idx, qid in enumerate(order):
-        if qid in qmap:
-            qmap[qid].order_index = idx
+    # upisuju se samo pitanja kojima se rang zaista menja
+    current = dict(db.execute(
+        select(Question.id, Question.order_index).where(Question.form_id == form_id)
+    ).all())
+    changes = plan_reorder(current, order)
+    if changes is None:
+        rebalance(db, form_id, order)
+    elif changes:
+        db.execute(update(Question), [{"id": qid, "order_index": r} for qid, r in changes.items()])
+    _changed(db, f, events.QUESTIONS_CHANGED)
+    db.commit()
+    db.refresh(f)
+    return f
+
+@app.post("/forms/{form_id}/questions/{question_id}/move", response_model=QuestionOut)
+def move_question(
+    form_id: int,
+    question_id: int,
+    body: QuestionMove,
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_db)
+):
+    """Premesti jedno pitanje iza `after_id` / ispred `before_id` (bez oba -> na kraj)."""
+    f = db.get(Form, form_id)
+    if not f:
+        raise HTTPException(404, "Not found")
+    if not can_edit(f, user_email, db):
+        raise HTTPException(403, "Forbidden")
+
+    qq = db.get(Question, question_id)
+    if not qq or qq.form_id != form_id:
+        raise HTTPException(404, "Question not found")
+
+    try:
+        lo, hi = neighbour_ranks(db, form_id, question_id, body.after_id, body.before_id)
+        rank = rank_between(lo, hi)
+        if rank is None:
+            # nema mesta između suseda -> razmakni celu formu pa pokušaj ponovo
+            rebalance(db, form_id)
+            db.expire(qq)
+            lo, hi = neighbour_ranks(db, form_id, question_id, body.after_id, body.before_id)
+            rank = rank_between(lo, hi)
+    except LookupError as e:
+        raise HTTPException(404, f"Question {e.args[0]} not found")
+
+    qq.order_index = rank
+    _changed(db, f, events.QUESTIONS_CHANGED)
+    db.commit()
+    db.refresh(qq)
+    return qq
+
+@app.patch("/forms/{form_id}/questions", response_model=FormOut)
+def patch_questions(
+    form_id: int,
+    batch: QuestionBatch,
+    user_email: str = Depends(get_user_email),
+    db: Session = Depends(get_db)
+):
+    """
+    Grupne izmene pitanja u jednoj transakciji.
+    Operacije se primenjuju po fazama: delete -> update -> create -> reorder,
+    svaka faza jednom (bulk) naredbom. Ako bilo koja operacija nije validna,
+    ništa se ne upisuje. Reorder sme da navede samo postojeća pitanja koja se
+    ne brišu (422 inače); nova pitanja poziciju dobijaju kroz order_index.
+    """
+    f = db.get(Form, form_id)
+    if not f:
+        raise HTTPException(404, "Not found")
+    if not can_edit(f, user_email, db):
+        raise HTTPException(403, "Forbidden")
+    if batch.expected_version is not None and batch.expected_version != f.version:
+        raise HTTPException(409, f"Form version is {f.version}, expected {batch.expected_version}")
+
+    # 1) validacija svih operacija pre bilo kakvog upisa
+    existing = dict(db.execute(
+        select(Question.id, Question.order_index).where(Question.form_id == form_id)
+    ).all())
+    deletes, updates, creates, orders = set(), [], [], []
+    for op in batch.ops:
+        if op.question is not None:
+            validate_question_payload(op.question)
+        if op.op in ("update", "delete") and op.id not in existing:
+            raise HTTPException(404, f"Question {op.id} not found")
+        if op.op == "delete":
+            deletes.add(op.id)
+        elif op.op == "update":
+            updates.append(op)
+        elif op.op == "create":
+            creates.append(op.question)
+        else:
+            orders.append(op.order)
+    for op in updates:
+        if op.id in deletes:
+            raise HTTPException(422, f"Question {op.id} is both updated and deleted")
+    for order in orders:
+        unknown = [qid for qid in order if qid not in existing or qid in deletes]
+        if unknown:
+            raise HTTPException(422, f"Reorder refers to unknown or deleted questions: {unknown}")
+
+    # 2) upis
+    if deletes:
+        db.execute(delete(Question).where(Question.form_id == form_id, Question.id.in_(deletes)))
+
+    if updates:
+        rows = []
+        for op in updates:
+            q = op.question
+            row = {
+                "id": op.id,
+                "text": q.text,
+                "type": q.type,
+                "required": q.required,
+                "image_url": q.image_url,
+                "options_json": _to_db_options(q.options_json),
+            }
+            if q.order_index is not None:
+                row["order_index"] = q.order_index
+            rows.append(row)
+        db.execute(update(Question), rows)
+
+    if creates:
+        _insert_questions(db, _question_rows(form_id, creates, next_rank(db, form_id)))
+
+    if orders:
+        current = {qid: o for qid, o in existing.items() if qid not in deletes}
+        current.update({op.id: op.question.order_index for op in updates if op.question.order_index is not None})
+        for order in orders:
+            changes = plan_reorder(current, order)
+            if changes is None:
+                current = rebalance(db, form_id, order)
+                continue
+            if changes:
+                db.execute(update(Question), [{"id": qid, "order_index": r} for qid, r in changes.items()])
+                current.update(changes)
+
+    _changed(db, f, events.QUESTIONS_CHANGED)
     db.commit()
     db.refresh(f)
     return f
@@ -525,7 +896,7 @@ def reorder(
 def list_collaborators(
     form_id: int,
     user_email: str = Depends(get_user_email),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     f = db.get(Form, form_id)
     if not f:
@@ -553,6 +924,7 @@ def add_collaborator(
     db.add(c)
     db.commit()
     db.refresh(c)
+    acl.invalidate(form_id, c.email, db)
     return c
 
 @app.delete("/forms/{form_id}/collaborators/{collab_id}", status_code=204)
@@ -572,8 +944,10 @@ def delete_collaborator(
     if not c or c.form_id != form_id:
         raise HTTPException(404, "Collaborator not found")
 
+    email = c.email
     db.delete(c)
     db.commit()
+    acl.invalidate(form_id, email, db)
     return None
 
 # -----------------------
@@ -591,22 +965,45 @@ def form_meta(
     if f.is_locked:
         raise HTTPException(404, "Not found")
 
-    return FormMeta(
-        id=f.id,
-        allow_anonymous=f.allow_anonymous,
-        is_locked=f.is_locked,
-        questions=[
-            QuestionOut(
-                id=q.id,
-                text=q.text,
-                type=q.type,
-                required=q.required,
-                order_index=q.order_index,
-                image_url=q.image_url,
-                options_json=None if q.options_json is None else (
-                    json.loads(q.options_json) if isinstance(q.options_json, str) else q.options_json
-                ),
-            )
-            for q in sorted(f.questions, key=lambda x: x.order_index)
-        ],
-    )
+    key = (f.id, f.version)
+    meta = _meta_cache.get(key)
+    if meta is None:
+        meta = FormMeta(
+            id=f.id,
+            allow_anonymous=f.allow_anonymous,
+            is_locked=f.is_locked,
+            version=f.version,
+            questions=[
+                QuestionOut.model_validate(q)
+                for q in sorted(f.questions, key=lambda x: x.order_index)
+            ],
+        )
+        _meta_cache.discard(lambda k: k[0] == f.id)
+        _meta_cache.set(key, meta)
+    return meta
+
+# -----------------------
+# Status formi za arhiviranje odgovora (responses-service, interno)
+# -----------------------
+@app.get("/internal/forms/status", response_model=List[FormStatus], include_in_schema=False)
+def forms_status(
+    ids: List[int] = Query(..., max_length=1000),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_internal),
+):
+    """Zaključanost i verzija traženih formi; obrisane forme se ne vraćaju."""
+    rows = db.execute(select(Form.id, Form.is_locked, Form.version).where(Form.id.in_(ids))).all()
+    return [FormStatus(id=i, is_locked=bool(locked), version=v or 1) for i, locked, v in rows]
+
+# -----------------------
+# Vreme pokretanja (poslednji startup hook)
+# -----------------------
+metrics.startup_seconds.set(time.perf_counter() - _IMPORT_T0, "import")
+
+@app.on_event("startup")
+def _startup_done():
+    took = time.perf_counter() - _startup_t0[0]
+    metrics.startup_seconds.set(took, "startup")
+    logging.getLogger(__name__).info(
+        "ready: import %.0f ms, startup %.0f ms",
+        metrics.startup_seconds.value("import") * 1000, took * 1000)
@@ -0,0 +1,134 @@
+"""
+Verzionisane migracije šeme za postojeće baze.
+
+`create_all` pravi samo tabele koje ne postoje, pa izmene na postojećim
+tabelama (indeksi, kolone) idu ovde. Svaka migracija mora biti idempotentna
+jer na svežoj bazi `create_all` već napravi krajnje stanje.
+"""
+import json
+import logging
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, select, insert, func, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .db import Base, engine
+from .models import Form, Question, Collaborator, OutboxEvent
+
+_meta = MetaData()
+_LOCK_KEY = 6713202  # pg advisory lock za migracije ovog servisa
+schema_version = Table("schema_version", _meta, Column("version", Integer, primary_key=True))
+
+
+def _create_indexes(conn: Connection, table):
+    for ix in table.indexes:
+        ix.create(bind=conn, checkfirst=True)
+
+
+def _add_column(conn: Connection, table, ddl: str):
+    name = ddl.split()[0]
+    if name not in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def _0001_collaborator_indexes(conn: Connection):
+    _create_indexes(conn, Collaborator.__table__)
+
+
+def _0002_form_version(conn: Connection):
+    _add_column(conn, Form.__table__, "version INTEGER NOT NULL DEFAULT 1")
+
+
+def _0003_question_order_index(conn: Connection):
+    _create_indexes(conn, Question.__table__)
+
+
+def _null_invalid_options(conn: Connection):
+    # stari redovi sa '' ili nevalidnim JSON-om: ranije ih je QuestionOut pretvarao u None,
+    # a JSON kolona bi na čitanju pukla (500 za celu formu)
+    bad = [
+        {"id": qid} for qid, raw in conn.execute(
+            text("SELECT id, options_json FROM questions WHERE options_json IS NOT NULL")
+        )
+        if not _is_json(raw)
+    ]
+    if bad:
+        conn.execute(text("UPDATE questions SET options_json = NULL WHERE id = :id"), bad)
+
+
+def _is_json(raw) -> bool:
+    if not isinstance(raw, str):
+        return True  # JSONB na Postgres-u je već dekodiran
+    try:
+        json.loads(raw)
+    except ValueError:
+        return False
+    return True
+
+
+def _0004_options_json_native(conn: Connection):
+    # SQLite: JSON kolona je i dalje TEXT, postojeći JSON stringovi se čitaju kao dict.
+    # Postgres: TEXT -> JSONB uz konverziju postojećih vrednosti.
+    _null_invalid_options(conn)
+    if conn.dialect.name != "postgresql":
+        return
+    col = next(c for c in inspect(conn).get_columns("questions") if c["name"] == "options_json")
+    if col["type"].__class__.__name__.upper() != "JSONB":
+        conn.execute(text(
+            "ALTER TABLE questions ALTER COLUMN options_json TYPE JSONB "
+            "USING NULLIF(options_json, '')::jsonb"
+        ))
+
+
+def _0005_null_invalid_options(conn: Connection):
+    # baze koje su 4 prošle pre nego što je čistila nevalidne vrednosti (SQLite)
+    _null_invalid_options(conn)
+
+
+def _0006_outbox_parked(conn: Connection):
+    _add_column(conn, OutboxEvent.__table__, "parked_at TIMESTAMP NULL")
+
+
+MIGRATIONS = [
+    (1, _0001_collaborator_indexes),
+    (2, _0002_form_version),
+    (3, _0003_question_order_index),
+    (4, _0004_options_json_native),
+    (5, _0005_null_invalid_options),
+    (6, _0006_outbox_parked),
+]
+
+
+def run_migrations(engine: Engine):
+    _meta.create_all(bind=engine)
+    with engine.begin() as conn:
+        current = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        for version, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            fn(conn)
+            conn.execute(insert(schema_version).values(version=version))
+
+
+def migrate(bind: Engine = engine):
+    """
+    Cela šema (create_all + verzionisane migracije). Pokreće se pre servera,
+    `python -m app.migrations`, a ne pri importu aplikacije. Na Postgres-u
+    advisory lock sprečava da više replika migrira istovremeno.
+    """
+    with bind.connect() as lock:
+        if bind.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_KEY})
+        try:
+            Base.metadata.create_all(bind=bind)
+            run_migrations(bind)
+        finally:
+            if bind.dialect.name == "postgresql":
+                lock.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    t0 = time.perf_counter()
+    migrate()
+    logging.getLogger(__name__).info("schema up to date (%.0f ms)", (time.perf_counter() - t0) * 1000)
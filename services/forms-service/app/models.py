@@ -1,7 +1,13 @@
-from sqlalchemy import Integer, String, Boolean, ForeignKey, Text, UniqueConstraint
+from datetime import datetime
+
+from sqlalchemy import Integer, String, Boolean, ForeignKey, Text, UniqueConstraint, Index, JSON, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 
+# JSONB na Postgres-u, JSON (tekst) na SQLite-u; None ostaje SQL NULL
+OptionsJSON = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
 class Form(Base):
     __tablename__ = "forms"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -10,11 +16,15 @@ class Form(Base):
     description: Mapped[str] = mapped_column(Text, default="")
     allow_anonymous: Mapped[bool] = mapped_column(Boolean, default=True)
     is_locked: Mapped[bool] = mapped_column(Boolean, default=False)
+    # raste na svaku izmenu forme ili njenih pitanja
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
     questions: Mapped[list["Question"]] = relationship(back_populates="form", cascade="all, delete-orphan")
     collaborators: Mapped[list["Collaborator"]] = relationship(back_populates="form", cascade="all, delete-orphan")
 
 class Question(Base):
     __tablename__ = "questions"
+    # MAX(order_index) po formi i susedi pri premeštanju
+    __table_args__ = (Index("ix_questions_form_order", "form_id", "order_index"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"))
     text: Mapped[str] = mapped_column(String(512))
@@ -22,14 +32,50 @@ class Question(Base):
     required: Mapped[bool] = mapped_column(Boolean, default=False)
     order_index: Mapped[int] = mapped_column(Integer, default=0, index=True)
     image_url: Mapped[str | None] = mapped_column(String(512), nullable=True)
-    options_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    options_json: Mapped[dict | None] = mapped_column(OptionsJSON, nullable=True)
     form: Mapped["Form"] = relationship(back_populates="questions")
 
 class Collaborator(Base):
     __tablename__ = "collaborators"
-    __table_args__ = (UniqueConstraint("form_id", "email", name="uq_form_collab"),)
+    __table_args__ = (
+        UniqueConstraint("form_id", "email", name="uq_form_collab"),
+        # "forme podeljene sa korisnikom X" -> pretraga po email-u prvo
+        Index("ix_collaborators_email_form", "email", "form_id"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"))
     email: Mapped[str] = mapped_column(String(255))
     role: Mapped[str] = mapped_column(String(16), default="viewer")  # viewer/editor
     form: Mapped["Form"] = relationship(back_populates="collaborators")
+
+class FormTemplate(Base):
+    __tablename__ = "form_templates"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    owner_email: Mapped[str] = mapped_column(String(255), index=True)
+    name: Mapped[str] = mapped_column(String(255))
+    description: Mapped[str] = mapped_column(Text, default="")
+    is_public: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    # {"allow_anonymous": bool, "questions": [QuestionIn...]}
+    snapshot: Mapped[dict] = mapped_column(OptionsJSON)
+
+class OutboxEvent(Base):
+    """Događaj o promeni forme, upisan u istoj transakciji kao i promena."""
+    __tablename__ = "outbox_events"
+    __table_args__ = (Index("ix_outbox_unpublished", "published_at", "id"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(32))
+    form_id: Mapped[int] = mapped_column(Integer, index=True)
+    version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payload: Mapped[dict | None] = mapped_column(OptionsJSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # posle OUTBOX_MAX_ATTEMPTS neuspeha događaj se "parkira" da ne blokira ostale
+    parked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+class OutboxLease(Base):
+    """Zakup relay-a: sa više worker-a događaje objavljuje samo onaj koji drži zakup."""
+    __tablename__ = "outbox_lease"
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(64))
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
@@ -0,0 +1,134 @@
+"""
+Redosled pitanja preko razmaknutih rangova (order_index).
+
+Pitanja dobijaju rangove sa razmakom ORDER_GAP, pa se premeštanje jednog
+pitanja svodi na upis ranga između dva suseda (jedan red). Tek kada između
+suseda više nema mesta, rangovi cele forme se ponovo razmaknu (rebalance).
+"""
+from bisect import bisect_left
+
+from sqlalchemy import select, func, update
+from sqlalchemy.orm import Session
+
+from .models import Question
+
+ORDER_GAP = 1024
+
+
+def rank_between(lo: int | None, hi: int | None) -> int | None:
+    """Rang strogo između lo i hi; None ako između nema slobodnog celog broja."""
+    if lo is None and hi is None:
+        return 0
+    if lo is None:
+        return hi - ORDER_GAP
+    if hi is None:
+        return lo + ORDER_GAP
+    if hi - lo < 2:
+        return None
+    return (lo + hi) // 2
+
+
+def next_rank(db: Session, form_id: int) -> int:
+    """Rang za dodavanje na kraj forme (indeksiran MAX, bez učitavanja pitanja)."""
+    top = db.execute(
+        select(func.max(Question.order_index)).where(Question.form_id == form_id)
+    ).scalar()
+    return rank_between(top, None) if top is not None else 0
+
+
+def neighbour_ranks(db: Session, form_id: int, question_id: int,
+                    after_id: int | None, before_id: int | None) -> tuple[int | None, int | None]:
+    """Rangovi suseda između kojih pitanje treba da stane."""
+    others = (Question.form_id == form_id, Question.id != question_id)
+
+    def rank_of(qid):
+        return db.execute(select(Question.order_index).where(*others, Question.id == qid)).scalar_one_or_none()
+
+    if after_id is not None:
+        lo = rank_of(after_id)
+        if lo is None:
+            raise LookupError(after_id)
+        hi = db.execute(select(func.min(Question.order_index)).where(*others, Question.order_index > lo)).scalar()
+        return lo, hi
+    if before_id is not None:
+        hi = rank_of(before_id)
+        if hi is None:
+            raise LookupError(before_id)
+        lo = db.execute(select(func.max(Question.order_index)).where(*others, Question.order_index < hi)).scalar()
+        return lo, hi
+    lo = db.execute(select(func.max(Question.order_index)).where(*others)).scalar()
+    return lo, None
+
+
+def rebalance(db: Session, form_id: int, order: list[int] | None = None) -> dict[int, int]:
+    """Ponovo razmakni rangove cele forme (po zadatom ili postojećem redosledu)."""
+    current = db.execute(
+        select(Question.id).where(Question.form_id == form_id).order_by(Question.order_index, Question.id)
+    ).scalars().all()
+    if order:
+        known = set(current)
+        listed = [qid for qid in order if qid in known]
+        seen = set(listed)
+        current = listed + [qid for qid in current if qid not in seen]
+    ranks = {qid: i * ORDER_GAP for i, qid in enumerate(current)}
+    if ranks:
+        db.execute(update(Question), [{"id": qid, "order_index": r} for qid, r in ranks.items()])
+    return ranks
+
+
+def _longest_increasing(values: list[int]) -> set[int]:
+    """Pozicije najdužeg strogo rastućeg podniza (O(n log n))."""
+    tails, tails_at, prev = [], [], [-1] * len(values)
+    for i, v in enumerate(values):
+        k = bisect_left(tails, v)
+        if k == len(tails):
+            tails.append(v)
+            tails_at.append(i)
+        else:
+            tails[k] = v
+            tails_at[k] = i
+        prev[i] = tails_at[k - 1] if k else -1
+    keep, i = set(), tails_at[-1] if tails_at else -1
+    while i != -1:
+        keep.add(i)
+        i = prev[i]
+    return keep
+
+
+def plan_reorder(current: dict[int, int], order: list[int]) -> dict[int, int] | None:
+    """
+    Minimalan skup izmena rangova tako da pitanja iz `order` budu tim redom.
+
+    Pitanja koja su već u rastućem redosledu zadržavaju rang; ostala dobijaju
+    rang između novih suseda. Vraća {id: novi_rang} samo za promenjene redove,
+    ili None ako nema mesta pa je potreban rebalance.
+    """
+    ids = [qid for qid in dict.fromkeys(order) if qid in current]
+    keep = _longest_increasing([current[qid] for qid in ids])
+
+    changes: dict[int, int] = {}
+    i = 0
+    while i < len(ids):
+        if i in keep:
+            i += 1
+            continue
+        j = i
+        while j < len(ids) and j not in keep:
+            j += 1
+        lo = current[ids[i - 1]] if i > 0 else None
+        hi = current[ids[j]] if j < len(ids) else None
+        run = ids[i:j]
+        if lo is None and hi is None:
+            new = [k * ORDER_GAP for k in range(len(run))]
+        elif hi is None:
+            new = [lo + (k + 1) * ORDER_GAP for k in range(len(run))]
+        elif lo is None:
+            new = [hi - (len(run) - k) * ORDER_GAP for k in range(len(run))]
+        else:
+            step = (hi - lo) // (len(run) + 1)
+            if step < 1:
+                return None
+            new = [lo + (k + 1) * step for k in range(len(run))]
+        changes.update(zip(run, new))
+        i = j
+    return changes
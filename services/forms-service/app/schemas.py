@@ -1,5 +1,5 @@
 from typing import Any, Literal
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 # ---- Tipovi ----
 QuestionType = Literal[
@@ -38,22 +38,40 @@ class QuestionIn(BaseModel):
 class QuestionOut(QuestionIn):
     id: int
 
-    # Kada čitamo iz ORM-a gde je kolona TEXT, pretvori string -> dict
-    @field_validator("options_json", mode="before")
-    @classmethod
-    def _parse_options_out(cls, v: Any):
-        if isinstance(v, str):
-            import json
-            try:
-                return json.loads(v)
-            except Exception:
-                return None
-        return v
-
+    # options_json je JSON kolona -> iz ORM-a stiže već dekodiran dict
     class Config:
         from_attributes = True  # pydantic v2 (zamena za orm_mode)
 
 
+# ---- Grupne izmene pitanja (PATCH /forms/{id}/questions) ----
+class QuestionOp(BaseModel):
+    op: Literal["create", "update", "delete", "reorder"]
+    id: int | None = None                  # update / delete
+    question: QuestionIn | None = None     # create / update
+    order: list[int] | None = None         # reorder: id-jevi pitanja redom
+
+    @model_validator(mode="after")
+    def _check_fields(self):
+        if self.op in ("update", "delete") and self.id is None:
+            raise ValueError(f"{self.op} requires id")
+        if self.op in ("create", "update") and self.question is None:
+            raise ValueError(f"{self.op} requires question")
+        if self.op == "reorder" and not self.order:
+            raise ValueError("reorder requires non-empty order")
+        return self
+
+
+class QuestionMove(BaseModel):
+    after_id: int | None = None
+    before_id: int | None = None
+
+
+class QuestionBatch(BaseModel):
+    ops: list[QuestionOp] = Field(min_length=1)
+    # opciono: odbij izmenu ako je forma u međuvremenu promenjena
+    expected_version: int | None = None
+
+
 # ---- Form modeli ----
 class FormCreate(BaseModel):
     name: str = Field(min_length=1, max_length=255)
@@ -77,12 +95,34 @@ class FormOut(BaseModel):
     description: str
     allow_anonymous: bool
     is_locked: bool
+    version: int = 1
     questions: list[QuestionOut] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
 
 
+class FormCloneIn(BaseModel):
+    name: str | None = Field(default=None, min_length=1, max_length=255)
+    include_collaborators: bool = False
+
+
+# ---- Šabloni ----
+class TemplateCreate(BaseModel):
+    name: str | None = Field(default=None, min_length=1, max_length=255)
+    description: str | None = None
+    is_public: bool = False
+
+
+class TemplateOut(BaseModel):
+    id: int
+    owner_email: str
+    name: str
+    description: str
+    is_public: bool
+    question_count: int
+
+
 class CollaboratorIn(BaseModel):
     email: str
     role: Literal["viewer", "editor"]
@@ -99,7 +139,14 @@ class FormMeta(BaseModel):
     id: int
     allow_anonymous: bool
     is_locked: bool
+    version: int = 1
     questions: list[QuestionOut] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
+
+
+class FormStatus(BaseModel):
+    id: int
+    is_locked: bool
+    version: int = 1
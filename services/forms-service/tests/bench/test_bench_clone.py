@@ -0,0 +1,41 @@
+import pytest
+
+from app.db import SessionLocal
+from app.models import Form, Question
+
+QUESTIONS = 200
+
+
+@pytest.fixture(scope="module")
+def owner(auth):
+    return auth()
+
+
+@pytest.fixture(scope="module")
+def src(client, owner):
+    return client.post("/forms", headers=owner, json={"name": "Velika", "questions": [
+        {"text": f"Pitanje {i}", "type": "single_choice", "options_json": {"choices": [f"c{j}" for j in range(10)]}}
+        for i in range(QUESTIONS)
+    ]}).json()["id"]
+
+
+def _clone_per_row(form_id):
+    # stari način: ORM objekat po pitanju
+    with SessionLocal() as db:
+        src = db.get(Form, form_id)
+        f = Form(owner_email=src.owner_email, name=src.name, description=src.description,
+                 allow_anonymous=src.allow_anonymous, is_locked=False)
+        f.questions = [Question(text=q.text, type=q.type, required=q.required, order_index=q.order_index,
+                                image_url=q.image_url, options_json=q.options_json) for q in src.questions]
+        db.add(f)
+        db.commit()
+        return f.id
+
+
+def test_clone_200_questions_insert_select(bench, client, owner, src):
+    r = bench(lambda: client.post(f"/forms/{src}/clone", headers=owner))
+    assert r.status_code == 201 and len(r.json()["questions"]) == QUESTIONS
+
+
+def test_clone_200_questions_orm_per_row(bench, src):
+    bench(_clone_per_row, src)
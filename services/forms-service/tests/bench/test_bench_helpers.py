@@ -0,0 +1,37 @@
+import json
+
+from app.main import validate_question_payload, _to_db_options, _question_rows
+from app.schemas import QuestionIn
+
+BIG_CHOICES = {"choices": [f"opcija {i}" for i in range(5000)]}
+NUMERIC_LIST = {"list": list(range(100_000))}
+NUMERIC_RANGE = {"range": {"start": 0, "end": 1_000_000, "step": 1}}
+
+def _form(n):
+    kinds = [
+        {"type": "short_text"},
+        {"type": "single_choice", "options_json": {"choices": [f"c{i}" for i in range(50)]}},
+        {"type": "multi_choice", "options_json": {"choices": [f"c{i}" for i in range(50)], "required_count": 2}},
+        {"type": "numeric", "options_json": {"range": {"start": 1, "end": 100, "step": 1}}},
+        {"type": "date"},
+    ]
+    return [QuestionIn(text=f"Pitanje {i}", **kinds[i % len(kinds)]) for i in range(n)]
+
+def test_validate_single_choice_large(bench):
+    bench(validate_question_payload, QuestionIn(text="q", type="single_choice", options_json=BIG_CHOICES))
+
+def test_validate_numeric_list_large(bench):
+    bench(validate_question_payload, QuestionIn(text="q", type="numeric", options_json=NUMERIC_LIST))
+
+def test_validate_numeric_wide_range(bench):
+    bench(validate_question_payload, QuestionIn(text="q", type="numeric", options_json=NUMERIC_RANGE))
+
+def test_to_db_options_dict(bench):
+    assert bench(_to_db_options, BIG_CHOICES) == BIG_CHOICES
+
+def test_to_db_options_json_string(bench):
+    assert bench(_to_db_options, json.dumps(BIG_CHOICES)) == BIG_CHOICES
+
+def test_question_rows_500_questions(bench):
+    qs = _form(500)
+    assert len(bench(_question_rows, 1, qs)) == 500
@@ -0,0 +1,38 @@
+import json
+
+from pydantic import TypeAdapter
+
+from app import fastjson
+from app.main import _form_dict
+from app.models import Form, Question
+from app.schemas import FormOut
+
+FORMS, QUESTIONS = 1000, 10   # 10k redova pitanja
+adapter = TypeAdapter(list[FormOut])
+
+
+def _forms():
+    out = []
+    for i in range(FORMS):
+        f = Form(id=i, owner_email="a@x.rs", name=f"Forma {i}", description="", allow_anonymous=True,
+                 is_locked=False, version=1)
+        f.questions = [Question(id=i * QUESTIONS + j, text=f"Pitanje {j}", type="single_choice", required=False,
+                                order_index=j, options_json={"choices": ["a", "b", "c"]}) for j in range(QUESTIONS)]
+        out.append(f)
+    return out
+
+FORM_ROWS = _forms()
+
+
+def _response_model_path(forms):
+    out = adapter.validate_python(forms, from_attributes=True)
+    return json.dumps(adapter.dump_python(out, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def test_list_forms_10k_questions_response_model(bench):
+    bench(_response_model_path, FORM_ROWS)
+
+
+def test_list_forms_10k_questions_fast_json(bench):
+    body = bench(lambda: fastjson.dumps([_form_dict(f) for f in FORM_ROWS]))
+    assert json.loads(body) == json.loads(_response_model_path(FORM_ROWS))
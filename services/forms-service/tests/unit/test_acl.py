@@ -0,0 +1,36 @@
+from app.acl import RoleCache, _MISS
+
+def test_role_cache_hit_and_invalidate():
+    c = RoleCache(ttl=60)
+    c.set(1, "a@x.com", "editor")
+    c.set(1, "b@x.com", None)
+    c.set(2, "a@x.com", "viewer")
+    assert c.get(1, "a@x.com") == "editor"
+    # negativan rezultat se takođe kešira
+    assert c.get(1, "b@x.com") is None
+
+    c.invalidate(1, "a@x.com")
+    assert c.get(1, "a@x.com") is _MISS
+
+    c.invalidate(1)
+    assert c.get(1, "b@x.com") is _MISS
+    assert c.get(2, "a@x.com") == "viewer"
+
+def test_role_cache_expired_entry_is_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.acl.time.monotonic", lambda: now[0])
+    c = RoleCache(ttl=60)
+    c.set(1, "a@x.com", "editor")
+    now[0] += 59
+    assert c.get(1, "a@x.com") == "editor"
+    now[0] += 2
+    assert c.get(1, "a@x.com") is _MISS
+
+def test_role_read_before_invalidate_is_not_cached():
+    c = RoleCache(ttl=60)
+    gen = c.generation(1)           # zahtev čita ulogu iz baze ...
+    c.invalidate(1, "a@x.com")      # ... u međuvremenu je kolaborator uklonjen
+    c.set(1, "a@x.com", "editor", gen)
+    assert c.get(1, "a@x.com") is _MISS
+    c.set(1, "a@x.com", None, c.generation(1))
+    assert c.get(1, "a@x.com") is None
@@ -0,0 +1,90 @@
+import uuid
+
+import pytest
+
+QUESTIONS = [
+    {"text": "Ime", "type": "short_text", "required": True},
+    {"text": "Jezik", "type": "single_choice", "options_json": {"choices": ["Python", "Java"]}},
+    {"text": "Godine", "type": "numeric", "options_json": {"range": {"start": 1, "end": 99, "step": 1}}},
+    {"text": "Alati", "type": "multi_choice", "options_json": {"choices": ["git", "vim"], "required_count": 1}},
+]
+
+@pytest.fixture
+def user(auth):
+    """Novi korisnik: (email, zaglavlja)."""
+    def make():
+        email = f"{uuid.uuid4().hex}@x.com"
+        return email, auth(email)
+    return make
+
+def _structure(form):
+    return [(q["text"], q["type"], q["required"], q["options_json"]) for q in form["questions"]]
+
+def _form(client, h, allow_anonymous=False):
+    r = client.post("/forms", json={"name": "Anketa", "allow_anonymous": allow_anonymous, "questions": QUESTIONS}, headers=h)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+def test_clone_copies_questions_for_new_owner(client, user):
+    owner, h = user()
+    src = _form(client, h)
+    viewer, hv = user()
+    client.post(f"/forms/{src['id']}/collaborators", json={"email": viewer, "role": "viewer"}, headers=h)
+    client.post(f"/forms/{src['id']}/collaborators", json={"email": "ed@x.com", "role": "editor"}, headers=h)
+
+    r = client.post(f"/forms/{src['id']}/clone", json={"name": "Kopija"}, headers=hv)
+    assert r.status_code == 201, r.text
+    c = r.json()
+    assert c["id"] != src["id"] and c["owner_email"] == viewer and c["name"] == "Kopija"
+    assert not c["is_locked"] and c["version"] == 1
+    assert _structure(c) == _structure(src)
+    assert {q["id"] for q in c["questions"]}.isdisjoint(q["id"] for q in src["questions"])
+
+    # kolaboratore kopira samo vlasnik
+    r = client.post(f"/forms/{src['id']}/clone", json={"include_collaborators": True}, headers=hv)
+    assert r.status_code == 403
+    c = client.post(f"/forms/{src['id']}/clone", json={"include_collaborators": True}, headers=h).json()
+    assert c["name"] == "Anketa (copy)"
+    collabs = client.get(f"/forms/{c['id']}/collaborators", headers=h).json()
+    assert sorted((x["email"], x["role"]) for x in collabs) == sorted([(viewer, "viewer"), ("ed@x.com", "editor")])
+
+def test_clone_of_private_form_is_forbidden_for_others(client, user):
+    _, h = user()
+    src = _form(client, h)
+    assert client.post(f"/forms/{src['id']}/clone", headers=user()[1]).status_code == 403
+    assert client.post("/forms/999999999/clone", headers=h).status_code == 404
+
+def test_template_snapshot_and_instantiate(client, user):
+    owner, h = user()
+    src = _form(client, h)
+    r = client.post(f"/forms/{src['id']}/template", json={"name": "Šablon", "is_public": False}, headers=h)
+    assert r.status_code == 201, r.text
+    t = r.json()
+    assert t["question_count"] == len(QUESTIONS) and t["owner_email"] == owner
+
+    # snimak se ne menja kada se izvorna forma kasnije promeni
+    client.delete(f"/forms/{src['id']}/questions/{src['questions'][0]['id']}", headers=h)
+
+    r = client.post(f"/templates/{t['id']}/forms", json={"name": "Iz šablona"}, headers=h)
+    assert r.status_code == 201, r.text
+    f = r.json()
+    assert f["name"] == "Iz šablona" and f["owner_email"] == owner and not f["allow_anonymous"]
+    assert _structure(f) == _structure(src)
+    assert t["id"] in [x["id"] for x in client.get("/templates", headers=h).json()]
+
+def test_template_access(client, user):
+    _, h = user()
+    src = _form(client, h)
+    other, ho = user()
+    assert client.post(f"/forms/{src['id']}/template", json={}, headers=ho).status_code == 403
+
+    private = client.post(f"/forms/{src['id']}/template", json={"is_public": False}, headers=h).json()
+    public = client.post(f"/forms/{src['id']}/template", json={"is_public": True}, headers=h).json()
+    listed = {x["id"] for x in client.get("/templates", headers=ho).json()}
+    assert public["id"] in listed and private["id"] not in listed
+    assert client.post(f"/templates/{private['id']}/forms", headers=ho).status_code == 404
+    f = client.post(f"/templates/{public['id']}/forms", headers=ho).json()
+    assert f["owner_email"] == other
+
+    assert client.delete(f"/templates/{public['id']}", headers=ho).status_code == 403
+    assert client.delete(f"/templates/{public['id']}", headers=h).status_code == 204
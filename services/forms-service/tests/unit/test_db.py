@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import engine_options, make_engine
+from app.migrations import migrate
+from app.models import Question
+
+
+def test_profile_defaults_and_prepinging():
+    opts = engine_options("postgresql+psycopg2://u:p@db/forms", "large")
+    assert opts["pool_size"] == 20 and opts["max_overflow"] == 30 and opts["pool_recycle"] == 1800
+    assert opts["pool_pre_ping"] is True
+    assert engine_options("sqlite:///./forms.db")["pool_pre_ping"] is False
+
+
+def test_memory_sqlite_has_no_pool_sizing():
+    assert engine_options("sqlite://") == {"pool_pre_ping": False}
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        engine_options("sqlite:///x.db", "huge")
+
+
+def test_sqlite_pragmas(tmp_path):
+    eng = make_engine(f"sqlite:///{tmp_path / 'x.db'}")
+    with eng.connect() as c:
+        assert c.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert c.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert c.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    eng.dispose()
+
+
+def test_wal_reader_not_blocked_by_open_writer(tmp_path):
+    eng = make_engine(f"sqlite:///{tmp_path / 'x.db'}")
+    with eng.begin() as c:
+        c.execute(text("CREATE TABLE t (x INTEGER)"))
+        c.execute(text("INSERT INTO t VALUES (1)"))
+    writer = eng.connect()
+    tx = writer.begin()
+    writer.execute(text("INSERT INTO t VALUES (2)"))
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(eng.connect().execute(text("SELECT count(*) FROM t")).scalar()))
+    t.start(); t.join(timeout=5)
+    tx.rollback(); writer.close(); eng.dispose()
+    assert seen == [1]
+
+
+def test_migration_nulls_legacy_invalid_options(tmp_path):
+    eng = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    migrate(eng)
+    with eng.begin() as c:
+        c.execute(text("DELETE FROM schema_version WHERE version >= 4"))
+        c.execute(text("INSERT INTO forms (id, owner_email, name, description, allow_anonymous, is_locked, version) "
+                       "VALUES (1, 'o@x.com', 'F', '', 0, 0, 1)"))
+        for i, raw in enumerate(['', 'not json', '{"choices": ["a"]}']):
+            c.execute(text("INSERT INTO questions (form_id, text, type, required, order_index, options_json) "
+                           "VALUES (1, 'q', 'short_text', 0, :i, :raw)"), {"i": i, "raw": raw})
+    migrate(eng)
+    with Session(eng) as db:
+        assert [q.options_json for q in db.query(Question).order_by(Question.order_index)] == [None, None, {"choices": ["a"]}]
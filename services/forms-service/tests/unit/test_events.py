@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import OutboxEvent
+from app import events
+
+def _session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def test_relay_publishes_in_order_through_local_transport():
+    Session = _session_factory()
+    db = Session()
+    events.emit(db, events.QUESTIONS_CHANGED, 1, 2)
+    events.emit(db, events.FORM_DELETED, 1)
+    db.commit()
+
+    transport = events.LocalTransport()
+    seen = []
+    transport.subscribe(seen.append)
+    relay = events.OutboxRelay(Session, transport)
+
+    assert relay.relay_once() == 2
+    assert [m["type"] for m in seen] == ["questions_changed", "form_deleted"]
+    assert relay.relay_once() == 0
+
+def test_relay_stops_on_failure_and_retries_later():
+    Session = _session_factory()
+    db = Session()
+    events.emit(db, events.FORM_LOCKED, 5, 3)
+    db.commit()
+
+    class Down:
+        def publish(self, message):
+            raise ConnectionError("down")
+
+    relay = events.OutboxRelay(Session, Down())
+    assert relay.relay_once() == 0
+    ev = Session().execute(select(OutboxEvent)).scalar_one()
+    assert ev.published_at is None and ev.attempts == 1
+
+    transport = relay.transport = events.LocalTransport()
+    assert relay.relay_once() == 1
+    assert transport.published[0]["form_id"] == 5
+
+def test_relay_parks_event_after_max_attempts_and_moves_on():
+    Session = _session_factory()
+    db = Session()
+    events.emit(db, events.FORM_UPDATED, 1, 2)
+    events.emit(db, events.FORM_UPDATED, 2, 2)
+    db.commit()
+
+    class RejectsForm1(events.LocalTransport):
+        def publish(self, message):
+            if message["form_id"] == 1:
+                raise ValueError("400 Bad Request")
+            super().publish(message)
+
+    transport = RejectsForm1()
+    relay = events.OutboxRelay(Session, transport, max_attempts=2)
+    assert relay.relay_once() == 0      # 1. pokušaj: red čeka
+    assert relay.relay_once() == 1      # 2. pokušaj: parkiran, sledeći prolazi
+    assert [m["form_id"] for m in transport.published] == [2]
+    parked = Session().execute(select(OutboxEvent).where(OutboxEvent.form_id == 1)).scalar_one()
+    assert parked.parked_at is not None and parked.published_at is None
+
+    assert relay.requeue_parked(Session()) == 1
+    assert events.OutboxRelay(Session, events.LocalTransport()).relay_once() == 0  # zakup drži prvi relay
+    relay.transport = events.LocalTransport()
+    assert relay.relay_once() == 1
+
+def test_only_lease_holder_relays():
+    Session = _session_factory()
+    db = Session()
+    events.emit(db, events.FORM_UPDATED, 1, 2)
+    db.commit()
+
+    a, b = events.LocalTransport(), events.LocalTransport()
+    first = events.OutboxRelay(Session, a, lease_seconds=30)
+    second = events.OutboxRelay(Session, b, lease_seconds=30)
+    assert first.claim(Session()) and not second.claim(Session())
+    assert second.relay_once() == 0 and first.relay_once() == 1
+    assert len(a.published) == 1 and not b.published
+
+    # istekao zakup preuzima drugi relay
+    expired = events.OutboxRelay(Session, a, lease_seconds=-1)
+    expired.holder = first.holder
+    assert expired.claim(Session())
+    assert second.claim(Session())
+
+def test_prune_removes_old_published_events():
+    Session = _session_factory()
+    db = Session()
+    events.emit(db, events.FORM_UPDATED, 1, 2)
+    events.emit(db, events.FORM_UPDATED, 2, 2)
+    db.commit()
+    relay = events.OutboxRelay(Session, events.LocalTransport(), retention_hours=1)
+    assert relay.relay_once() == 2
+    db.execute(update(OutboxEvent).where(OutboxEvent.form_id == 1)
+               .values(published_at=datetime.utcnow() - timedelta(hours=2)))
+    db.commit()
+    assert relay.prune(db) == 1
+    assert [e.form_id for e in db.execute(select(OutboxEvent)).scalars()] == [2]
+
+def test_concurrent_changes_get_distinct_versions(tmp_path):
+    from app.main import _changed
+    from app.models import Form
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'v.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as s:
+        s.add(Form(id=1, owner_email="o@x.com", name="F"))
+        s.commit()
+    a, b = Session(), Session()
+    fa, fb = a.get(Form, 1), b.get(Form, 1)         # obe izmene su pročitale verziju 1
+    _changed(b, fb, events.QUESTIONS_CHANGED)
+    assert fb.version == 2
+    b.commit()
+    _changed(a, fa, events.QUESTIONS_CHANGED)
+    assert fa.version == 3
+    a.commit()
+    versions = Session().execute(select(OutboxEvent.version).order_by(OutboxEvent.id)).scalars().all()
+    assert versions == [2, 3]
@@ -1,8 +1,20 @@
-from app.main import _to_db_options
+import json
 
-def test_to_db_options_dict_list_to_json_string():
-    assert _to_db_options({"a": 1}) == '{"a": 1}'
-    assert _to_db_options(["x","y"]) == '["x", "y"]'
+from app import fastjson
+from app.main import _to_db_options, _form_dict
+from app.models import Form, Question
+from app.schemas import FormOut
+
+def test_to_db_options_keeps_native_json_and_decodes_strings():
+    assert _to_db_options({"a": 1}) == {"a": 1}
+    assert _to_db_options(["x","y"]) == ["x", "y"]
     assert _to_db_options(None) is None
-    assert _to_db_options('{"keep":"as-is"}') == '{"keep":"as-is"}'
+    assert _to_db_options('{"keep":"as-is"}') == {"keep": "as-is"}
 
+def test_fast_form_dict_matches_form_out():
+    f = Form(id=1, owner_email="a@x.rs", name="F", description="", allow_anonymous=True, is_locked=False, version=3)
+    f.questions = [
+        Question(id=10, text="Q1", type="single_choice", required=True, order_index=0, options_json={"choices": ["a", "b"]}),
+        Question(id=11, text="Q2", type="numeric", required=False, order_index=1, options_json='{"range": {"start": 1, "end": 5}}'),
+    ]
+    assert json.loads(fastjson.dumps([_form_dict(f)])) == [FormOut.model_validate(f).model_dump()]
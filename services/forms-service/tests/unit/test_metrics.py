@@ -0,0 +1,54 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import metrics, profiling
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v, "/x")
+    lines = h.render()
+    assert 't_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 't_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 't_seconds_count{route="/x"} 3' in lines
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    c = TestClient(app)
+    before = metrics.http_requests.value("GET", "/items/{item_id}", "200")
+    c.get("/items/1"); c.get("/items/2"); c.get("/missing")
+    assert metrics.http_requests.value("GET", "/items/{item_id}", "200") == before + 2
+    assert metrics.http_requests.value("GET", "unmatched", "404") >= 1
+    assert metrics.http_in_flight.value() == 0
+
+def test_engine_events_count_queries():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    before = metrics.db_queries.value("select")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert metrics.db_queries.value("select") == before + 1
+
+def test_failed_statements_do_not_leak_timers():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    profiling.install(engine)
+    before = metrics.db_queries.value("select")
+    with profiling.capture() as ql, engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        assert not any(k.endswith("_t0") for k in conn.info)
+    assert metrics.db_queries.value("select") == before + 1
+    assert ql.count == 1
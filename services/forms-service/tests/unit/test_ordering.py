@@ -0,0 +1,28 @@
+from app.ordering import ORDER_GAP, rank_between, plan_reorder
+
+def test_rank_between():
+    assert rank_between(None, None) == 0
+    assert rank_between(0, None) == ORDER_GAP
+    assert rank_between(None, 0) == -ORDER_GAP
+    assert rank_between(0, 1024) == 512
+    assert rank_between(5, 6) is None
+
+def test_plan_reorder_moving_one_question_changes_one_row():
+    current = {1: 0, 2: 1024, 3: 2048, 4: 3072}
+    changes = plan_reorder(current, [1, 4, 2, 3])
+    assert list(changes) == [4]
+    assert 0 < changes[4] < 1024
+
+def test_plan_reorder_unchanged_order_is_noop():
+    current = {1: 0, 2: 1024, 3: 2048}
+    assert plan_reorder(current, [1, 2, 3]) == {}
+
+def test_plan_reorder_without_gap_needs_rebalance():
+    # stari (gusti) rangovi 0,1,2 -> nema mesta između 0 i 1
+    assert plan_reorder({1: 0, 2: 1, 3: 2}, [1, 3, 2]) is None
+
+
+def test_plan_reorder_duplicate_ranks_are_spread_out():
+    current = {1: 0, 2: 0, 3: 0}
+    current.update(plan_reorder(current, [3, 2, 1]))
+    assert current[3] < current[2] < current[1]
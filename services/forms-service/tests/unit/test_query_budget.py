@@ -0,0 +1,11 @@
+def test_form_listings_do_not_load_questions_per_form(client, auth, query_budget):
+    h = auth()
+    for i in range(6):
+        client.post("/forms", json={"name": f"F{i}", "questions": [{"text": "q", "type": "short_text"}]}, headers=h)
+
+    with query_budget(3):
+        assert len(client.get("/forms", headers=h).json()) == 6
+    with query_budget(3):
+        assert len(client.get("/my/forms", headers=h).json()) == 6
+    with query_budget(3):
+        client.get("/forms/public")
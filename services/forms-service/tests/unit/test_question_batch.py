@@ -0,0 +1,74 @@
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import OutboxEvent
+
+def _form(client, h, n=3):
+    qs = [{"text": f"Q{i}", "type": "short_text"} for i in range(n)]
+    return client.post("/forms", json={"name": "F", "questions": qs}, headers=h).json()
+
+def _events(form_id):
+    with SessionLocal() as db:
+        return db.execute(
+            select(OutboxEvent.event_type, OutboxEvent.version).where(OutboxEvent.form_id == form_id).order_by(OutboxEvent.id)
+        ).all()
+
+def test_patch_questions_applies_mixed_batch(client, auth):
+    h = auth()
+    f = _form(client, h)
+    q0, q1, q2 = (q["id"] for q in f["questions"])
+
+    r = client.patch(f"/forms/{f['id']}/questions", headers=h, json={"expected_version": f["version"], "ops": [
+        {"op": "delete", "id": q1},
+        {"op": "update", "id": q2, "question": {"text": "Q2*", "type": "single_choice",
+                                                "options_json": {"choices": ["a", "b"]}}},
+        {"op": "create", "question": {"text": "Q3", "type": "short_text"}},
+        {"op": "reorder", "order": [q2, q0]},
+    ]})
+    assert r.status_code == 200, r.text
+    out = r.json()
+    assert [q["text"] for q in out["questions"]] == ["Q2*", "Q0", "Q3"]
+    assert out["questions"][0]["options_json"] == {"choices": ["a", "b"]}
+    assert out["version"] == f["version"] + 1
+    assert _events(f["id"])[-1] == ("questions_changed", out["version"])
+
+def test_patch_questions_rolls_back_whole_batch_on_invalid_op(client, auth):
+    h = auth()
+    f = _form(client, h)
+    q0 = f["questions"][0]["id"]
+    before = _events(f["id"])
+
+    r = client.patch(f"/forms/{f['id']}/questions", headers=h, json={"ops": [
+        {"op": "delete", "id": q0},
+        {"op": "create", "question": {"text": "Q3", "type": "short_text"}},
+        {"op": "update", "id": 10**9, "question": {"text": "X", "type": "short_text"}},
+    ]})
+    assert r.status_code == 404
+
+    after = client.get(f"/forms/{f['id']}", headers=h).json()
+    assert [q["text"] for q in after["questions"]] == ["Q0", "Q1", "Q2"]
+    assert after["version"] == f["version"]
+    assert _events(f["id"]) == before
+
+def test_patch_questions_rejects_reorder_of_unknown_or_deleted_questions(client, auth):
+    h = auth()
+    f = _form(client, h)
+    q0, q1, q2 = (q["id"] for q in f["questions"])
+
+    for ops in ([{"op": "create", "question": {"text": "Q3", "type": "short_text"}},
+                 {"op": "reorder", "order": [10**9, q0]}],
+                [{"op": "delete", "id": q1}, {"op": "reorder", "order": [q1, q0]}]):
+        r = client.patch(f"/forms/{f['id']}/questions", headers=h, json={"ops": ops})
+        assert r.status_code == 422, r.text
+    after = client.get(f"/forms/{f['id']}", headers=h).json()
+    assert [q["text"] for q in after["questions"]] == ["Q0", "Q1", "Q2"]
+
+def test_patch_questions_checks_expected_version_and_access(client, auth):
+    h = auth()
+    f = _form(client, h, 1)
+    ops = {"ops": [{"op": "create", "question": {"text": "Q", "type": "short_text"}}]}
+
+    r = client.patch(f"/forms/{f['id']}/questions", headers=h, json={**ops, "expected_version": f["version"] + 5})
+    assert r.status_code == 409
+    r = client.patch(f"/forms/{f['id']}/questions", headers=auth(), json=ops)
+    assert r.status_code == 403
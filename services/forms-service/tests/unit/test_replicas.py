@@ -0,0 +1,105 @@
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import replicas
+from app.db import make_engine
+from app.replicas import Replica, ReadRouter, ReadYourWritesMiddleware, client_key, get_read_db
+
+
+def _db(path, value):
+    eng = make_engine(f"sqlite:///{path}")
+    with eng.begin() as c:
+        c.execute(text("CREATE TABLE src (name TEXT)"))
+        c.execute(text("INSERT INTO src VALUES (:v)"), {"v": value})
+    return eng
+
+
+def _where(router, key=None):
+    db, route = router.session(key)
+    try:
+        return route, db.execute(text("SELECT name FROM src")).scalar()
+    finally:
+        db.close()
+
+
+def _router(tmp_path, **kw):
+    primary = sessionmaker(bind=_db(tmp_path / "primary.db", "primary"))
+    replica = Replica("", engine=_db(tmp_path / "replica.db", "replica"))
+    return ReadRouter(primary, [replica], **{"sticky_seconds": 60, "max_lag": 5, "check_interval": 0, **kw}), replica
+
+
+def test_reads_go_to_replica(tmp_path):
+    router, _ = _router(tmp_path)
+    assert _where(router, "a") == ("replica", "replica")
+
+
+def test_read_your_writes_sticks_to_primary(tmp_path):
+    router, _ = _router(tmp_path)
+    router.mark_write("a")
+    assert _where(router, "a") == ("primary", "primary")
+    assert _where(router, "b") == ("replica", "replica")
+
+
+def test_sticky_expires(tmp_path):
+    router, _ = _router(tmp_path, sticky_seconds=0)
+    router.mark_write("a")
+    assert _where(router, "a")[0] == "replica"
+
+
+def test_lagging_replica_falls_back(tmp_path, monkeypatch):
+    router, replica = _router(tmp_path)
+    monkeypatch.setattr(replica, "lag_seconds", lambda: 30.0)
+    assert _where(router, "a") == ("primary", "primary")
+    monkeypatch.setattr(replica, "lag_seconds", lambda: 0.5)
+    assert _where(router, "a") == ("replica", "replica")
+
+
+def test_unreachable_replica_falls_back(tmp_path):
+    primary = sessionmaker(bind=_db(tmp_path / "primary.db", "primary"))
+    dead = Replica(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReadRouter(primary, [dead], check_interval=0)
+    assert _where(router, "a") == ("primary", "primary")
+    assert dead.healthy is False
+
+
+def test_no_replicas_uses_primary(tmp_path):
+    primary = sessionmaker(bind=_db(tmp_path / "primary.db", "primary"))
+    assert _where(ReadRouter(primary, []), "a") == ("primary", "primary")
+
+
+def test_client_key_prefers_authorization():
+    assert client_key({"authorization": "Bearer x"}, ("1.2.3.4", 1)) != client_key({"authorization": "Bearer y"}, ("1.2.3.4", 1))
+    assert client_key({}, ("1.2.3.4", 1)) == "ip:1.2.3.4"
+
+
+def test_replica_that_cannot_connect_falls_back_per_request(tmp_path):
+    primary = sessionmaker(bind=_db(tmp_path / "primary.db", "primary"))
+    dead = Replica(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReadRouter(primary, [dead], check_interval=3600)
+    dead.checked_at = time.monotonic()  # provera još nije stigla da ga obori
+    assert _where(router, "a") == ("primary", "primary")
+    assert dead.healthy is False
+
+
+def test_replica_failing_mid_request_is_retried_on_primary(tmp_path, monkeypatch):
+    router, replica = _router(tmp_path)
+    monkeypatch.setattr(replicas, "read_router", router)
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, router=router)
+    calls = []
+
+    @app.get("/where")
+    def where(db: Session = Depends(get_read_db)):
+        calls.append(db.info.get("replica") is not None)
+        if db.info.get("replica"):
+            db.connection().connection.dbapi_connection.close()  # replika "pada" usred zahteva
+        return db.execute(text("SELECT name FROM src")).scalar()
+
+    r = TestClient(app).get("/where")
+    assert r.status_code == 200 and r.json() == "primary"
+    assert r.headers["X-DB-Route"] == "primary"
+    assert calls == [True, False] and replica.healthy is False
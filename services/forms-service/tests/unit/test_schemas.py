@@ -1,4 +1,6 @@
-from app.schemas import QuestionIn
+import pytest
+from pydantic import ValidationError
+from app.schemas import QuestionIn, QuestionBatch
 
 def test_options_json_str_is_parsed_to_dict():
     q = QuestionIn(
@@ -9,3 +11,15 @@ def test_options_json_str_is_parsed_to_dict():
     assert isinstance(q.options_json, dict)
     assert q.options_json["choices"] == ["Python", "Java"]
 
+
+def test_question_batch_requires_fields_per_op():
+    b = QuestionBatch(ops=[
+        {"op": "create", "question": {"text": "A", "type": "short_text"}},
+        {"op": "delete", "id": 3},
+        {"op": "reorder", "order": [3, 1]},
+    ])
+    assert [o.op for o in b.ops] == ["create", "delete", "reorder"]
+    with pytest.raises(ValidationError):
+        QuestionBatch(ops=[{"op": "update", "id": 1}])
+    with pytest.raises(ValidationError):
+        QuestionBatch(ops=[{"op": "delete"}])
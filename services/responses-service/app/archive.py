@@ -0,0 +1,345 @@
+"""
+Hladna arhiva odgovora zaključanih, neaktivnih formi.
+
+Forma koja je zaključana u forms-service i nema novih odgovora duže od
+ARCHIVE_INACTIVE_DAYS seli se iz responses/answers u jedan gzip JSON fajl po
+koloni (ARCHIVE_DIR), a u archived_forms ostaje red sa putanjom i najvećim
+arhiviranim ID-jem. Endpoint-i za čitanje spajaju arhivu i vruće redove sa
+id > max_response_id, pa je arhiva klijentima nevidljiva i kada se forma
+kasnije otključa i dobije nove odgovore (sledeće arhiviranje ih dopisuje u
+novu verziju fajla).
+
+Redosled pri arhiviranju: fajl (nova verzija, atomski rename) -> u jednoj
+transakciji red u registru + brisanje vrućih redova. Pad pre commit-a
+ostavlja samo višak fajl. Zamenjene verzije se brišu tek sledećim
+pokretanjem (`prune`), da čitaoci sa starim redom iz registra ne ostanu bez fajla.
+
+    python -m app.archive run [--days N] [--form ID] [--dry-run]
+    python -m app.archive restore <form_id>
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import httpx
+from sqlalchemy import select, func, delete
+from sqlalchemy.orm import Session
+
+from .config import (ARCHIVE_DIR, ARCHIVE_INACTIVE_DAYS, ARCHIVE_CACHE_SIZE, ARCHIVE_CACHE_MAX_ANSWERS,
+                     FORMS_API, INTERNAL_TOKEN)
+from .models import Response, Answer, ArchivedForm
+
+log = logging.getLogger(__name__)
+
+FORMAT = 1
+BATCH = 1000
+
+
+class ArchivedAnswer(NamedTuple):
+    question_id: int
+    value: str
+
+
+class ArchivedResponse(NamedTuple):
+    id: int
+    form_id: int
+    form_version: int | None
+    submitted_at: str | None
+    answers: list[ArchivedAnswer]
+
+
+class Archive:
+    """
+    Dekodiran arhivski fajl; kolone su liste iste dužine. Objekti odgovora se
+    prave jednom, pri prvom responses(), i zamenjuju kolone (u memoriji je samo
+    jedan oblik podataka).
+    """
+
+    def __init__(self, data: dict):
+        self.form_id = data["form_id"]
+        self.max_response_id = data["max_response_id"]
+        self.r = data["responses"]
+        self.a = data["answers"]
+        self.answer_count = len(self.a["value"])
+        self._count = len(self.r["id"])
+        self._responses: list[ArchivedResponse] | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def answer_rows(self):
+        """(question_id, JSON vrednost) za agregaciju, bez pravljenja objekata."""
+        built = self._responses
+        if built is not None:
+            return ((x.question_id, x.value) for ar in built for x in ar.answers)
+        return zip(self.a["question_id"], self.a["value"])
+
+    def responses(self) -> list[ArchivedResponse]:
+        """Svi odgovori redom po id-u; lista je deljena između zahteva i ne sme se menjati."""
+        if self._responses is None:
+            with self._lock:
+                if self._responses is None:
+                    self._responses = self._build()
+                    self.r = self.a = None
+        return self._responses
+
+    def _build(self) -> list[ArchivedResponse]:
+        by_id: dict[int, list[ArchivedAnswer]] = {rid: [] for rid in self.r["id"]}
+        for rid, qid, value in zip(self.a["response_id"], self.a["question_id"], self.a["value"]):
+            by_id[rid].append(ArchivedAnswer(qid, value))
+        return [ArchivedResponse(rid, self.form_id, ver, at, by_id[rid])
+                for rid, ver, at in zip(self.r["id"], self.r["form_version"], self.r["submitted_at"])]
+
+
+def _full_path(path: str) -> str:
+    return os.path.join(ARCHIVE_DIR, path)
+
+
+class ArchiveCache:
+    """
+    LRU dekodiranih arhiva po putanji, ograničen brojem arhiva i ukupnim brojem
+    odgovora na pitanja (~200 B memorije po odgovoru). Arhiva veća od celog
+    budžeta se ne kešira, već čita iz fajla pri svakom zahtevu. Fajlovi se
+    nikad ne menjaju (nova verzija = novo ime), pa keš po putanji ne zastareva.
+    """
+
+    def __init__(self, max_entries: int, max_answers: int):
+        self.max_entries = max_entries
+        self.max_answers = max_answers
+        self.answers = 0
+        self._data: OrderedDict[str, Archive] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, load) -> Archive:
+        with self._lock:
+            hit = self._data.get(path)
+            if hit is not None:
+                self._data.move_to_end(path)
+                return hit
+        arch = load(path)
+        if self.max_entries <= 0 or arch.answer_count > self.max_answers:
+            return arch
+        with self._lock:
+            if path not in self._data:
+                self._data[path] = arch
+                self.answers += arch.answer_count
+            while len(self._data) > self.max_entries or self.answers > self.max_answers:
+                _, old = self._data.popitem(last=False)
+                self.answers -= old.answer_count
+            return self._data.get(path, arch)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.answers = 0
+
+
+_cache = ArchiveCache(ARCHIVE_CACHE_SIZE, ARCHIVE_CACHE_MAX_ANSWERS)
+
+
+def _load(path: str) -> Archive:
+    with gzip.open(_full_path(path), "rt", encoding="utf-8") as f:
+        return Archive(json.load(f))
+
+
+def _read(path: str) -> Archive:
+    return _cache.get(path, _load)
+
+
+def lookup(db: Session, form_id: int) -> Archive | None:
+    row = db.get(ArchivedForm, form_id)
+    return _read(row.path) if row else None
+
+
+def _empty(form_id: int) -> dict:
+    return {"format": FORMAT, "form_id": form_id, "max_response_id": 0,
+            "responses": {"id": [], "form_version": [], "submitted_at": []},
+            "answers": {"response_id": [], "question_id": [], "value": []}}
+
+
+def _write(data: dict, path: str):
+    full = _full_path(path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    tmp = full + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(data, f, separators=(",", ":"))
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, full)
+
+
+# -----------------------
+# Izbor formi
+# -----------------------
+def inactive_forms(db: Session, cutoff: datetime) -> list[int]:
+    """
+    Forme sa vrućim odgovorima čiji je poslednji odgovor stariji od cutoff. Forme sa
+    odgovorom bez vremena (npr. vraćen stari red iz arhive) se preskaču: ne znamo koliko je star.
+    """
+    return list(db.execute(
+        select(Response.form_id).group_by(Response.form_id)
+        .having(func.max(Response.submitted_at) < cutoff, func.count() == func.count(Response.submitted_at))
+        .order_by(Response.form_id)
+    ).scalars())
+
+
+def locked_forms(form_ids: list[int]) -> set[int]:
+    """Zaključane forme po forms-service; obrisane forme se ne vraćaju (njih briše purge)."""
+    locked = set()
+    with httpx.Client(timeout=10.0) as cx:
+        for i in range(0, len(form_ids), 500):
+            r = cx.get(f"{FORMS_API}/internal/forms/status", params={"ids": form_ids[i:i + 500]},
+                       headers={"X-Internal-Token": INTERNAL_TOKEN})
+            r.raise_for_status()
+            locked.update(s["id"] for s in r.json() if s["is_locked"])
+    return locked
+
+
+# -----------------------
+# Arhiviranje / vraćanje
+# -----------------------
+def archive_form(db: Session, form_id: int) -> int:
+    """Premesti vruće odgovore forme u (novu verziju) arhive; vraća broj premeštenih odgovora."""
+    row = db.get(ArchivedForm, form_id)
+    data = _empty(form_id)
+    if row:
+        with gzip.open(_full_path(row.path), "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    r, a = data["responses"], data["answers"]
+    moved, last = 0, data["max_response_id"]
+    while True:
+        rs = db.execute(
+            select(Response.id, Response.form_version, Response.submitted_at)
+            .where(Response.form_id == form_id, Response.id > last).order_by(Response.id).limit(BATCH)
+        ).all()
+        if not rs:
+            break
+        ids = [x.id for x in rs]
+        for x in rs:
+            r["id"].append(x.id)
+            r["form_version"].append(x.form_version)
+            r["submitted_at"].append(x.submitted_at.isoformat() if x.submitted_at else None)
+        for rid, qid, value in db.execute(
+            select(Answer.response_id, Answer.question_id, Answer.value)
+            .where(Answer.response_id.in_(ids)).order_by(Answer.response_id, Answer.id)
+        ):
+            a["response_id"].append(rid)
+            a["question_id"].append(qid)
+            a["value"].append(value)
+        moved += len(ids)
+        last = ids[-1]
+    if not moved:
+        return 0
+    data["max_response_id"] = last
+    path = f"form_{form_id}.{int(time.time() * 1000)}.json.gz"
+    _write(data, path)
+
+    if row is None:
+        row = ArchivedForm(form_id=form_id)
+        db.add(row)
+    row.path, row.max_response_id = path, last
+    row.responses, row.answers = len(r["id"]), len(a["value"])
+    row.archived_at = datetime.utcnow()
+    hot = select(Response.id).where(Response.form_id == form_id, Response.id <= last)
+    db.execute(delete(Answer).where(Answer.response_id.in_(hot)))
+    db.execute(delete(Response).where(Response.form_id == form_id, Response.id <= last))
+    db.commit()
+    return moved
+
+
+def restore(db: Session, form_id: int) -> int:
+    """Vrati arhivirane odgovore u vruće tabele (sa istim ID-jevima) i ukloni red iz registra."""
+    row = db.get(ArchivedForm, form_id)
+    if row is None:
+        return 0
+    arch = _read(row.path)
+    for ar in arch.responses():
+        at = datetime.fromisoformat(ar.submitted_at) if ar.submitted_at else None
+        db.add(Response(id=ar.id, form_id=form_id, form_version=ar.form_version, submitted_at=at,
+                        answers=[Answer(question_id=x.question_id, value=x.value) for x in ar.answers]))
+    db.delete(row)
+    db.commit()
+    return len(arch)
+
+
+def drop(db: Session, form_id: int):
+    """Obriši arhivu obrisane forme (red u registru i fajl)."""
+    row = db.get(ArchivedForm, form_id)
+    if row is None:
+        return
+    path = row.path
+    db.delete(row)
+    db.commit()
+    try:
+        os.remove(_full_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def prune(sessions, min_age: float = 3600) -> int:
+    """Obriši verzije fajlova na koje registar više ne pokazuje (starije od min_age sekundi)."""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return 0
+    live = set()
+    for make in sessions:
+        with make() as db:
+            live.update(db.execute(select(ArchivedForm.path)).scalars())
+    removed, now = 0, time.time()
+    for name in os.listdir(ARCHIVE_DIR):
+        full = _full_path(name)
+        if name.startswith("form_") and name not in live and now - os.path.getmtime(full) > min_age:
+            os.remove(full)
+            removed += 1
+    return removed
+
+
+def run(sessions, days: float = ARCHIVE_INACTIVE_DAYS, form_id: int | None = None, dry_run: bool = False) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    for make in sessions:
+        with make() as db:
+            candidates = [form_id] if form_id is not None else inactive_forms(db, cutoff)
+            if not candidates:
+                continue
+            for fid in sorted(locked_forms(candidates)):
+                if dry_run:
+                    log.info("would archive form %s", fid)
+                    continue
+                n = archive_form(db, fid)
+                log.info("archived form %s: %s responses", fid, n)
+                total += n
+    if not dry_run:
+        prune(sessions)
+    return total
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m app.archive", description="Archive responses of locked, inactive forms")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="archive locked forms without responses for --days")
+    r.add_argument("--days", type=float, default=ARCHIVE_INACTIVE_DAYS)
+    r.add_argument("--form", type=int, default=None, help="only this form (still must be locked)")
+    r.add_argument("--dry-run", action="store_true")
+    rs = sub.add_parser("restore", help="move an archived form back into the hot tables")
+    rs.add_argument("form_id", type=int)
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from .shards import shards
+    if args.cmd == "run":
+        print(f"archived {run(shards.sessions, args.days, args.form, args.dry_run)} responses")
+    else:
+        with shards.session_for(args.form_id) as db:
+            print(f"restored {restore(db, args.form_id)} responses")
+
+
+if __name__ == "__main__":
+    main()
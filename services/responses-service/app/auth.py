@@ -0,0 +1,187 @@
+"""
+Lokalna verifikacija JWT-a sa kešom verifikovanih tokena.
+
+Verifikovan token se pamti po SHA-256 otisku, zajedno sa claim-ovima i rokom
+važenja, pa se HMAC provera ne ponavlja za svaki zahtev istog korisnika; unos važi do `exp` tokena (najduže TOKEN_CACHE_MAX_AGE).
+
+Opozvani tokeni se proveravaju lokalno, i za tokene iz keša: lista opozvanih
+(skup jti + granica po korisniku) povlači se periodično sa auth-service
+/revocations, bez poziva auth-service po zahtevu.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+from fastapi import Header, HTTPException, status, Request
+from jose import jwt, JWTError
+from . import metrics
+from .config import (
+    JWT_SECRET, TOKEN_CACHE_SIZE, TOKEN_CACHE_MAX_AGE,
+    AUTH_API, INTERNAL_TOKEN, REVOCATION_SYNC_INTERVAL,
+)
+
+log = logging.getLogger(__name__)
+
+# claim-ovi koji su potrebni posle verifikacije (ostatak tokena se ne pamti)
+_KEPT_CLAIMS = ("sub", "uid", "iat", "jti")
+
+
+class TokenCache:
+    """Ograničen LRU: sha256(token) -> (claims, važi_do)."""
+
+    def __init__(self, maxsize: int, max_age: float):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._data: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> dict | None:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            if hit[1] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return hit[0]
+
+    def set(self, key: bytes, claims: dict):
+        if self.maxsize <= 0:
+            return
+        until = time.time() + self.max_age
+        if claims.get("exp") is not None:
+            until = min(until, float(claims["exp"]))
+        kept = {k: claims.get(k) for k in _KEPT_CLAIMS}
+        with self._lock:
+            self._data[key] = (kept, until)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_MAX_AGE)
+
+
+class RevocationList:
+    """
+    Lokalna kopija liste opozvanih tokena; provera je O(1) (skup + dict).
+    `load` zamenjuje celu kopiju jednom dodelom, pa čitaoci ne trebaju lock.
+    """
+
+    def __init__(self):
+        self._state: tuple[frozenset, dict] = (frozenset(), {})
+        self.loaded_at = 0.0
+
+    def load(self, snap: dict):
+        users = {int(k): float(v) for k, v in (snap.get("users") or {}).items()}
+        self._state = (frozenset(snap.get("jtis") or ()), users)
+        self.loaded_at = time.monotonic()
+
+    def is_revoked(self, claims: dict) -> bool:
+        jtis, users = self._state
+        if claims.get("jti") in jtis:
+            return True
+        cut = users.get(claims.get("uid"))
+        return cut is not None and (claims.get("iat") or 0) < cut
+
+
+revocations = RevocationList()
+
+
+class RevocationSync:
+    """
+    Pozadinska nit koja na svakih `interval` sekundi povuče listu sa auth-service.
+    Ako auth-service nije dostupan, ostaje poslednja kopija (tokeni ionako
+    ističu za ACCESS_TOKEN_TTL).
+    """
+
+    def __init__(self, url: str, token: str, interval: float, target: RevocationList = revocations):
+        self.url = url
+        self.headers = {"X-Internal-Token": token}
+        self.interval = interval
+        self.target = target
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sync_once(self, client: httpx.Client | None = None):
+        c = client or httpx.Client(timeout=5.0, event_hooks=metrics.httpx_hooks())
+        try:
+            r = c.get(self.url, headers=self.headers)
+            r.raise_for_status()
+            self.target.load(r.json())
+        finally:
+            if client is None:
+                c.close()
+
+    def _loop(self):
+        with httpx.Client(timeout=5.0, event_hooks=metrics.httpx_hooks()) as client:
+            while not self._stop.is_set():
+                try:
+                    self.sync_once(client)
+                except Exception as e:
+                    log.warning("revocation list not refreshed: %s", e)
+                self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="revocation-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+revocation_sync = RevocationSync(f"{AUTH_API}/revocations", INTERNAL_TOKEN, REVOCATION_SYNC_INTERVAL)
+
+
+def extract_token(request: Request, authorization: str | None) -> str | None:
+    token = authorization or request.headers.get("Authorization") or request.query_params.get("authorization")
+    if not token:
+        return None
+    token = token.strip()
+    if token.lower().startswith("bearer "): token = token.split(" ",1)[1].strip()
+    return token
+
+
+def verify_token(token: str) -> str:
+    """Vrati subjekat (email) iz validnog tokena; inače 401."""
+    key = TokenCache.digest(token)
+    claims = token_cache.get(key)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], options={"require_exp": True})
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        if not claims.get("sub"): raise HTTPException(401, "Invalid token payload")
+        token_cache.set(key, claims)
+    # opoziv se proverava i za keširane tokene (lista se menja nezavisno od keša)
+    if revocations.is_revoked(claims):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return claims["sub"]
+
+
+async def get_user_email(request: Request, authorization: str | None = Header(None)) -> str:
+    token = extract_token(request, authorization)
+    if not token: raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
+    return verify_token(token)
+
+
+async def get_optional_user_email(request: Request, authorization: str | None = Header(None)) -> str | None:
+    """Kao get_user_email, ali bez tokena vraća None (anonimni korisnik); loš token je i dalje 401."""
+    token = extract_token(request, authorization)
+    return verify_token(token) if token else None
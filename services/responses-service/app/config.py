@@ -1,5 +1,58 @@
 import os
+JWT_SECRET = os.getenv("JWT_SECRET","devsecret123")
 CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS","*").split(",")]
 DATABASE_URL = os.getenv("DATABASE_URL","sqlite:///./resp.db")
-FORMS_API = "http://forms-service:8000"
+# engine profil: small | default | large; DB_POOL_* pregaze vrednosti profila
+DB_PROFILE = os.getenv("DB_PROFILE","default")
+def _opt_int(name):
+    v = os.getenv(name)
+    return int(v) if v not in (None, "") else None
+DB_POOL_SIZE = _opt_int("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = _opt_int("DB_MAX_OVERFLOW")
+DB_POOL_RECYCLE = _opt_int("DB_POOL_RECYCLE")
+DB_POOL_TIMEOUT = _opt_int("DB_POOL_TIMEOUT")
+# pre-ping: auto (samo mrežne baze) | always | never
+DB_PRE_PING = os.getenv("DB_PRE_PING","auto").lower()
+# SQLite pragme (WAL se uvek uključuje za fajl bazu)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS","NORMAL").upper()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS","5000"))
+# šema: python -m app.migrations pre servera; 1 = migracije i u startup hook-u (dev)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP","0").lower() in ("1","true","yes")
+# replike za čitanje (lista URL-ova, prazno = sve na primarnu)
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS","").split(",") if u.strip()]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS","5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS","5"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL","2"))
+# shard baze za responses/answers po form_id (prazno = sve u DATABASE_URL);
+# DATABASE_URL tada drži mapu form_id -> shard i purge poslove
+RESPONSE_SHARD_URLS = [u.strip() for u in os.getenv("RESPONSE_SHARD_URLS","").split(",") if u.strip()]
+SHARD_MAP_TTL = float(os.getenv("SHARD_MAP_TTL","10"))
+SHARD_MOVE_BATCH = int(os.getenv("SHARD_MOVE_BATCH","500"))
+# arhiva odgovora zaključanih, neaktivnih formi (gzip JSON po kolonama)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR","./archive")
+ARCHIVE_INACTIVE_DAYS = float(os.getenv("ARCHIVE_INACTIVE_DAYS","365"))
+# keš dekodiranih arhiva po procesu: najviše N arhiva i M odgovora ukupno (~200 B po odgovoru,
+# podrazumevano do ~100 MB); veće arhive se čitaju iz fajla pri svakom zahtevu
+ARCHIVE_CACHE_SIZE = int(os.getenv("ARCHIVE_CACHE_SIZE","8"))
+ARCHIVE_CACHE_MAX_ANSWERS = int(os.getenv("ARCHIVE_CACHE_MAX_ANSWERS","500000"))
+FORMS_API = os.getenv("FORMS_API","http://forms-service:8000")
+# deljeni tajni ključ za pozive između servisa (npr. forms-service -> purge)
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN","devinternal123")
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE","500"))
+PURGE_PAUSE = float(os.getenv("PURGE_PAUSE","0.05"))
 
+# keš meta podataka forme; događaji iz forms-service ga precizno poništavaju
+META_CACHE_TTL = float(os.getenv("META_CACHE_TTL","60"))
+SCHEMA_CACHE_SIZE = int(os.getenv("SCHEMA_CACHE_SIZE","10000"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE","10000"))
+TOKEN_CACHE_MAX_AGE = float(os.getenv("TOKEN_CACHE_MAX_AGE","300"))
+# lista opozvanih tokena se povlači sa auth-service (0 = isključeno)
+AUTH_API = os.getenv("AUTH_API","http://auth-service:8000")
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL","10"))
+# profiler SQL upita po zahtevu (zaglavlja X-DB-*, log sporih upita i N+1)
+SQL_PROFILE = os.getenv("SQL_PROFILE","0").lower() in ("1","true","yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS","200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD","5"))
+# brzi JSON za velike liste: bez ponovne validacije kroz response_model, bajtove pravi orjson
+FAST_JSON = os.getenv("FAST_JSON","0").lower() in ("1","true","yes")
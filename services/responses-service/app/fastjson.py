@@ -0,0 +1,45 @@
+"""
+Brza JSON serijalizacija za velike liste (FAST_JSON=1).
+
+Endpoint koji vrati `Response` preskače response_model: nema ponovne
+pydantic validacije po redu ni jsonable_encoder-a, a bajtove pravi orjson.
+Endpoint-i sami grade dict-ove istog oblika kao njihov response_model, pa
+je odgovor isti u oba režima. Bez orjson-a (nije instaliran) koristi se
+standardni json.
+"""
+import json
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson je u requirements, ali modul radi i bez njega
+    orjson = None
+
+
+# NaN/Infinity nisu JSON; orjson ih odbija, standardni json ih inače prima
+def _no_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
+
+_strict = json.JSONDecoder(parse_constant=_no_constant)
+
+
+def loads(text: str | bytes):
+    """Strogi JSON decode (ValueError za neispravan tekst), orjson kada je instaliran."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return _strict.decode(text.decode("utf-8") if isinstance(text, (bytes, bytearray)) else text)
+
+
+def dumps(obj) -> bytes:
+    """Kao JSONResponse: UTF-8, ne-string ključevi postaju stringovi ("1", "true", "null")."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def response(body, status_code: int = 200) -> Response:
+    """Gotovi JSON bajtovi (ili objekat za dumps) kao odgovor."""
+    if not isinstance(body, (bytes, bytearray)):
+        body = dumps(body)
+    return Response(content=bytes(body), status_code=status_code, media_type="application/json")
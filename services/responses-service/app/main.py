@@ -1,19 +1,32 @@
+import time
+_IMPORT_T0 = time.perf_counter()  # trajanje importa aplikacije (app_startup_seconds{phase="import"})
+
+import logging
 import json
 import io
+import threading
 import traceback
+from itertools import chain
 import httpx
 
-from fastapi import FastAPI, Depends, HTTPException, Header, status
+from fastapi import FastAPI, Depends, HTTPException, Header, status, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import select
 from starlette.responses import StreamingResponse
 
-from .config import CORS_ORIGINS, FORMS_API
-from .db import Base, engine, SessionLocal
-from .models import Response, Answer
-from .schemas import SubmitIn, ResponseOut
-import openpyxl
+from .config import CORS_ORIGINS, FORMS_API, INTERNAL_TOKEN, META_CACHE_TTL, SQL_PROFILE, MIGRATE_ON_STARTUP, FAST_JSON
+from .db import engine, SessionLocal
+from .migrations import migrate
+from .models import Response, Answer, PurgeJob
+from .schemas import SubmitIn, ResponseOut, PurgeJobOut, FormEvent
+from .purge import schedule_purge, run_purge_job, resume_pending_purges
+from .auth import extract_token, verify_token, revocation_sync
+from .schema_store import capture_schema, question_catalog, forget as forget_schema
+from . import archive, fastjson, metrics, profiling
+from .replicas import read_router, ReadYourWritesMiddleware
+from .shards import shards, get_form_db, ShardMoving, shard_unavailable
 from httpx import RequestError
 
 # ------------------------------------------------------
@@ -40,8 +53,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# DB
-Base.metadata.create_all(bind=engine)
+app.add_middleware(ReadYourWritesMiddleware, router=read_router)
+app.add_middleware(metrics.MetricsMiddleware)
+for _eng in [engine, *read_router.engines, *(shards.engines if shards.sharded else [])]:
+    metrics.instrument_engine(_eng)
+    profiling.install(_eng)
+if SQL_PROFILE:
+    app.add_middleware(profiling.QueryProfilerMiddleware)
+
+_startup_t0 = [0.0]
+
+@app.on_event("startup")
+def _begin_startup():
+    _startup_t0[0] = time.perf_counter()
+    # šema se pravi van importa (python -m app.migrations pre servera); MIGRATE_ON_STARTUP=1 za lokalni razvoj
+    if MIGRATE_ON_STARTUP:
+        migrate()
+
+@app.on_event("startup")
+def _resume_purges():
+    # nedovršena brisanja (npr. posle restarta) nastavljamo u pozadini
+    threading.Thread(target=resume_pending_purges, daemon=True).start()
+
+@app.on_event("startup")
+def _start_revocation_sync():
+    revocation_sync.start()
+
+@app.on_event("shutdown")
+def _stop_revocation_sync():
+    revocation_sync.stop()
 
 def get_db():
     db = SessionLocal()
@@ -57,19 +97,53 @@ def get_db():
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # ------------------------------------------------------
 # Helpers
 # ------------------------------------------------------
+def require_internal(x_internal_token: str | None = Header(None)):
+    """Zaštita za pozive između servisa."""
+    if x_internal_token != INTERNAL_TOKEN:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Internal endpoint")
+
+# form_id -> (ističe, meta); poništava se događajima iz forms-service (/events)
+_meta_cache: dict[int, tuple[float, dict]] = {}
+
+def invalidate_form_meta(form_id: int):
+    _meta_cache.pop(form_id, None)
+
+async def _form_status(cx, form_id: int) -> dict | None:
+    """Zaključanost i verzija forme (jedan upit po PK u forms-service); None ako nije dostupno."""
+    r = await cx.get(f"{FORMS_API}/internal/forms/status", params={"ids": form_id},
+                     headers={"X-Internal-Token": INTERNAL_TOKEN})
+    if r.status_code != 200:
+        return None
+    rows = r.json()
+    return rows[0] if rows else None
+
 async def fetch_form_meta(form_id: int) -> dict:
     """
     Pokušaj /forms/{id}/meta; ako nije 200, fallback na /forms/{id}.
     Vraća JSON sa poljima: is_locked, allow_anonymous, questions, ...
+    Uspešan odgovor se kešira META_CACHE_TTL sekundi, ali se keširana meta
+    koristi samo ako forms-service potvrdi da je forma i dalje otključana i
+    iste verzije: odluku o zaključavanju keš nikad ne donosi sam, pa važi
+    odmah u svim worker-ima i replikama, i bez događaja sa /events.
     """
+    hit = _meta_cache.get(form_id)
+
     url1 = f"{FORMS_API}/forms/{form_id}/meta"
     url2 = f"{FORMS_API}/forms/{form_id}"
 
     try:
-        async with httpx.AsyncClient(timeout=5.0) as cx:
+        async with httpx.AsyncClient(timeout=5.0, event_hooks=metrics.async_httpx_hooks()) as cx:
+            if hit and hit[0] > time.monotonic():
+                st = await _form_status(cx, form_id)
+                if st and not st["is_locked"] and st.get("version") == hit[1].get("version"):
+                    return hit[1]
             r = await cx.get(url1)
             if r.status_code != 200:
                 r = await cx.get(url2)
@@ -79,7 +153,12 @@ async def fetch_form_meta(form_id: int) -> dict:
     if r.status_code != 200:
         raise HTTPException(status_code=r.status_code, detail=(r.text or "Forms meta not available"))
 
-    return r.json()
+    meta = r.json()
+    if META_CACHE_TTL > 0 and not meta.get("is_locked"):
+        _meta_cache[form_id] = (time.monotonic() + META_CACHE_TTL, meta)
+    else:
+        invalidate_form_meta(form_id)
+    return meta
 
 def get_choices(oj: dict | None) -> list:
     """Vrati listu izbora iz options_json (podržava 'choices' i 'options')."""
@@ -104,14 +183,84 @@ def _safe_decode(val):
         return ", ".join(str(x) for x in v)
     return v
 
+def validate_answers(answers, qmap: dict[int, dict]):
+    """Proveri odgovore prema pitanjima forme; prvi nevalidan odgovor -> 422."""
+    for a in answers:
+        q = qmap.get(a.question_id)
+        if not q:
+            raise HTTPException(422, detail=f"Unknown question {a.question_id}")
+
+        v = a.value
+        t = q.get("type")
+        oj = q.get("options_json") or {}
+
+        if t == "short_text":
+            if not isinstance(v, str) or len(v) > 512:
+                raise HTTPException(422, detail="short_text max 512 chars")
+
+        elif t == "long_text":
+            if not isinstance(v, str) or len(v) > 4096:
+                raise HTTPException(422, detail="long_text max 4096 chars")
+
+        elif t == "single_choice":
+            choices = get_choices(oj)
+            if v not in choices:
+                raise HTTPException(422, detail="single_choice invalid option")
+
+        elif t == "multi_choice":
+            choices = get_choices(oj)
+            reqc = oj.get("required_count")
+            if not isinstance(v, list) or any(x not in choices for x in v):
+                raise HTTPException(422, detail="multi_choice expects list of valid options")
+            if isinstance(reqc, int) and len(v) < reqc:
+                raise HTTPException(422, detail=f"multi_choice requires at least {reqc} selections")
+
+        elif t == "numeric":
+            if "list" in oj and isinstance(oj["list"], list):
+                if v not in oj["list"]:
+                    raise HTTPException(422, detail="numeric value not in list")
+            elif "range" in oj and isinstance(oj["range"], dict):
+                st = int(oj["range"].get("start", 0))
+                en = int(oj["range"].get("end", 0))
+                step = int(oj["range"].get("step", 1) or 1)
+                try:
+                    val = int(v)
+                except Exception:
+                    raise HTTPException(422, detail="numeric expects integer")
+                ok = False
+                cur = st
+                if step == 0:
+                    step = 1
+                while (step > 0 and cur <= en) or (step < 0 and cur >= en):
+                    if val == cur:
+                        ok = True
+                        break
+                    cur += step
+                if not ok:
+                    raise HTTPException(422, detail="numeric value not in range/step")
+            else:
+                # fallback: dozvoli broj
+                try:
+                    int(v)
+                except Exception:
+                    raise HTTPException(422, detail="numeric expects integer")
+
+        elif t in ("date", "time"):
+            if v in (None, ""):
+                raise HTTPException(422, detail=f"{t} required value")
+
+        # required check
+        if q.get("required") and (v is None or v == "" or v == []):
+            raise HTTPException(422, detail=f"Question {q['id']} is required")
+
 # ------------------------------------------------------
 # Submit
 # ------------------------------------------------------
 @app.post("/submit", response_model=ResponseOut, status_code=201)
 async def submit(
     body: SubmitIn,
+    request: Request,
     authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
 ):
     try:
         # 1) meta (lock/anonymous i pitanja)
@@ -124,8 +273,10 @@ async def submit(
             raise HTTPException(status.HTTP_423_LOCKED, detail="Form is locked")
 
         if not allow_anonymous:
-            if not authorization or not authorization.lower().startswith("bearer "):
+            token = extract_token(request, authorization)
+            if not token:
                 raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Login required")
+            verify_token(token)  # potpis i rok važenja, lokalno i keširano
 
         # 2) mapa pitanja
         try:
@@ -134,88 +285,29 @@ async def submit(
             raise HTTPException(422, detail="Malformed form meta: questions list")
 
         # 3) validacija odgovora
-        for a in body.answers:
-            q = qmap.get(a.question_id)
-            if not q:
-                raise HTTPException(422, detail=f"Unknown question {a.question_id}")
-
-            v = a.value
-            t = q.get("type")
-            oj = q.get("options_json") or {}
-
-            if t == "short_text":
-                if not isinstance(v, str) or len(v) > 512:
-                    raise HTTPException(422, detail="short_text max 512 chars")
-
-            elif t == "long_text":
-                if not isinstance(v, str) or len(v) > 4096:
-                    raise HTTPException(422, detail="long_text max 4096 chars")
-
-            elif t == "single_choice":
-                choices = get_choices(oj)
-                if v not in choices:
-                    raise HTTPException(422, detail="single_choice invalid option")
-
-            elif t == "multi_choice":
-                choices = get_choices(oj)
-                reqc = oj.get("required_count")
-                if not isinstance(v, list) or any(x not in choices for x in v):
-                    raise HTTPException(422, detail="multi_choice expects list of valid options")
-                if isinstance(reqc, int) and len(v) < reqc:
-                    raise HTTPException(422, detail=f"multi_choice requires at least {reqc} selections")
-
-            elif t == "numeric":
-                if "list" in oj and isinstance(oj["list"], list):
-                    if v not in oj["list"]:
-                        raise HTTPException(422, detail="numeric value not in list")
-                elif "range" in oj and isinstance(oj["range"], dict):
-                    st = int(oj["range"].get("start", 0))
-                    en = int(oj["range"].get("end", 0))
-                    step = int(oj["range"].get("step", 1) or 1)
-                    try:
-                        val = int(v)
-                    except Exception:
-                        raise HTTPException(422, detail="numeric expects integer")
-                    ok = False
-                    cur = st
-                    if step == 0:
-                        step = 1
-                    while (step > 0 and cur <= en) or (step < 0 and cur >= en):
-                        if val == cur:
-                            ok = True
-                            break
-                        cur += step
-                    if not ok:
-                        raise HTTPException(422, detail="numeric value not in range/step")
-                else:
-                    # fallback: dozvoli broj
-                    try:
-                        int(v)
-                    except Exception:
-                        raise HTTPException(422, detail="numeric expects integer")
-
-            elif t in ("date", "time"):
-                if v in (None, ""):
-                    raise HTTPException(422, detail=f"{t} required value")
-
-            # required check
-            if q.get("required") and (v is None or v == "" or v == []):
-                raise HTTPException(422, detail=f"Question {q['id']} is required")
-
-        # 4) upis u bazu
-        r = Response(form_id=body.form_id)
-        db.add(r)
-        db.flush()
-        for a in body.answers:
-            db.add(Answer(response_id=r.id, question_id=a.question_id, value=json.dumps(a.value)))
-        db.commit()
-        db.refresh(r)
-
-        return ResponseOut(
-            id=r.id,
-            form_id=r.form_id,
-            answers=[{"question_id": a.question_id, "value": json.loads(a.value)} for a in r.answers],
-        )
+        validate_answers(body.answers, qmap)
+
+        # 4) upis na shard forme (uz lokalnu kopiju šeme te verzije forme)
+        try:
+            shard = shards.assign(body.form_id)
+        except ShardMoving as e:
+            raise shard_unavailable(e)
+        with shards.session(shard) as db:
+            form_version = capture_schema(db, meta)
+            r = Response(form_id=body.form_id, form_version=form_version)
+            db.add(r)
+            db.flush()
+            for a in body.answers:
+                db.add(Answer(response_id=r.id, question_id=a.question_id, value=json.dumps(a.value)))
+            response_id = r.id  # posle commit-a bi pristup r.id ponovo učitao red
+            db.commit()
+
+            # odgovor iz već validiranog tela (bez refresh-a i ponovnog json.loads iz baze)
+            return ResponseOut(
+                id=response_id,
+                form_id=body.form_id,
+                answers=[{"question_id": a.question_id, "value": a.value} for a in body.answers],
+            )
 
     except HTTPException:
         raise
@@ -227,47 +319,124 @@ async def submit(
 # Pregled odgovora / agregacije / export
 # ------------------------------------------------------
 @app.get("/forms/{form_id}/responses", response_model=list[ResponseOut])
-def list_responses(form_id: int, db: Session = Depends(get_db)):
-    rs = db.execute(select(Response).where(Response.form_id == form_id)).scalars().all()
-    out = []
-    for r in rs:
-        out.append({
-            "id": r.id,
-            "form_id": r.form_id,
-            "answers": [{"question_id": a.question_id, "value": json.loads(a.value)} for a in r.answers],
-        })
-    return out
+def list_responses(form_id: int, db: Session = Depends(get_form_db)):
+    rs = db.execute(
+        select(Response).where(Response.form_id == form_id).options(selectinload(Response.answers))
+    ).scalars().all()
+    rs = _with_archive(db, form_id, rs)
+    if FAST_JSON:
+        return fastjson.response(responses_json(rs))
+    return response_dicts(rs)
+
+def _decode(val):
+    """Sačuvana vrednost odgovora; NULL ostaje None, a stari ne-JSON tekst se vraća kakav jeste."""
+    if val is None:
+        return None
+    try:
+        return fastjson.loads(val)
+    except ValueError:
+        return val
+
+def response_dicts(rs) -> list[dict]:
+    return [{
+        "id": r.id,
+        "form_id": r.form_id,
+        "answers": [{"question_id": a.question_id, "value": _decode(a.value)} for a in r.answers],
+    } for r in rs]
+
+def responses_json(rs) -> bytes:
+    """
+    Isto što i response_dicts kroz list[ResponseOut], ali direktno u bajtove:
+    dict-ovi su već oblika ResponseOut, pa se preskače pydantic validacija po
+    odgovoru, a serijalizuje ih fastjson (orjson).
+    """
+    return fastjson.dumps(response_dicts(rs))
 
-@app.get("/forms/{form_id}/aggregate")
-def aggregate(form_id: int, db: Session = Depends(get_db)):
-    rs = db.execute(select(Response).where(Response.form_id == form_id)).scalars().all()
+def _with_archive(db: Session, form_id: int, rs: list) -> list:
+    """
+    Arhivirani odgovori forme + vrući sa id većim od arhiviranih. Registar se
+    čita posle vrućih redova: arhiviranje u toku tada ne daje ni duplikate ni rupe.
+    """
+    arch = archive.lookup(db, form_id)
+    if arch is None:
+        return rs
+    return arch.responses() + [r for r in rs if r.id > arch.max_response_id]
+
+def count_answers(rows) -> dict[int, dict]:
+    """(question_id, JSON vrednost) -> {question_id: {vrednost: broj}}; liste se broje po elementu."""
     agg: dict[int, dict] = {}
-    for r in rs:
-        for a in r.answers:
-            try:
-                val = json.loads(a.value)
-            except Exception:
-                val = a.value
-            bucket = agg.setdefault(a.question_id, {})
-            if isinstance(val, list):
-                for v in val:
-                    bucket[v] = bucket.get(v, 0) + 1
-            else:
-                bucket[val] = bucket.get(val, 0) + 1
+    for question_id, value in rows:
+        try:
+            val = json.loads(value)
+        except Exception:
+            val = value
+        bucket = agg.setdefault(question_id, {})
+        if isinstance(val, list):
+            for v in val:
+                bucket[v] = bucket.get(v, 0) + 1
+        else:
+            bucket[val] = bucket.get(val, 0) + 1
     return agg
-@app.get("/forms/{form_id}/export")
-def export_xlsx(form_id: int, db: Session = Depends(get_db)):
-    rs = db.execute(select(Response).where(Response.form_id == form_id)).scalars().all()
-
-    import openpyxl
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"form_{form_id}"
 
-    qids = sorted({a.question_id for r in rs for a in r.answers})
-    ws.append(["response_id"] + [f"q{qid}" for qid in qids])
+@app.get("/forms/{form_id}/aggregate")
+def aggregate(form_id: int, detailed: bool = False, db: Session = Depends(get_form_db)):
+    """
+    Broj odgovora po vrednosti za svako pitanje: {question_id: {vrednost: broj}}.
+    Sa ?detailed=true vraća i tekst/tip pitanja iz lokalne šeme, a za numerička
+    pitanja i min/max/prosek.
+    """
+    # samo (question_id, value) svih odgovora forme, jednim upitom i bez ORM objekata
+    rows = db.execute(
+        select(Answer.question_id, Answer.value, Answer.response_id)
+        .join(Response, Answer.response_id == Response.id)
+        .where(Response.form_id == form_id)
+    ).all()
+    arch = archive.lookup(db, form_id)
+    hot_after = arch.max_response_id if arch else 0
+    agg = count_answers(chain(
+        arch.answer_rows() if arch else (),
+        ((qid, value) for qid, value, rid in rows if rid > hot_after),
+    ))
+    if not detailed:
+        return fastjson.response(agg) if FAST_JSON else agg
+
+    catalog = question_catalog(db, form_id)
+    out = {}
+    for qid, counts in agg.items():
+        q = catalog.get(qid) or {}
+        item = {"text": q.get("text"), "type": q.get("type"), "counts": counts}
+        if q.get("type") == "numeric":
+            nums = [(float(v), n) for v, n in counts.items() if _is_number(v)]
+            total = sum(n for _, n in nums)
+            if total:
+                item["min"] = min(v for v, _ in nums)
+                item["max"] = max(v for v, _ in nums)
+                item["avg"] = sum(v * n for v, n in nums) / total
+        out[qid] = item
+    return out
 
+def _is_number(v) -> bool:
+    if isinstance(v, bool):
+        return False
+    try:
+        float(v)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+def _column_titles(qids: list[int], catalog: dict[int, dict]) -> list[str]:
+    """Naslovi kolona iz lokalne šeme; nepoznata pitanja ostaju q{id}, duplikati dobijaju sufiks."""
+    titles, seen = [], set()
+    for qid in qids:
+        t = (catalog.get(qid) or {}).get("text") or f"q{qid}"
+        if t in seen:
+            t = f"{t} (q{qid})"
+        seen.add(t)
+        titles.append(t)
+    return titles
+
+def export_rows(rs, qids: list[int]):
+    """Redovi tabele za export: [response_id, vrednost po koloni...]."""
     for r in rs:
         amap = {a.question_id: a for a in r.answers}
         row = [r.id]
@@ -276,6 +445,27 @@ def export_xlsx(form_id: int, db: Session = Depends(get_db)):
                 row.append("")
             else:
                 row.append(_safe_decode(amap[qid].value))
+        yield row
+
+@app.get("/forms/{form_id}/export")
+def export_xlsx(form_id: int, db: Session = Depends(get_form_db)):
+    rs = db.execute(
+        select(Response).where(Response.form_id == form_id).options(selectinload(Response.answers))
+    ).scalars().all()
+    rs = _with_archive(db, form_id, rs)
+
+    import openpyxl  # lenjo: import traje ~100 ms, a treba samo export-u
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = f"form_{form_id}"
+
+    catalog = question_catalog(db, form_id)
+    qids = sorted({a.question_id for r in rs for a in r.answers},
+                  key=lambda q: ((catalog.get(q) or {}).get("order_index", float("inf")), q))
+    ws.append(["response_id"] + _column_titles(qids, catalog))
+
+    for row in export_rows(rs, qids):
         ws.append(row)
 
     buf = io.BytesIO()
@@ -285,4 +475,58 @@ def export_xlsx(form_id: int, db: Session = Depends(get_db)):
         buf,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename=form_{form_id}_responses.xlsx"},
-    )
\ No newline at end of file
+    )
+
+# ------------------------------------------------------
+# Događaji iz forms-service (outbox relay)
+# ------------------------------------------------------
+@app.post("/events", status_code=204)
+def receive_event(
+    ev: FormEvent,
+    background: BackgroundTasks,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_internal),
+):
+    # svaka promena forme poništava keširanu metu
+    invalidate_form_meta(ev.form_id)
+    if ev.type == "form_deleted":
+        forget_schema(ev.form_id)
+        job = schedule_purge(db, ev.form_id)
+        if job.status == "pending":
+            background.add_task(run_purge_job, job.id)
+    return None
+
+# ------------------------------------------------------
+# Brisanje odgovora obrisane forme
+# ------------------------------------------------------
+@app.delete("/forms/{form_id}/responses", response_model=PurgeJobOut, status_code=202)
+def purge_form_responses(
+    form_id: int,
+    background: BackgroundTasks,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_internal),
+):
+    job = schedule_purge(db, form_id)
+    if job.status == "pending":
+        background.add_task(run_purge_job, job.id)
+    return job
+
+@app.get("/purge-jobs/{job_id}", response_model=PurgeJobOut)
+def purge_job_status(job_id: int, db: Session = Depends(get_db), _: None = Depends(require_internal)):
+    job = db.get(PurgeJob, job_id)
+    if not job:
+        raise HTTPException(404, detail="Not found")
+    return job
+
+# -----------------------
+# Vreme pokretanja (poslednji startup hook)
+# -----------------------
+metrics.startup_seconds.set(time.perf_counter() - _IMPORT_T0, "import")
+
+@app.on_event("startup")
+def _startup_done():
+    took = time.perf_counter() - _startup_t0[0]
+    metrics.startup_seconds.set(took, "startup")
+    logging.getLogger(__name__).info(
+        "ready: import %.0f ms, startup %.0f ms",
+        metrics.startup_seconds.value("import") * 1000, took * 1000)
@@ -0,0 +1,268 @@
+"""
+Metrike u Prometheus text formatu (/metrics), bez dodatnih zavisnosti.
+
+Beleži se:
+  - po ruti (šablon putanje, ne konkretan URL): broj zahteva, histogram
+    trajanja i broj zahteva u toku,
+  - upiti ka bazi preko SQLAlchemy engine događaja (broj i trajanje po tipu),
+  - odlazni httpx pozivi preko event hook-ova (trajanje do odgovora po hostu).
+
+Metrike su po procesu; sa više uvicorn worker-a Prometheus skuplja svaki
+posebno. Na vrućoj putanji je samo perf_counter, bisect i jedan lock.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{n}="{esc(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _fmt(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *a, **k):
+        super().__init__(*a, **k)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *a, **k):
+        super().__init__(*a, **k)
+        self._values: dict[tuple, float] = {}
+        self._fn: Callable[[], float] | None = None
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, fn: Callable[[], float]):
+        """Vrednost se čita tek pri /metrics (npr. veličina reda u pool-u)."""
+        self._fn = fn
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        if self._fn is not None:
+            return self.header() + [f"{self.name} {_fmt(self._fn() or 0)}"]
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = HTTP_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [brojači po bucket-u (+Inf na kraju), suma, broj]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            st = self._values.get(labels)
+            if st is None:
+                st = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            st[0][i] += 1
+            st[1] += value
+            st[2] += 1
+
+    def count(self, *labels) -> int:
+        st = self._values.get(labels)
+        return st[2] if st else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        out = self.header()
+        names = self.labelnames + ("le",)
+        for k, (counts, total, n) in items:
+            acc = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                out.append(f"{self.name}_bucket{_labels(names, k + (_fmt(bound),))} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {n}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, m):
+        self._metrics.append(m)
+        return m
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"))
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed", ("operation",)))
+db_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",), buckets=DB_BUCKETS))
+client_requests = registry.register(Counter(
+    "http_client_requests_total", "Outbound HTTP calls", ("host", "status")))
+client_duration = registry.register(Histogram(
+    "http_client_duration_seconds", "Outbound HTTP call time until response headers", ("host",)))
+startup_seconds = registry.register(Gauge(
+    "app_startup_seconds", "Time to import the app and to run its startup hooks", ("phase",)))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -----------------------
+# HTTP (ASGI middleware)
+# -----------------------
+class MetricsMiddleware:
+    """Čist ASGI middleware (bez BaseHTTPMiddleware), da ne dodaje task po zahtevu."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            http_in_flight.dec()
+            # šablon rute (/forms/{form_id}) drži broj serija malim; nepoznate putanje u jednu
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            http_duration.observe(elapsed, method, route)
+            http_requests.inc(method, route, str(status[0]))
+
+
+# -----------------------
+# Baza (SQLAlchemy događaji)
+# -----------------------
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return word if word in ("select", "insert", "update", "delete") else "other"
+
+
+def instrument_engine(engine: Engine):
+    # početak se čuva na execution context-u naredbe: after_cursor_execute ne stiže
+    # kada naredba pukne, pa bi stek na konekciji rastao sa svakom greškom
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_t0 = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_metrics_t0", None)
+        if t0 is None:
+            return
+        op = _operation(statement)
+        db_duration.observe(time.perf_counter() - t0, op)
+        db_queries.inc(op)
+
+
+# -----------------------
+# Odlazni pozivi (httpx event hooks)
+# -----------------------
+def _on_request(request):
+    request.extensions["metrics_t0"] = time.perf_counter()
+
+
+def _on_response(response):
+    t0 = response.request.extensions.get("metrics_t0")
+    host = response.request.url.host or ""
+    if t0 is not None:
+        client_duration.observe(time.perf_counter() - t0, host)
+    client_requests.inc(host, str(response.status_code))
+
+
+async def _on_request_async(request):
+    _on_request(request)
+
+
+async def _on_response_async(response):
+    _on_response(response)
+
+
+def httpx_hooks() -> dict:
+    """event_hooks za httpx.Client."""
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+def async_httpx_hooks() -> dict:
+    """event_hooks za httpx.AsyncClient."""
+    return {"request": [_on_request_async], "response": [_on_response_async]}
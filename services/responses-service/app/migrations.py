@@ -0,0 +1,121 @@
+"""
+Verzionisane migracije šeme za postojeće baze.
+
+`create_all` pravi samo tabele koje ne postoje, pa izmene na postojećim
+tabelama (indeksi, kolone) idu ovde. Svaka migracija mora biti idempotentna
+jer na svežoj bazi `create_all` već napravi krajnje stanje.
+"""
+import logging
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, select, insert, func, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from .db import Base, engine
+from .models import Response, Answer
+
+_meta = MetaData()
+_LOCK_KEY = 7497075  # pg advisory lock za migracije ovog servisa
+schema_version = Table("schema_version", _meta, Column("version", Integer, primary_key=True))
+
+
+def _create_indexes(conn: Connection, table):
+    for ix in table.indexes:
+        ix.create(bind=conn, checkfirst=True)
+
+
+def _add_column(conn: Connection, table, ddl: str):
+    name = ddl.split()[0]
+    if name not in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def _0001_answer_response_index(conn: Connection):
+    _create_indexes(conn, Answer.__table__)
+
+
+def _0002_response_form_version(conn: Connection):
+    _add_column(conn, Response.__table__, "form_version INTEGER")
+
+
+def _0003_response_submitted_at(conn: Connection):
+    _add_column(conn, Response.__table__, "submitted_at TIMESTAMP")
+
+
+def _0004_response_ids_never_reused(conn: Connection):
+    # SQLite bez AUTOINCREMENT ponovo daje ID-jeve obrisanih (arhiviranih) odgovora, a arhiva
+    # sakriva vruće redove sa id <= max_response_id; postojeća tabela se zato prepravlja
+    if conn.dialect.name != "sqlite":
+        return  # Postgres sekvence ne vraćaju ID-jeve
+    table = Response.__table__
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'responses'")).scalar()
+    if "AUTOINCREMENT" not in (ddl or "").upper():
+        cols = ", ".join(c.name for c in table.columns)
+        create = str(CreateTable(table).compile(dialect=conn.dialect))
+        conn.execute(text(create.replace("CREATE TABLE responses ", "CREATE TABLE responses_new ", 1)))
+        conn.execute(text(f"INSERT INTO responses_new ({cols}) SELECT {cols} FROM responses"))
+        conn.execute(text("DROP TABLE responses"))
+        conn.execute(text("ALTER TABLE responses_new RENAME TO responses"))
+        _create_indexes(conn, table)
+    # sledeći ID mora biti veći i od svih već arhiviranih
+    top = conn.execute(text("SELECT MAX(id) FROM responses")).scalar() or 0
+    if inspect(conn).has_table("archived_forms"):
+        top = max(top, conn.execute(text("SELECT MAX(max_response_id) FROM archived_forms")).scalar() or 0)
+    seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'responses'")).scalar()
+    if seq is None and top:
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('responses', :top)"), {"top": top})
+    elif seq is not None and seq < top:
+        conn.execute(text("UPDATE sqlite_sequence SET seq = :top WHERE name = 'responses'"), {"top": top})
+
+
+def _0005_backfill_submitted_at(conn: Connection):
+    # stari redovi nemaju vreme slanja; bez ovoga bi svaka zaključana stara forma odmah bila
+    # "neaktivna" i arhivirana, pa se neaktivnost za njih računa od migracije
+    conn.execute(text("UPDATE responses SET submitted_at = CURRENT_TIMESTAMP WHERE submitted_at IS NULL"))
+
+
+MIGRATIONS = [
+    (1, _0001_answer_response_index),
+    (2, _0002_response_form_version),
+    (3, _0003_response_submitted_at),
+    (4, _0004_response_ids_never_reused),
+    (5, _0005_backfill_submitted_at),
+]
+
+
+def run_migrations(engine: Engine):
+    _meta.create_all(bind=engine)
+    with engine.begin() as conn:
+        current = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        for version, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            fn(conn)
+            conn.execute(insert(schema_version).values(version=version))
+
+
+def migrate(bind: Engine = engine):
+    """
+    Cela šema (create_all + verzionisane migracije). Pokreće se pre servera,
+    `python -m app.migrations`, a ne pri importu aplikacije. Na Postgres-u
+    advisory lock sprečava da više replika migrira istovremeno.
+    """
+    with bind.connect() as lock:
+        if bind.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_KEY})
+        try:
+            Base.metadata.create_all(bind=bind)
+            run_migrations(bind)
+            from .shards import shards
+            shards.create_schema(run_migrations)
+        finally:
+            if bind.dialect.name == "postgresql":
+                lock.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    t0 = time.perf_counter()
+    migrate()
+    logging.getLogger(__name__).info("schema up to date (%.0f ms)", (time.perf_counter() - t0) * 1000)
@@ -1,17 +1,66 @@
-from sqlalchemy import Integer, String, ForeignKey, Text
+from datetime import datetime
+
+from sqlalchemy import Integer, String, ForeignKey, Text, DateTime, JSON, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 
 class Response(Base):
     __tablename__ = "responses"
+    # ID se ne sme ponovo iskoristiti posle brisanja (arhiva razlikuje vruće redove po id > max arhiviranog);
+    # Postgres sekvence to već garantuju, SQLite tek sa AUTOINCREMENT
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     form_id: Mapped[int] = mapped_column(Integer, index=True)
+    # verzija forme u trenutku slanja -> FormSchema(form_id, form_version)
+    form_version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # default na insert-u (ne server_default): kolona je dodata migracijom i na postojeće tabele
+    submitted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=func.now())
     answers: Mapped[list["Answer"]] = relationship(back_populates="response", cascade="all, delete-orphan")
 
 class Answer(Base):
     __tablename__ = "answers"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    response_id: Mapped[int] = mapped_column(ForeignKey("responses.id"))
+    response_id: Mapped[int] = mapped_column(ForeignKey("responses.id"), index=True)
     question_id: Mapped[int] = mapped_column(Integer, index=True)
     value: Mapped[str] = mapped_column(Text)
     response: Mapped["Response"] = relationship(back_populates="answers")
+
+class FormSchema(Base):
+    """Pitanja forme onakva kakva su bila u datoj verziji forme."""
+    __tablename__ = "form_schemas"
+    form_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    questions: Mapped[list] = mapped_column(JSON)
+    captured_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+class PurgeJob(Base):
+    """Brisanje odgovora obrisane forme, u delovima (status: pending/running/done/failed)."""
+    __tablename__ = "purge_jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    form_id: Mapped[int] = mapped_column(Integer, index=True)
+    status: Mapped[str] = mapped_column(String(16), default="pending", index=True)
+    deleted_responses: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+class FormShard(Base):
+    """Koja shard baza drži odgovore forme (samo u direktorijumu, DATABASE_URL)."""
+    __tablename__ = "form_shards"
+    form_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, index=True)
+    # active | moving (rebalance u toku: čitanja sa `shard`, upisi čekaju)
+    state: Mapped[str] = mapped_column(String(16), default="active")
+    target: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class ArchivedForm(Base):
+    """Odgovori forme premešteni iz responses/answers u arhivski fajl (ARCHIVE_DIR)."""
+    __tablename__ = "archived_forms"
+    form_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    path: Mapped[str] = mapped_column(String(255))
+    # u arhivi su svi odgovori forme sa id <= max_response_id; noviji su u vrućim tabelama
+    max_response_id: Mapped[int] = mapped_column(Integer)
+    responses: Mapped[int] = mapped_column(Integer, default=0)
+    answers: Mapped[int] = mapped_column(Integer, default=0)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
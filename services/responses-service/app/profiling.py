@@ -0,0 +1,122 @@
+"""
+Profiler SQL upita po zahtevu i detektor N+1.
+
+Listener-i na before/after_cursor_execute beleže upite u QueryLog tekućeg
+zahteva (contextvar) i u aktivne `capture()` blokove (testovi). Kada ništa
+nije aktivno, listener je jedna provera i izlaz.
+
+Sa SQL_PROFILE=1 middleware za svaki zahtev:
+  - dodaje zaglavlja X-DB-Queries, X-DB-Time-ms i X-DB-Repeated
+    (najveći broj ponavljanja istog oblika upita),
+  - loguje spore upite (> SLOW_QUERY_MS) sa parametrima,
+  - upozorava kada se isti SELECT ponovi >= N_PLUS_ONE_THRESHOLD puta
+    (tipično lenjo učitavanje relacije u petlji).
+"""
+import contextvars
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import SLOW_QUERY_MS, N_PLUS_ONE_THRESHOLD
+
+log = logging.getLogger(__name__)
+
+
+class QueryLog:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+        self.slow: list[tuple[float, str, object]] = []
+
+    def record(self, statement: str, parameters, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement] += 1
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self.slow.append((seconds, statement, parameters))
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Oblici SELECT upita ponovljeni bar `threshold` puta (verovatno N+1)."""
+        return [(s, n) for s, n in self.shapes.most_common()
+                if n >= threshold and s.lstrip()[:6].upper() == "SELECT"]
+
+    @property
+    def max_repeat(self) -> int:
+        return max(self.shapes.values(), default=0)
+
+
+_current: contextvars.ContextVar[QueryLog | None] = contextvars.ContextVar("query_log", default=None)
+_captures: list[QueryLog] = []
+
+
+def install(engine: Engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # na context-u, ne na konekciji: posle greške after_cursor_execute ne stiže
+        if context is not None and (_current.get() is not None or _captures):
+            context._profile_t0 = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_profile_t0", None)
+        if t0 is None:
+            return
+        seconds = time.perf_counter() - t0
+        current = _current.get()
+        if current is not None:
+            current.record(statement, parameters, seconds)
+        for cap in _captures:
+            cap.record(statement, parameters, seconds)
+
+
+@contextmanager
+def capture():
+    """Beleži sve upite u bloku, bez obzira na nit (TestClient radi u drugoj niti)."""
+    ql = QueryLog()
+    _captures.append(ql)
+    try:
+        yield ql
+    finally:
+        _captures.remove(ql)
+
+
+def report(ql: QueryLog, where: str):
+    for seconds, statement, parameters in ql.slow:
+        log.warning("slow query (%.1f ms) in %s: %s | params=%r", seconds * 1000, where, statement, parameters)
+    for statement, n in ql.repeated():
+        log.warning("possible N+1 in %s: statement repeated %d times: %s", where, n, statement)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware; uključuje se sa SQL_PROFILE=1 (dev/staging)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ql = QueryLog()
+        token = _current.set(ql)
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                # upiti posle početka odgovora (streaming) ulaze u log, ali ne i u zaglavlja
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-queries", str(ql.count).encode()),
+                    (b"x-db-time-ms", f"{ql.seconds * 1000:.1f}".encode()),
+                    (b"x-db-repeated", str(ql.max_repeat).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
+            report(ql, f'{scope["method"]} {scope["path"]}')
@@ -0,0 +1,104 @@
+"""
+Brisanje svih odgovora obrisane forme.
+
+Briše se u delovima od PURGE_CHUNK_SIZE odgovora, svaki deo u svojoj kratkoj
+transakciji, uz malu pauzu između delova. Tako i ogromne forme nestaju bez
+dugih zaključavanja, a posao može da se nastavi posle restarta. Posao se
+vodi u direktorijumu (DATABASE_URL), a brišu se redovi na shard-u forme.
+"""
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import select, delete
+
+from .config import PURGE_CHUNK_SIZE, PURGE_PAUSE
+from .db import SessionLocal
+from .models import Response, Answer, FormSchema, FormShard, PurgeJob
+from .shards import shards
+from . import archive
+
+log = logging.getLogger(__name__)
+
+
+def purge_chunk(db, form_id: int, chunk_size: int) -> int:
+    """Obriši jedan deo odgovora forme; vraća broj obrisanih odgovora."""
+    ids = db.execute(
+        select(Response.id).where(Response.form_id == form_id).limit(chunk_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    db.execute(delete(Answer).where(Answer.response_id.in_(ids)))
+    db.execute(delete(Response).where(Response.id.in_(ids)))
+    return len(ids)
+
+
+def run_purge_job(job_id: int, chunk_size: int = PURGE_CHUNK_SIZE, pause: float = PURGE_PAUSE):
+    db = SessionLocal()
+    data = None
+    try:
+        job = db.get(PurgeJob, job_id)
+        if not job or job.status == "done":
+            return
+        job.status = "running"
+        db.commit()
+
+        # bez shard-ova je to ista baza kao direktorijum
+        data = shards.session_for(job.form_id) if shards.sharded else db
+        while True:
+            n = purge_chunk(data, job.form_id, chunk_size)
+            data.commit()
+            job.deleted_responses += n
+            db.commit()
+            if n < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        data.execute(delete(FormSchema).where(FormSchema.form_id == job.form_id))
+        data.commit()
+        archive.drop(data, job.form_id)
+        db.execute(delete(FormShard).where(FormShard.form_id == job.form_id))
+        shards.forget(job.form_id)
+        job.status = "done"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        log.exception("purge job %s failed", job_id)
+        db.rollback()
+        job = db.get(PurgeJob, job_id)
+        if job:
+            job.status = "failed"
+            job.error = str(e)
+            db.commit()
+    finally:
+        if data is not None and data is not db:
+            data.close()
+        db.close()
+
+
+def schedule_purge(db, form_id: int) -> PurgeJob:
+    """Napravi (ili vrati postojeći nedovršen) posao brisanja za formu."""
+    job = db.execute(
+        select(PurgeJob).where(PurgeJob.form_id == form_id, PurgeJob.status.in_(("pending", "running")))
+    ).scalars().first()
+    if job:
+        return job
+    job = PurgeJob(form_id=form_id, status="pending", deleted_responses=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def resume_pending_purges():
+    """Nastavi poslove prekinute restartom servisa."""
+    db = SessionLocal()
+    try:
+        ids = db.execute(
+            select(PurgeJob.id).where(PurgeJob.status.in_(("pending", "running")))
+        ).scalars().all()
+    finally:
+        db.close()
+    for job_id in ids:
+        run_purge_job(job_id)
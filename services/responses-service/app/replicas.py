@@ -0,0 +1,235 @@
+"""
+Rutiranje čitanja na replike baze.
+
+Endpoint-i koji samo čitaju (liste, izveštaji, export) uzimaju sesiju preko
+`get_read_db`; sve ostalo ide na primarnu bazu kao do sada. Bez
+DATABASE_REPLICA_URLS sve ide na primarnu.
+
+  - read-your-writes: posle uspešne izmene (POST/PUT/PATCH/DELETE) isti
+    klijent (isti Authorization, inače IP) čita sa primarne još
+    REPLICA_STICKY_SECONDS; `X-Consistency: strong` traži primarnu uvek,
+  - replika se proverava najviše jednom na REPLICA_CHECK_INTERVAL; ako ne
+    odgovara ili kasni više od REPLICA_MAX_LAG_SECONDS (Postgres standby),
+    čitanja idu na primarnu dok se ne oporavi,
+  - greška konekcije tokom zahteva odmah obara repliku (handle_error); ako
+    se konekcija ne može otvoriti, čita se sa primarne, a ako replika padne
+    usred GET zahteva (pre slanja odgovora), middleware ga ponavlja na primarnoj.
+
+Lepljivost se pamti po procesu; sa više worker-a klijent može na drugom
+worker-u pročitati repliku, pa REPLICA_STICKY_SECONDS treba da pokrije i
+uobičajeno kašnjenje replikacije.
+"""
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+from .config import (DATABASE_REPLICA_URLS, REPLICA_STICKY_SECONDS, REPLICA_MAX_LAG_SECONDS,
+                     REPLICA_CHECK_INTERVAL)
+from .db import SessionLocal, make_engine
+
+log = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# 0 kada je standby sustigao primarnu (inače bi mirna primarna izgledala kao "kašnjenje")
+_PG_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaUnavailable(Exception):
+    """Replika je pala usred zahteva za čitanje; ReadYourWritesMiddleware ga ponavlja na primarnoj."""
+
+
+class Replica:
+    def __init__(self, url: str, engine=None):
+        self.engine = engine if engine is not None else make_engine(url)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
+        self.healthy = True
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self._checking = threading.Lock()
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, ctx):
+        if ctx.is_disconnect or ctx.connection is None:
+            self.mark_down(ctx.original_exception)
+
+    def mark_down(self, reason):
+        if self.healthy:
+            log.warning("replica %s unavailable, reading from primary: %s", self.name, reason)
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+    def lag_seconds(self) -> float:
+        with self.engine.connect() as conn:
+            if self.engine.dialect.name == "postgresql":
+                return float(conn.execute(_PG_LAG).scalar() or 0)
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def check(self, max_lag: float):
+        try:
+            self.lag = self.lag_seconds()
+        except Exception as e:
+            self.mark_down(e)
+            return
+        ok = self.lag <= max_lag
+        if ok and not self.healthy:
+            log.info("replica %s back in rotation (lag %.1fs)", self.name, self.lag)
+        elif not ok and self.healthy:
+            log.warning("replica %s lags %.1fs > %.1fs, reading from primary", self.name, self.lag, max_lag)
+        self.healthy = ok
+        self.checked_at = time.monotonic()
+
+    def maybe_check(self, interval: float, max_lag: float):
+        # proveru radi jedan zahtev; ostali ne čekaju nego koriste poslednje stanje
+        if time.monotonic() - self.checked_at < interval or not self._checking.acquire(blocking=False):
+            return
+        try:
+            self.check(max_lag)
+        finally:
+            self._checking.release()
+
+
+class ReadRouter:
+    def __init__(self, primary: sessionmaker, replicas: list[Replica], sticky_seconds: float = REPLICA_STICKY_SECONDS,
+                 max_lag: float = REPLICA_MAX_LAG_SECONDS, check_interval: float = REPLICA_CHECK_INTERVAL,
+                 max_clients: int = 10000):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.max_clients = max_clients
+        self._rr = itertools.cycle(range(len(replicas))) if replicas else None
+        self._sticky: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def engines(self):
+        return [r.engine for r in self.replicas]
+
+    def mark_write(self, key: str):
+        with self._lock:
+            self._sticky[key] = time.monotonic() + self.sticky_seconds
+            self._sticky.move_to_end(key)
+            while len(self._sticky) > self.max_clients:
+                self._sticky.popitem(last=False)
+
+    def is_sticky(self, key: str) -> bool:
+        until = self._sticky.get(key)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        with self._lock:
+            self._sticky.pop(key, None)
+        return False
+
+    def pick(self, key: str | None = None) -> Replica | None:
+        """Zdrava replika (round-robin) ili None -> primarna."""
+        if not self.replicas or (key is not None and self.is_sticky(key)):
+            return None
+        for _ in range(len(self.replicas)):
+            r = self.replicas[next(self._rr)]
+            r.maybe_check(self.check_interval, self.max_lag)
+            if r.healthy:
+                return r
+        return None
+
+    def session(self, key: str | None = None):
+        """(sesija, "primary" | "replica"); konekcija na repliku se otvara odmah da bi pad bio fallback, a ne 500."""
+        r = self.pick(key)
+        if r is not None:
+            db = r.Session()
+            try:
+                db.connection()
+            except DBAPIError as e:
+                db.close()
+                r.mark_down(e)
+            else:
+                db.info["replica"] = r
+                return db, "replica"
+        return self.primary(), "primary"
+
+
+def client_key(headers, client) -> str:
+    auth = headers.get("authorization")
+    if auth:
+        return hashlib.blake2b(auth.encode(), digest_size=12).hexdigest()
+    return f"ip:{client[0] if client else '-'}"
+
+
+class ReadYourWritesMiddleware:
+    """Posle uspešne izmene klijent neko vreme čita sa primarne baze."""
+
+    def __init__(self, app, router: "ReadRouter"):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.router.replicas:
+            return await self.app(scope, receive, send)
+        if scope["method"] in SAFE_METHODS:
+            return await self._read(scope, receive, send)
+
+        async def _send(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+                self.router.mark_write(client_key(headers, scope.get("client")))
+            await send(message)
+
+        await self.app(scope, receive, _send)
+
+    async def _read(self, scope, receive, send):
+        started = False
+
+        async def _send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except ReplicaUnavailable as e:
+            if started:
+                raise
+            log.warning("replica failed during %s %s, retrying on primary: %s", scope["method"], scope["path"], e)
+            retry = dict(scope, headers=[*scope.get("headers", []), (b"x-consistency", b"strong")])
+            await self.app(retry, _no_body, send)
+
+
+async def _no_body():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+read_router = ReadRouter(SessionLocal, [Replica(u) for u in DATABASE_REPLICA_URLS])
+
+
+def get_read_db(request: Request, response: Response):
+    """Sesija za endpoint-e koji samo čitaju; X-DB-Route kaže odakle je odgovor."""
+    if request.headers.get("x-consistency", "").lower() == "strong":
+        db, route = read_router.primary(), "primary"
+    else:
+        db, route = read_router.session(client_key(request.headers, request.client))
+    response.headers["X-DB-Route"] = route
+    try:
+        yield db
+    except DBAPIError as e:
+        r = db.info.get("replica")
+        if r is not None and not r.healthy:  # handle_error ju je upravo oborio
+            raise ReplicaUnavailable(r.name) from e
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,92 @@
+"""
+Lokalna, verzionisana kopija šeme forme (pitanja) po verziji forme.
+
+Šema se upisuje pri submit-u iz mete koju ionako dobijamo od forms-service,
+pa export i agregacija znaju tekst i tip pitanja bez ikakvog poziva ka
+forms-service na putanjama za čitanje.
+"""
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import select, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import SCHEMA_CACHE_SIZE
+from .models import FormSchema
+
+_QUESTION_KEYS = ("id", "text", "type", "required", "order_index", "options_json")
+
+# (form_id, version) koje su već upisane -> bez upita pri svakom submit-u (LRU)
+_known: OrderedDict[tuple[int, int], None] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _is_known(key: tuple[int, int]) -> bool:
+    with _lock:
+        if key not in _known:
+            return False
+        _known.move_to_end(key)
+        return True
+
+
+def _remember(keys):
+    with _lock:
+        for key in keys:
+            _known[key] = None
+            _known.move_to_end(key)
+        while len(_known) > SCHEMA_CACHE_SIZE:
+            _known.popitem(last=False)
+
+
+# ključ se pamti tek kada transakcija submit-a uspe; posle rollback-a sledeći submit ponovo upisuje šemu
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop("schema_pending", None)
+    if pending:
+        _remember(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("schema_pending", None)
+
+
+def capture_schema(db: Session, meta: dict) -> int | None:
+    """Upiši šemu iz mete ako ta verzija još ne postoji; vraća verziju forme."""
+    form_id, version = meta.get("id"), meta.get("version")
+    if form_id is None or version is None:
+        return None
+    key = (int(form_id), int(version))
+    if _is_known(key):
+        return key[1]
+    if db.get(FormSchema, key) is None:
+        questions = [{k: q.get(k) for k in _QUESTION_KEYS} for q in meta.get("questions") or []]
+        try:
+            with db.begin_nested():
+                db.add(FormSchema(form_id=key[0], version=key[1], questions=questions))
+        except IntegrityError:
+            pass  # paralelni submit je već upisao istu verziju
+    db.info.setdefault("schema_pending", set()).add(key)
+    return key[1]
+
+
+def question_catalog(db: Session, form_id: int) -> dict[int, dict]:
+    """
+    Sva poznata pitanja forme: {question_id: pitanje}. Novije verzije imaju
+    prednost, a pitanja obrisana u kasnijim verzijama ostaju (stari odgovori).
+    """
+    rows = db.execute(
+        select(FormSchema.questions).where(FormSchema.form_id == form_id).order_by(FormSchema.version)
+    ).scalars().all()
+    catalog: dict[int, dict] = {}
+    for questions in rows:
+        for q in questions or []:
+            catalog[int(q["id"])] = q
+    return catalog
+
+
+def forget(form_id: int):
+    with _lock:
+        for key in [k for k in _known if k[0] == form_id]:
+            del _known[key]
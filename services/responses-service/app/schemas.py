@@ -18,3 +18,17 @@ class ResponseOut(BaseModel):
     form_id: int
     answers: list[AnswerOut]
     class Config: from_attributes = True
+
+class PurgeJobOut(BaseModel):
+    id: int
+    form_id: int
+    status: str
+    deleted_responses: int
+    class Config: from_attributes = True
+
+class FormEvent(BaseModel):
+    id: int
+    type: str
+    form_id: int
+    version: int | None = None
+    payload: dict[str, Any] = {}
@@ -0,0 +1,275 @@
+"""
+Horizontalno deljenje odgovora po form_id.
+
+Sa RESPONSE_SHARD_URLS tabele responses, answers i form_schemas postoje u
+svakoj shard bazi, a svi odgovori jedne forme su u jednoj od njih (submit,
+lista, agregacija i export idu na tačno jednu bazu). DATABASE_URL je tada
+direktorijum: mapa form_id -> shard (form_shards) i purge poslovi.
+
+  - forma bez reda u mapi ide na shard po heš-u (crc32(form_id) % N); prvi
+    submit upisuje taj izbor u mapu, pa dodavanje novih shard-ova ne pomera
+    postojeće forme,
+  - mapa se kešira SHARD_MAP_TTL sekundi po procesu,
+  - `python -m app.shards move <form_id> <shard>` seli formu: stanje
+    "moving" (upisi dobijaju 503 + Retry-After, čitanja idu na stari shard),
+    kopiranje u delovima, prebacivanje mape, pa brisanje sa starog shard-a.
+    Posle svake promene mape čeka SHARD_MAP_TTL da svi procesi vide novo stanje.
+
+Bez RESPONSE_SHARD_URLS postoji jedan "shard" (DATABASE_URL) i nema
+dodatnih upita. ID odgovora je jedinstven po shard-u; pri selidbi odgovori
+dobijaju nove ID-jeve na ciljnom shard-u.
+"""
+import argparse
+import logging
+import threading
+import time
+import zlib
+
+from fastapi import HTTPException, Request, Response as HttpResponse
+from sqlalchemy import select, func, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker, selectinload
+
+from .config import RESPONSE_SHARD_URLS, SHARD_MAP_TTL, SHARD_MOVE_BATCH
+from .db import SessionLocal, engine, make_engine
+from .models import Response, Answer, FormSchema, FormShard, ArchivedForm
+from .replicas import get_read_db
+from . import archive
+
+log = logging.getLogger(__name__)
+
+SHARD_TABLES = [Response.__table__, Answer.__table__, FormSchema.__table__, ArchivedForm.__table__]
+
+
+class ShardMoving(Exception):
+    def __init__(self, form_id: int):
+        super().__init__(f"Form {form_id} is being moved between shards")
+        self.form_id = form_id
+
+
+class Shards:
+    def __init__(self, directory: sessionmaker, engines: list, ttl: float = SHARD_MAP_TTL,
+                 sessions: list[sessionmaker] | None = None, sharded: bool = True):
+        self.directory = directory
+        self.engines = engines
+        # i jedna shard baza (RESPONSE_SHARD_URLS sa jednim URL-om) je odvojena od DATABASE_URL
+        self._sharded = sharded
+        self.sessions = sessions or [sessionmaker(bind=e, autoflush=False, autocommit=False) for e in engines]
+        self.ttl = ttl
+        # form_id -> (ističe, shard, state)
+        self._cache: dict[int, tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sharded(self) -> bool:
+        return self._sharded
+
+    def default_shard(self, form_id: int) -> int:
+        return zlib.crc32(str(form_id).encode()) % len(self.engines)
+
+    def _lookup(self, db: Session, form_id: int) -> tuple[int, str, bool]:
+        row = db.get(FormShard, form_id)
+        if row is None:
+            return self.default_shard(form_id), "active", False
+        return row.shard, row.state, True
+
+    def locate(self, form_id: int) -> tuple[int, str]:
+        """(shard, state) forme; keširano SHARD_MAP_TTL sekundi."""
+        if not self.sharded:
+            return 0, "active"
+        hit = self._cache.get(form_id)
+        if hit and hit[0] > time.monotonic():
+            return hit[1], hit[2]
+        with self.directory() as db:
+            shard, state, _ = self._lookup(db, form_id)
+        self._remember(form_id, shard, state)
+        return shard, state
+
+    def _remember(self, form_id: int, shard: int, state: str):
+        with self._lock:
+            if len(self._cache) > 100_000:
+                self._cache.clear()
+            self._cache[form_id] = (time.monotonic() + self.ttl, shard, state)
+
+    def assign(self, form_id: int) -> int:
+        """Shard za upis; prvi upis forme fiksira heš izbor u mapi. Selidba u toku -> ShardMoving."""
+        if not self.sharded:
+            return 0
+        hit = self._cache.get(form_id)
+        if hit and hit[0] > time.monotonic() and hit[2] == "active":
+            return hit[1]
+        with self.directory() as db:
+            shard, state, pinned = self._lookup(db, form_id)
+            if not pinned:
+                try:
+                    db.add(FormShard(form_id=form_id, shard=shard, state="active"))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()  # paralelni submit je već upisao
+                    shard, state, _ = self._lookup(db, form_id)
+        self._remember(form_id, shard, state)
+        if state != "active":
+            raise ShardMoving(form_id)
+        return shard
+
+    def session(self, shard: int) -> Session:
+        return self.sessions[shard]()
+
+    def session_for(self, form_id: int) -> Session:
+        return self.session(self.locate(form_id)[0])
+
+    def forget(self, form_id: int):
+        self._cache.pop(form_id, None)
+
+    def create_schema(self, run_migrations):
+        if not self.sharded:
+            return
+        for eng in self.engines:
+            Response.metadata.create_all(bind=eng, tables=SHARD_TABLES)
+            run_migrations(eng)
+
+    # -----------------------
+    # Rebalans
+    # -----------------------
+    def move(self, form_id: int, target: int, batch: int = SHARD_MOVE_BATCH, wait: float | None = None) -> int:
+        """Preseli sve odgovore forme na `target`; vraća broj preseljenih odgovora."""
+        if not 0 <= target < len(self.engines):
+            raise ValueError(f"Shard {target} does not exist (0..{len(self.engines) - 1})")
+        wait = self.ttl if wait is None else wait
+        with self.directory() as db:
+            source, _, pinned = self._lookup(db, form_id)
+            if source == target:
+                if not pinned:
+                    db.add(FormShard(form_id=form_id, shard=source, state="active"))
+                    db.commit()
+                return 0
+            if pinned:
+                db.execute(update(FormShard).where(FormShard.form_id == form_id)
+                           .values(state="moving", target=target))
+            else:
+                db.add(FormShard(form_id=form_id, shard=source, state="moving", target=target))
+            db.commit()
+        self.forget(form_id)
+        time.sleep(wait)  # keš mape u svim procesima sada vidi "moving"
+
+        with self.session(source) as src, self.session(target) as dst:
+            # ID-jevi se na cilju menjaju, a arhiva se oslanja na njih: arhivirane odgovore
+            # vraćamo u vruće tabele (arhiviraće se ponovo na novom shard-u)
+            if archive.restore(src, form_id):
+                log.info("restored archived responses of form %s before the move", form_id)
+            _purge_form(dst, form_id, batch)  # ostatak prekinute selidbe
+            moved = _copy_form(src, dst, form_id, batch)
+            expected = src.execute(select(func.count()).select_from(Response).where(Response.form_id == form_id)).scalar()
+            if moved != expected:
+                raise RuntimeError(f"Copied {moved} responses, source has {expected}; map not switched")
+
+        with self.directory() as db:
+            db.execute(update(FormShard).where(FormShard.form_id == form_id)
+                       .values(shard=target, state="active", target=None))
+            db.commit()
+        self.forget(form_id)
+        time.sleep(wait)  # niko više ne čita sa starog shard-a
+
+        with self.session(source) as src:
+            _purge_form(src, form_id, batch)
+        log.info("moved form %s from shard %s to %s (%s responses)", form_id, source, target, moved)
+        return moved
+
+    def pin_existing(self, shard: int) -> int:
+        """Upiši u mapu sve forme koje već imaju odgovore na shard-u (npr. stara jedinstvena baza)."""
+        with self.session(shard) as s:
+            form_ids = set(s.execute(select(Response.form_id).distinct()).scalars())
+        with self.directory() as db:
+            known = set(db.execute(select(FormShard.form_id)).scalars())
+            new = sorted(form_ids - known)
+            db.add_all(FormShard(form_id=f, shard=shard, state="active") for f in new)
+            db.commit()
+        return len(new)
+
+
+def _copy_form(src: Session, dst: Session, form_id: int, batch: int) -> int:
+    for fs in src.execute(select(FormSchema).where(FormSchema.form_id == form_id)).scalars():
+        dst.merge(FormSchema(form_id=fs.form_id, version=fs.version, questions=fs.questions))
+    dst.commit()
+    moved, last = 0, 0
+    while True:
+        rs = src.execute(
+            select(Response).where(Response.form_id == form_id, Response.id > last)
+            .options(selectinload(Response.answers)).order_by(Response.id).limit(batch)
+        ).scalars().all()
+        if not rs:
+            return moved
+        for r in rs:
+            copy = Response(form_id=r.form_id, form_version=r.form_version, submitted_at=r.submitted_at)
+            copy.answers = [Answer(question_id=a.question_id, value=a.value) for a in r.answers]
+            dst.add(copy)
+        dst.commit()
+        moved += len(rs)
+        last = rs[-1].id
+        src.expunge_all()
+
+
+def _purge_form(db: Session, form_id: int, batch: int):
+    from .purge import purge_chunk
+    while purge_chunk(db, form_id, batch):
+        db.commit()
+    db.execute(delete(FormSchema).where(FormSchema.form_id == form_id))
+    db.execute(delete(ArchivedForm).where(ArchivedForm.form_id == form_id))
+    db.commit()
+
+
+if RESPONSE_SHARD_URLS:
+    shards = Shards(SessionLocal, [make_engine(u) for u in RESPONSE_SHARD_URLS])
+else:
+    shards = Shards(SessionLocal, [engine], sessions=[SessionLocal], sharded=False)
+
+
+def get_form_db(form_id: int, request: Request, response: HttpResponse):
+    """Sesija za čitanje odgovora forme: njen shard, ili replika/primarna bez shard-ova."""
+    if not shards.sharded:
+        yield from get_read_db(request, response)
+        return
+    db = shards.session_for(form_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def shard_unavailable(e: ShardMoving) -> HTTPException:
+    return HTTPException(503, detail=str(e), headers={"Retry-After": str(max(1, int(shards.ttl)))})
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m app.shards", description="Response shard maintenance")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    mv = sub.add_parser("move", help="move all responses of a form to another shard")
+    mv.add_argument("form_id", type=int)
+    mv.add_argument("shard", type=int)
+    mv.add_argument("--batch", type=int, default=SHARD_MOVE_BATCH)
+    mv.add_argument("--wait", type=float, default=None, help="seconds to wait for map caches (default SHARD_MAP_TTL)")
+    wh = sub.add_parser("where", help="show the shard of a form")
+    wh.add_argument("form_id", type=int)
+    pn = sub.add_parser("pin", help="record forms that already have responses on a shard")
+    pn.add_argument("shard", type=int)
+    sub.add_parser("stats", help="responses per shard")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.cmd == "move":
+        print(f"moved {shards.move(args.form_id, args.shard, batch=args.batch, wait=args.wait)} responses")
+    elif args.cmd == "where":
+        shard, state = shards.locate(args.form_id)
+        print(f"form {args.form_id}: shard {shard} ({state})")
+    elif args.cmd == "pin":
+        print(f"pinned {shards.pin_existing(args.shard)} forms to shard {args.shard}")
+    else:
+        for i in range(len(shards.engines)):
+            with shards.session(i) as s:
+                n = s.execute(select(func.count()).select_from(Response)).scalar()
+                forms = s.execute(select(func.count(func.distinct(Response.form_id)))).scalar()
+            print(f"shard {i}: {n} responses, {forms} forms")
+
+
+if __name__ == "__main__":
+    main()
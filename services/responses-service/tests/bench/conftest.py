@@ -0,0 +1,98 @@
+"""
+Mikro-benchmark-ovi vrućih helper funkcija (vreme + alokacije).
+
+Podrazumevano se NE skupljaju (obično `pytest -q` i CI ostaju brzi):
+
+    BENCH=1 pytest tests/bench -q
+    BENCH=1 BENCH_JSON=bench.json pytest tests/bench -q   # rezultati i u JSON
+
+Fixture `bench(fn, *args)` kalibriše broj poziva po rundi (~BENCH_ROUND_MS),
+meri min/median kroz BENCH_ROUNDS rundi i jednom pokrene fn pod tracemalloc-om
+(vršna memorija i broj alociranih blokova). Tabela se štampa na kraju sesije.
+"""
+import gc
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+import pytest
+
+if not os.getenv("BENCH"):
+    collect_ignore_glob = ["test_*.py"]
+
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "7"))
+ROUND_MS = float(os.getenv("BENCH_ROUND_MS", "50"))
+
+_results: list[dict] = []
+
+
+def _calibrate(fn, args) -> int:
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn(*args)
+        if (time.perf_counter() - t0) * 1000 >= ROUND_MS or n >= 1 << 20:
+            return n
+        n *= 2
+
+
+def _allocations(fn, args) -> tuple[int, int]:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn(*args)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(s.count_diff, 0) for s in after.compare_to(before, "filename"))
+    return peak, blocks
+
+
+@pytest.fixture
+def bench(request):
+    def run(fn, *args, name: str | None = None):
+        result = fn(*args)  # zagrevanje + vrednost za proveru u testu
+        n = _calibrate(fn, args)
+        gc_was = gc.isenabled()
+        gc.disable()
+        try:
+            per_call = []
+            for _ in range(ROUNDS):
+                t0 = time.perf_counter()
+                for _ in range(n):
+                    fn(*args)
+                per_call.append((time.perf_counter() - t0) / n)
+        finally:
+            if gc_was:
+                gc.enable()
+        peak, blocks = _allocations(fn, args)
+        _results.append({
+            "name": name or request.node.name,
+            "calls": n * ROUNDS,
+            "min_us": min(per_call) * 1e6,
+            "median_us": statistics.median(per_call) * 1e6,
+            "peak_kib": peak / 1024,
+            "alloc_blocks": blocks,
+        })
+        return result
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    tr = terminalreporter
+    tr.section("benchmarks")
+    tr.write_line(f"{'name':<48} {'min us':>10} {'median us':>10} {'peak KiB':>9} {'blocks':>8}")
+    for r in _results:
+        tr.write_line(f"{r['name'][:48]:<48} {r['min_us']:>10.1f} {r['median_us']:>10.1f} "
+                      f"{r['peak_kib']:>9.1f} {r['alloc_blocks']:>8}")
+    out = os.getenv("BENCH_JSON")
+    if out:
+        with open(out, "w") as f:
+            json.dump(_results, f, indent=2)
+        tr.write_line(f"results written to {out}")
@@ -0,0 +1,69 @@
+import json
+import random
+from types import SimpleNamespace as NS
+
+from app.main import validate_answers, get_choices, _safe_decode, count_answers, export_rows
+
+rnd = random.Random(1)
+CHOICES = [f"opcija {i}" for i in range(2000)]
+
+def _form(n):
+    qs = []
+    for i in range(n):
+        kind = i % 5
+        if kind == 0:
+            q = {"type": "short_text"}
+        elif kind == 1:
+            q = {"type": "single_choice", "options_json": {"choices": CHOICES}}
+        elif kind == 2:
+            q = {"type": "multi_choice", "options_json": {"choices": CHOICES, "required_count": 1}}
+        elif kind == 3:
+            q = {"type": "numeric", "options_json": {"range": {"start": 0, "end": 100_000, "step": 1}}}
+        else:
+            q = {"type": "numeric", "options_json": {"list": list(range(0, 10_000, 7))}}
+        qs.append({"id": i + 1, "required": True, **q})
+    return {q["id"]: q for q in qs}
+
+def _answer(q):
+    t, oj = q["type"], q.get("options_json") or {}
+    if t == "short_text":
+        v = "tekst"
+    elif t == "single_choice":
+        v = oj["choices"][-1]                       # najgori slučaj za linearnu pretragu
+    elif t == "multi_choice":
+        v = oj["choices"][-3:]
+    elif "range" in oj:
+        v = oj["range"]["end"]
+    else:
+        v = oj["list"][-1]
+    return NS(question_id=q["id"], value=v)
+
+QMAP = _form(300)
+ANSWERS = [_answer(q) for q in QMAP.values()]
+
+def test_validate_answers_300_questions(bench):
+    bench(validate_answers, ANSWERS, QMAP)
+
+def test_validate_numeric_wide_range(bench):
+    q = {"id": 1, "type": "numeric", "options_json": {"range": {"start": 0, "end": 1_000_000, "step": 1}}}
+    bench(validate_answers, [NS(question_id=1, value=999_999)], {1: q})
+
+def test_get_choices(bench):
+    assert bench(get_choices, {"choices": CHOICES}) is CHOICES
+
+def test_safe_decode_mixed(bench):
+    values = [json.dumps(v) for v in ("tekst", 42, ["a", "b", "c"], None)] + ["nije json", None]
+    bench(lambda: [_safe_decode(v) for v in values])
+
+def test_count_answers_100k(bench):
+    rows = [(q, json.dumps(rnd.choice(CHOICES[:20]) if q % 2 else rnd.sample(CHOICES[:20], 3)))
+            for q in (rnd.randrange(1, 21) for _ in range(100_000))]
+    agg = bench(count_answers, rows)
+    assert sum(sum(c.values()) for c in agg.values()) > 100_000
+
+def test_export_rows_1000x200(bench):
+    qids = list(range(1, 201))
+    rs = [NS(id=i, answers=[NS(question_id=q, value=json.dumps(f"v{q}")) for q in qids if (i + q) % 10])
+          for i in range(1000)]
+    rows = bench(lambda: list(export_rows(rs, qids)))
+    assert len(rows) == 1000 and len(rows[0]) == 201
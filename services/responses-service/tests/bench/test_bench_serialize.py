@@ -0,0 +1,27 @@
+import json
+from types import SimpleNamespace as NS
+
+from pydantic import TypeAdapter
+
+from app.main import response_dicts, responses_json
+from app.schemas import ResponseOut
+
+ROWS = 10_000
+adapter = TypeAdapter(list[ResponseOut])
+RS = [NS(id=i, form_id=1, answers=[NS(question_id=q, value=json.dumps(v))
+                                   for q, v in enumerate(("tekst", i, ["a", "b"], None, "2024-01-01"), start=1)])
+      for i in range(ROWS)]
+
+
+def _response_model_path(rs):
+    # ono što FastAPI radi sa response_model: validacija, dump u JSON tipove, json.dumps
+    out = adapter.validate_python(response_dicts(rs))
+    return json.dumps(adapter.dump_python(out, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def test_list_responses_10k_response_model(bench):
+    bench(_response_model_path, RS)
+
+
+def test_list_responses_10k_fast_json(bench):
+    assert json.loads(bench(responses_json, RS)) == json.loads(_response_model_path(RS))
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# testovi nikad ne pišu u ./resp.db iz repozitorijuma; Postgres i sl. preko TEST_DATABASE_URL
+_tmp = tempfile.mkdtemp(prefix="resp-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{_tmp}/resp.db"
+
+from app import profiling  # noqa: E402 (posle DATABASE_URL)
+from app.migrations import migrate  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    # aplikacija više ne pravi šemu pri importu
+    migrate()
+    yield
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Budžet SQL upita za blok koda:
+
+        with query_budget(3):
+            client.get("/forms")
+
+    Pada ako blok izvrši više upita, uz spisak ponovljenih oblika (N+1).
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        with profiling.capture() as ql:
+            yield ql
+        repeated = "; ".join(f"{n}x {s.splitlines()[0][:80]}" for s, n in ql.repeated(threshold=2))
+        assert ql.count <= max_queries, f"{ql.count} queries, budget {max_queries}. Repeated: {repeated or '-'}"
+    return budget
@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, func, update, text
+from sqlalchemy.orm import sessionmaker
+
+from app import archive
+from app.db import Base
+from app.main import _with_archive, count_answers
+from app.models import Response, Answer, ArchivedForm
+
+OLD = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    archive._cache.clear()
+    engine = create_engine(f"sqlite:///{tmp_path / 'r.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as s:
+        yield s
+
+
+def _add(db, form_id, values, at=OLD):
+    for v in values:
+        db.add(Response(form_id=form_id, form_version=1, submitted_at=at,
+                        answers=[Answer(question_id=1, value=json.dumps(v))]))
+    db.commit()
+
+
+def _hot(db, form_id):
+    return db.execute(select(func.count()).select_from(Response).where(Response.form_id == form_id)).scalar()
+
+
+def test_archive_moves_rows_and_reads_stay_the_same(db):
+    _add(db, 5, ["a", "b", "a"])
+    _add(db, 6, ["x"])
+    before = [(r.id, [a.value for a in r.answers]) for r in db.execute(select(Response).where(Response.form_id == 5)).scalars()]
+
+    assert archive.archive_form(db, 5) == 3
+    assert _hot(db, 5) == 0 and _hot(db, 6) == 1
+    arch = archive.lookup(db, 5)
+    assert [(r.id, [a.value for a in r.answers]) for r in arch.responses()] == before
+    assert count_answers(arch.answer_rows()) == {1: {"a": 2, "b": 1}}
+
+
+def test_new_hot_rows_are_merged_and_rearchived(db):
+    _add(db, 5, ["a", "b"])
+    archive.archive_form(db, 5)
+    _add(db, 5, ["c"], at=datetime.utcnow())
+
+    hot = db.execute(select(Response).where(Response.form_id == 5)).scalars().all()
+    assert [json.loads(r.answers[0].value) for r in _with_archive(db, 5, hot)] == ["a", "b", "c"]
+
+    old_path = db.get(ArchivedForm, 5).path
+    assert archive.archive_form(db, 5) == 1
+    row = db.get(ArchivedForm, 5)
+    assert row.path != old_path and row.responses == 3
+    assert _with_archive(db, 5, []) and len(archive.lookup(db, 5)) == 3
+
+
+def test_restore(db):
+    _add(db, 5, ["a", "b"])
+    ids = db.execute(select(Response.id).where(Response.form_id == 5)).scalars().all()
+    archive.archive_form(db, 5)
+    assert archive.restore(db, 5) == 2
+    assert db.execute(select(Response.id).where(Response.form_id == 5)).scalars().all() == ids
+    assert db.get(ArchivedForm, 5) is None
+
+
+def test_only_locked_inactive_forms_are_archived(db, monkeypatch):
+    _add(db, 5, ["a"])                              # zaključana, neaktivna
+    _add(db, 6, ["a"])                              # otključana
+    _add(db, 7, ["a"], at=datetime.utcnow())        # skoro aktivna
+    assert archive.inactive_forms(db, datetime.utcnow() - timedelta(days=30)) == [5, 6]
+
+    monkeypatch.setattr(archive, "locked_forms", lambda ids: {5, 7} & set(ids))
+    make = lambda: db
+    assert archive.run([make], days=30) == 1
+    assert _hot(db, 5) == 0 and _hot(db, 6) == 1 and _hot(db, 7) == 1
+
+
+def test_drop_removes_file(db):
+    _add(db, 5, ["a"])
+    archive.archive_form(db, 5)
+    path = archive._full_path(db.get(ArchivedForm, 5).path)
+    archive.drop(db, 5)
+    assert db.get(ArchivedForm, 5) is None
+    import os
+    assert not os.path.exists(path)
+
+
+def test_forms_with_undated_responses_are_not_inactive(db):
+    _add(db, 5, ["a"])
+    _add(db, 6, ["a"])
+    _add(db, 5, ["b"])
+    # stari red bez vremena (None u modelu bi dobio default)
+    db.execute(update(Response).where(Response.id == 3).values(submitted_at=None))
+    db.commit()
+    assert archive.inactive_forms(db, datetime.utcnow() - timedelta(days=30)) == [6]
+
+
+def test_migrations_keep_archived_ids_from_being_reused(tmp_path, monkeypatch):
+    from app.migrations import run_migrations
+
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    archive._cache.clear()
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # tabela iz vremena pre sqlite_autoincrement i kolona dodatih migracijama 2 i 3
+        conn.execute(text("CREATE TABLE responses (id INTEGER NOT NULL PRIMARY KEY, form_id INTEGER NOT NULL, "
+                          "form_version INTEGER, submitted_at TIMESTAMP)"))
+        conn.execute(text("CREATE TABLE schema_version (version INTEGER NOT NULL PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (1), (2), (3)"))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as s:
+        _add(s, 5, ["a", "b", "c"])
+        archive.archive_form(s, 5)                  # max_response_id = 3, vruća tabela prazna
+        _add(s, 6, ["y"])                           # bez AUTOINCREMENT dobija id 1
+        s.execute(update(Response).values(submitted_at=None))  # red iz vremena pre kolone submitted_at
+        assert _hot(s, 5) == 0 and s.execute(select(Response.id)).scalars().all() == [1]
+
+    run_migrations(engine)
+
+    with Session() as s:
+        _add(s, 5, ["d"])
+        new = s.execute(select(Response.id).where(Response.form_id == 5)).scalar()
+        assert new > 3                              # vidljiv uz arhivu (id > max_response_id)
+        hot = s.execute(select(Response).where(Response.form_id == 5)).scalars().all()
+        assert [r.id for r in _with_archive(s, 5, hot)] == [1, 2, 3, new]
+        assert s.execute(select(func.count()).select_from(Response).where(Response.submitted_at.is_(None))).scalar() == 0
+    with engine.connect() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'responses'")).scalar()
+    assert "AUTOINCREMENT" in ddl
+
+
+def test_archive_objects_are_built_once_and_cache_is_bounded(db, monkeypatch):
+    _add(db, 5, ["a", "b"])
+    _add(db, 6, ["x"])
+    archive.archive_form(db, 5)
+    archive.archive_form(db, 6)
+    arch = archive.lookup(db, 5)
+    first = arch.responses()
+    assert arch.responses() is first and archive.lookup(db, 5) is arch
+    assert sorted(arch.answer_rows()) == [(1, '"a"'), (1, '"b"')]
+
+    # budžet od 2 odgovora: forma 6 (1 odgovor) istiskuje formu 5 (2 odgovora)
+    monkeypatch.setattr(archive, "_cache", archive.ArchiveCache(max_entries=8, max_answers=2))
+    a5 = archive.lookup(db, 5)
+    assert archive.lookup(db, 5) is a5
+    archive.lookup(db, 6)
+    assert archive.lookup(db, 5) is not a5 and archive._cache.answers <= 2
+    # arhiva veća od budžeta se ne kešira
+    monkeypatch.setattr(archive, "_cache", archive.ArchiveCache(max_entries=8, max_answers=1))
+    assert archive.lookup(db, 5) is not archive.lookup(db, 5)
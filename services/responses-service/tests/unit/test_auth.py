@@ -0,0 +1,52 @@
+import time
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app import auth
+from app.config import JWT_SECRET
+
+def _token(**claims):
+    return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+def test_verify_token_caches_until_expiry(monkeypatch):
+    auth.token_cache.clear()
+    tok = _token(sub="a@x.com", exp=int(time.time()) + 60)
+    assert auth.verify_token(tok) == "a@x.com"
+
+    # drugi poziv ne dekodira ponovo
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **k: pytest.fail("decoded twice"))
+    assert auth.verify_token(tok) == "a@x.com"
+
+def test_verify_token_rejects_bad_signature_and_expired():
+    auth.token_cache.clear()
+    with pytest.raises(HTTPException):
+        auth.verify_token(jwt.encode({"sub": "a@x.com"}, "wrong", algorithm="HS256"))
+    with pytest.raises(HTTPException):
+        auth.verify_token(_token(sub="a@x.com", exp=int(time.time()) - 1))
+
+def test_verify_token_requires_exp():
+    auth.token_cache.clear()
+    with pytest.raises(HTTPException):
+        auth.verify_token(_token(sub="a@x.com"))
+
+def test_revoked_token_rejected_even_when_cached():
+    auth.token_cache.clear()
+    tok = _token(sub="a@x.com", uid=3, iat=int(time.time()) - 10, jti="j1", exp=int(time.time()) + 60)
+    assert auth.verify_token(tok) == "a@x.com"
+    try:
+        auth.revocations.load({"jtis": ["j1"]})
+        with pytest.raises(HTTPException):
+            auth.verify_token(tok)
+        auth.revocations.load({"users": {"3": int(time.time())}})
+        with pytest.raises(HTTPException):
+            auth.verify_token(tok)
+    finally:
+        auth.revocations.load({})
+
+def test_token_cache_is_bounded():
+    c = auth.TokenCache(maxsize=2, max_age=60)
+    for i in range(3):
+        c.set(bytes([i]), {"sub": f"u{i}"})
+    assert c.get(bytes([0])) is None
+    assert c.get(bytes([2]))["sub"] == "u2"
@@ -13,11 +13,13 @@ class DummyResp:
 class DummyAsyncClient:
     def __init__(self, seq, *args, **kwargs):
         self._seq = iter(seq)
+        self.calls = []
     async def __aenter__(self):
         return self
     async def __aexit__(self, exc_type, exc, tb):
         pass
-    async def get(self, url):
+    async def get(self, url, **kwargs):
+        self.calls.append(url)
         return next(self._seq)
 
 @pytest.mark.asyncio
@@ -37,3 +39,31 @@ async def test_fetch_form_meta_ok(monkeypatch):
     assert data["is_locked"] is False
     assert data["allow_anonymous"] is True
     assert data["questions"] == []
+
+@pytest.mark.asyncio
+async def test_cached_meta_is_revalidated_against_lock_and_version(monkeypatch):
+    meta = {"id": 7, "is_locked": False, "allow_anonymous": True, "version": 3, "questions": []}
+    seq = iter([
+        DummyResp(json_data=meta),
+        DummyResp(json_data=[{"id": 7, "is_locked": False, "version": 3}]),
+        # druga instanca je u međuvremenu zaključala formu (verzija 4)
+        DummyResp(json_data=[{"id": 7, "is_locked": True, "version": 4}]),
+        DummyResp(status_code=404, text="not found"),
+        DummyResp(json_data={**meta, "is_locked": True, "version": 4}),
+    ])
+    clients = []
+
+    def _factory(*args, **kwargs):
+        clients.append(DummyAsyncClient(seq, *args, **kwargs))
+        return clients[-1]
+
+    monkeypatch.setattr(m.httpx, "AsyncClient", _factory)
+    m.invalidate_form_meta(7)
+
+    assert (await fetch_form_meta(7))["version"] == 3
+    assert (await fetch_form_meta(7)) == meta
+    assert clients[1].calls == [f"{m.FORMS_API}/internal/forms/status"]
+
+    locked = await fetch_form_meta(7)
+    assert locked["is_locked"] is True and locked["version"] == 4
+    assert 7 not in m._meta_cache
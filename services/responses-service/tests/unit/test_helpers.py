@@ -1,4 +1,8 @@
-from app.main import get_choices, _safe_decode
+import json
+from types import SimpleNamespace as NS
+
+from app.main import get_choices, _safe_decode, response_dicts, responses_json
+from app.schemas import ResponseOut
 
 def test_get_choices_supports_both_keys():
     assert get_choices({"choices":["A","B"]}) == ["A","B"]
@@ -11,3 +15,17 @@ def test_safe_decode_json_and_list_to_csv():
     assert _safe_decode(None) == ""
     # već string ostaje
     assert _safe_decode("plain") == "plain"
+
+def test_fast_responses_json_matches_response_model():
+    rs = [NS(id=i, form_id=3, answers=[NS(question_id=1, value=json.dumps(v)), NS(question_id=2, value=json.dumps([i, "š"]))])
+          for i, v in enumerate(["a", 5, None, {"k": True}, "navodnik \" i \\"])]
+    slow = [ResponseOut.model_validate(d).model_dump() for d in response_dicts(rs)]
+    assert json.loads(responses_json(rs)) == slow
+    assert responses_json([]) == b"[]"
+
+def test_fast_responses_json_survives_null_and_legacy_values():
+    bad = ["plain", None, "", '1,"x":2', '"a"},{"question_id":9,"value":1', "NaN"]
+    rs = [NS(id=1, form_id=3, answers=[NS(question_id=i, value=v) for i, v in enumerate(bad)])]
+    slow = [ResponseOut.model_validate(d).model_dump() for d in response_dicts(rs)]
+    assert json.loads(responses_json(rs)) == slow
+    assert [a["value"] for a in slow[0]["answers"]] == ["plain", None, "", '1,"x":2', '"a"},{"question_id":9,"value":1', "NaN"]
@@ -0,0 +1,24 @@
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Response, Answer
+from app.purge import purge_chunk
+
+def test_purge_chunk_deletes_only_given_form_in_chunks():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for form_id in (1, 1, 1, 2):
+        r = Response(form_id=form_id)
+        r.answers.append(Answer(question_id=1, value='"x"'))
+        db.add(r)
+    db.commit()
+
+    assert purge_chunk(db, 1, chunk_size=2) == 2
+    assert purge_chunk(db, 1, chunk_size=2) == 1
+    assert purge_chunk(db, 1, chunk_size=2) == 0
+    db.commit()
+
+    assert db.execute(select(Response.form_id)).scalars().all() == [2]
+    assert db.execute(select(func.count(Answer.id))).scalar() == 1
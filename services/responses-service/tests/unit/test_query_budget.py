@@ -0,0 +1,31 @@
+import json
+
+from app.db import SessionLocal
+from app.models import Response, Answer
+
+FORM_ID = 424242
+
+def _seed(n=10):
+    db = SessionLocal()
+    try:
+        if db.query(Response).filter_by(form_id=FORM_ID).count() >= n:
+            return
+        for i in range(n):
+            r = Response(form_id=FORM_ID)
+            r.answers.append(Answer(question_id=1, value=json.dumps(f"v{i % 3}")))
+            r.answers.append(Answer(question_id=2, value=json.dumps(["a", "b"])))
+            db.add(r)
+        db.commit()
+    finally:
+        db.close()
+
+def test_response_reads_load_answers_in_bulk(client, query_budget):
+    _seed()
+    # +1 upit svuda: provera registra arhive (archived_forms)
+    with query_budget(3):
+        assert len(client.get(f"/forms/{FORM_ID}/responses").json()) >= 10
+    with query_budget(2):
+        agg = client.get(f"/forms/{FORM_ID}/aggregate").json()
+    assert agg["2"]["a"] >= 10
+    with query_budget(4):
+        assert client.get(f"/forms/{FORM_ID}/export").status_code == 200
@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.main import _column_titles
+from app import schema_store
+from app.schema_store import capture_schema, question_catalog
+
+def test_catalog_merges_versions_newest_wins():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    capture_schema(db, {"id": 1, "version": 1, "questions": [
+        {"id": 1, "text": "Old", "type": "short_text"},
+        {"id": 2, "text": "Removed later", "type": "numeric"},
+    ]})
+    capture_schema(db, {"id": 1, "version": 2, "questions": [{"id": 1, "text": "New", "type": "long_text"}]})
+    db.commit()
+
+    cat = question_catalog(db, 1)
+    assert cat[1]["text"] == "New" and cat[1]["type"] == "long_text"
+    assert cat[2]["type"] == "numeric"
+    assert question_catalog(db, 2) == {}
+
+def test_column_titles_fall_back_and_dedupe():
+    cat = {1: {"text": "Ime"}, 2: {"text": "Ime"}}
+    assert _column_titles([1, 2, 3], cat) == ["Ime", "Ime (q2)", "q3"]
+
+def test_schema_is_remembered_only_after_commit(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    meta = {"id": 50, "version": 1, "questions": [{"id": 1, "text": "Q", "type": "short_text"}]}
+
+    with Session() as db:
+        capture_schema(db, meta)
+        db.rollback()  # npr. pao commit submit-a
+    assert not schema_store._is_known((50, 1))
+
+    with Session() as db:
+        capture_schema(db, meta)
+        db.commit()
+        assert question_catalog(db, 50)[1]["text"] == "Q"
+    assert schema_store._is_known((50, 1))
+
+    monkeypatch.setattr(schema_store, "SCHEMA_CACHE_SIZE", 2)
+    schema_store._remember([(51, 1), (52, 1)])
+    assert not schema_store._is_known((50, 1)) and len(schema_store._known) == 2
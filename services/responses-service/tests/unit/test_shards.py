@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import select, func, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, make_engine
+from app.migrations import run_migrations
+from app.models import Response, Answer, FormSchema, FormShard
+from app.shards import Shards, ShardMoving
+
+
+@pytest.fixture
+def shards(tmp_path):
+    directory = make_engine(f"sqlite:///{tmp_path / 'dir.db'}")
+    Base.metadata.create_all(bind=directory)
+    s = Shards(sessionmaker(bind=directory), [make_engine(f"sqlite:///{tmp_path / f's{i}.db'}") for i in range(2)], ttl=0)
+    s.create_schema(run_migrations)
+    return s
+
+
+def _seed(s, shard, form_id, n):
+    with s.session(shard) as db:
+        db.add(FormSchema(form_id=form_id, version=1, questions=[{"id": 1, "text": "Q"}]))
+        for i in range(n):
+            r = Response(form_id=form_id, form_version=1)
+            r.answers = [Answer(question_id=1, value=f'"v{i}"'), Answer(question_id=2, value="[1, 2]")]
+            db.add(r)
+        db.commit()
+
+
+def _count(s, shard, form_id):
+    with s.session(shard) as db:
+        return (db.execute(select(func.count()).select_from(Response).where(Response.form_id == form_id)).scalar(),
+                db.execute(select(func.count()).select_from(Answer).join(Response).where(Response.form_id == form_id)).scalar())
+
+
+def test_first_write_pins_hash_choice(shards):
+    shard = shards.assign(7)
+    assert shard == shards.default_shard(7)
+    with shards.directory() as db:
+        assert db.get(FormShard, 7).shard == shard
+    assert shards.locate(7) == (shard, "active")
+
+
+def test_move_copies_then_removes_source(shards):
+    src = shards.assign(7)
+    dst = 1 - src
+    _seed(shards, src, 7, 25)
+    _seed(shards, src, 8, 3)
+
+    assert shards.move(7, dst, batch=10, wait=0) == 25
+    assert shards.locate(7) == (dst, "active")
+    assert _count(shards, dst, 7) == (25, 50)
+    assert _count(shards, src, 7) == (0, 0)
+    assert _count(shards, src, 8) == (3, 6)  # ostale forme ostaju
+    with shards.session(dst) as db:
+        assert db.get(FormSchema, (7, 1)).questions[0]["text"] == "Q"
+
+
+def test_writes_rejected_while_moving(shards):
+    shards.assign(7)
+    with shards.directory() as db:
+        db.execute(update(FormShard).values(state="moving", target=1))
+        db.commit()
+    with pytest.raises(ShardMoving):
+        shards.assign(7)
+
+
+def test_pin_existing(shards):
+    _seed(shards, 1, 11, 1)
+    _seed(shards, 1, 12, 1)
+    assert shards.pin_existing(1) == 2
+    assert shards.locate(11) == (1, "active") and shards.locate(12) == (1, "active")
+    assert shards.pin_existing(1) == 0
+
+
+def test_move_to_unknown_shard(shards):
+    with pytest.raises(ValueError):
+        shards.move(7, 5, wait=0)
+
+
+def test_single_shard_url_is_separate_from_directory(tmp_path):
+    directory = make_engine(f"sqlite:///{tmp_path / 'dir.db'}")
+    Base.metadata.create_all(bind=directory)
+    one = Shards(sessionmaker(bind=directory), [make_engine(f"sqlite:///{tmp_path / 's0.db'}")], ttl=0)
+    one.create_schema(run_migrations)
+    assert one.sharded and one.assign(7) == 0
+
+    _seed(one, 0, 7, 2)
+    with one.session_for(7) as db:
+        assert db.get_bind().url.database.endswith("s0.db")
+    assert _count(one, 0, 7) == (2, 4)
+    with one.directory() as db:
+        assert db.execute(select(func.count()).select_from(Response)).scalar() == 0